@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import asyncio
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, Dict, List, Literal, MutableMapping, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, MutableMapping, Optional, Tuple, Union
 
 import discord
 from redbot.core import Config, commands
@@ -10,7 +10,9 @@ from redbot.core.bot import Red
 
 if TYPE_CHECKING:
     from .adventureset import TaxesConverter
+    from .character_store import CharacterStore
     from .charsheet import BackpackFilterParser, Character
+    from .combat import CombatEngine
     from .converters import (
         DayConverter,
         EquipableItemConverter,
@@ -24,7 +26,10 @@ if TYPE_CHECKING:
         ThemeSetMonterConverter,
         ThemeSetPetConverter,
     )
-    from .game_session import GameSession
+    from .game_session import GameSession, GameSessions, SessionCharacters
+    from .monsters import MonsterRoster
+    from .state import ExpiringDict, PermissionCache, StateManager
+    from .timers import TimerHeap
 
 
 class AdventureMixin(ABC):
@@ -39,18 +44,25 @@ class AdventureMixin(ABC):
         self.bot: Red
         self.settings: Dict[Any, Any]
         self._ready: asyncio.Event
-        self._adventure_countdown: dict
-        self._rewards: dict
-        self._reward_message: dict
-        self._loss_message = {}
-        self._trader_countdown = {}
-        self._current_traders = {}
-        self._curent_trader_stock = {}
-        self._sessions: MutableMapping[int, GameSession] = {}
-        self._react_messaged = []
+        self._timers: TimerHeap
+        self._state: StateManager
+        self._sessions: GameSessions
+        self._rewards: ExpiringDict
+        self._reward_message: ExpiringDict
+        self._loss_message: ExpiringDict
+        self._react_messaged: ExpiringDict
+        self._last_trade: ExpiringDict
+        self._current_traders: ExpiringDict
+        self._curent_trader_stock: ExpiringDict
+        self._reaction_routes: ExpiringDict
+        self._perm_cache: PermissionCache
         self.tasks = {}
         self.locks: MutableMapping[int, asyncio.Lock] = {}
-        self.gb_task = None
+        self._character_store: CharacterStore
+        self._combat: CombatEngine
+        self._monster_rosters: MutableMapping[Tuple[str, int], MonsterRoster] = {}
+        self._themes_version: int = 0
+        self._character_store_task: Optional[asyncio.Task] = None
 
         self.RAISINS: list = None
         self.THREATEE: list = None
@@ -99,10 +111,6 @@ class AdventureMixin(ABC):
     async def allow_in_dm(self, ctx):
         raise NotImplementedError()
 
-    @abstractmethod
-    async def _garbage_collection(self):
-        raise NotImplementedError()
-
     @abstractmethod
     async def _adventure(self, ctx: commands.Context, *, challenge=None):
         raise NotImplementedError()
@@ -120,7 +128,11 @@ class AdventureMixin(ABC):
         raise NotImplementedError()
 
     @abstractmethod
-    async def update_monster_roster(self, ctx: commands.Context):
+    async def update_monster_roster(self, ctx: commands.Context, c: Optional[Character] = None):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def _invalidate_monster_rosters(self) -> None:
         raise NotImplementedError()
 
     @abstractmethod
@@ -151,6 +163,10 @@ class AdventureMixin(ABC):
     async def handle_run(self, guild_id, attack, diplomacy, magic, shame=False):
         raise NotImplementedError()
 
+    @abstractmethod
+    async def _combatants(self, session: GameSession, users: list) -> list:
+        raise NotImplementedError()
+
     @abstractmethod
     async def handle_fight(self, guild_id, fumblelist, critlist, attack, magic):
         raise NotImplementedError()
@@ -168,15 +184,19 @@ class AdventureMixin(ABC):
         raise NotImplementedError()
 
     @abstractmethod
-    async def _add_rewards(self, ctx: commands.Context, user, exp, cp, special):
+    async def _add_rewards(self, ctx: commands.Context, user, exp, cp, special, characters: SessionCharacters = None):
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def _apply_rewards(self, ctx: commands.Context, user, c: Character, exp, cp, special) -> str:
         raise NotImplementedError()
 
     @abstractmethod
-    async def _adv_countdown(self, ctx: commands.Context, seconds, title) -> asyncio.Task:
+    async def _adv_countdown(self, ctx: commands.Context, seconds, title) -> asyncio.Future:
         raise NotImplementedError()
 
     @abstractmethod
-    async def _cart_countdown(self, ctx: commands.Context, seconds, title, room=None) -> asyncio.Task:
+    async def _cart_countdown(self, ctx: commands.Context, seconds, title, room=None) -> asyncio.Future:
         raise NotImplementedError()
 
     @abstractmethod
@@ -6,9 +6,9 @@ import logging
 import random
 import time
 from abc import ABC
-from datetime import datetime, timedelta
+from datetime import datetime
 from types import SimpleNamespace
-from typing import Literal, MutableMapping, Union
+from typing import Literal, Mapping, MutableMapping, Optional, Tuple, Union
 
 import discord
 from discord.ext.commands import CheckFailure
@@ -29,27 +29,38 @@ from .backpack import BackPackCommands
 from .bank import bank
 from .cart import AdventureCart
 from .character import CharacterCommands
-from .charsheet import Character, calculate_sp, has_funds
+from .character_store import CharacterStore
+from .charsheet import Character, Item, has_funds, register_gear_sets, register_set_bonuses
 from .class_abilities import ClassAbilities
+from .combat import Combatant, CombatEngine
+from .constants import ORDER
 from .converters import ArgParserFailure
 from .defaults import default_global, default_guild, default_user
 from .dev import DevCommands
 from .economy import EconomyCommands
-from .game_session import GameSession
-from .helpers import _get_epoch, _remaining, escape, is_dev, smart_embed
+from .game_session import GameSession, GameSessions, SessionCharacters
+from .helpers import _get_epoch, escape, is_dev, smart_embed
 from .leaderboards import LeaderboardCommands
 from .loadouts import LoadoutCommands
 from .loot import LootCommands
+from .monsters import MonsterIndex, MonsterRoster
 from .negaverse import Negaverse
+from .progression import level_for_xp, skill_points
 from .rebirth import RebirthCommands
+from .state import ExpiringDict, PermissionCache, StateManager
 from .themeset import ThemesetCommands
+from .timers import TimerHeap
 
 _ = Translator("Adventure", __file__)
 
 log = logging.getLogger("red.cogs.adventure")
 
 
-_SCHEMA_VERSION = 4
+_SCHEMA_VERSION = 5
+# Adventures time out after at most five minutes, anything left from one is stale long before this.
+_STATE_TTL = 10 * 60
+# Whitelist and blacklist changes other than role changes can take this long to apply to reactions.
+_PERMISSION_TTL = 60
 _config: Config = None
 
 
@@ -88,6 +99,7 @@ class Adventure(
         requester: Literal["discord", "owner", "user", "user_strict"],
         user_id: int,
     ):
+        self._character_store.discard(user_id)
         await self.config.user_from_id(user_id).clear()
         await bank._config.user_from_id(
             user_id
@@ -95,11 +107,14 @@ class Adventure(
 
     __version__ = "3.5.5"
 
-    def __init__(self, bot: Red):
+    def __init__(self, bot: Red, config: Optional[Config] = None):
         self.bot = bot
         bank._init(bot)
-        self._last_trade = {}
         self._adv_results = AdventureResults(20)
+        self._combat = CombatEngine()
+        # Merged monster rosters by theme and the version of the custom theme data they were built from.
+        self._monster_rosters: MutableMapping[Tuple[str, int], MonsterRoster] = {}
+        self._themes_version = 0
         self.emojis = SimpleNamespace()
         self.emojis.fumble = "\N{EXCLAMATION QUESTION MARK}\N{VARIATION SELECTOR-16}"
         self.emojis.level_up = "\N{BLACK UP-POINTING DOUBLE TRIANGLE}"
@@ -140,6 +155,9 @@ class Adventure(
             "pray": self.emojis.pray,
             "run": self.emojis.run,
         }
+        self._adventure_actions_by_emoji = {emoji: action for (action, emoji) in self._adventure_controls.items()}
+        # Every emoji that can mean something on an adventure or cart message.
+        self._game_emojis = frozenset(ReactionPredicate.NUMBER_EMOJIS) | frozenset(self._adventure_actions)
         self._order = [
             "head",
             "neck",
@@ -161,20 +179,29 @@ class Adventure(
         }
         self._yes_no_controls = {self.emojis.yes: "yes", self.emojis.no: "no"}
 
-        self._adventure_countdown = {}
-        self._rewards = {}
-        self._reward_message = {}
-        self._loss_message = {}
-        self._trader_countdown = {}
-        self._current_traders = {}
-        self._curent_trader_stock = {}
-        self._sessions: MutableMapping[int, GameSession] = {}
-        self._react_messaged = []
+        # Adventure and cart deadlines, keyed by ("adventure" or "cart", guild id).
+        self._timers = TimerHeap()
+        # Everything below is dropped once it expires, see [p]devstate for what is held.
+        self._state = StateManager(self._timers)
+        self._sessions: GameSessions = GameSessions()
+        self._state.register("sessions", self._sessions)
+        self._rewards = ExpiringDict(self._state, "rewards", ttl=_STATE_TTL)
+        self._reward_message = ExpiringDict(self._state, "reward_message", ttl=_STATE_TTL)
+        self._loss_message = ExpiringDict(self._state, "loss_message", ttl=_STATE_TTL)
+        self._react_messaged = ExpiringDict(self._state, "react_messaged", ttl=_STATE_TTL)
+        self._last_trade = ExpiringDict(self._state, "last_trade", ttl=_STATE_TTL)
+        self._current_traders = ExpiringDict(self._state, "current_traders", ttl=_STATE_TTL)
+        self._curent_trader_stock = ExpiringDict(self._state, "current_trader_stock", ttl=_STATE_TTL)
+        # Message id -> "adventure" or "cart", for the messages on_reaction_add listens to.
+        self._reaction_routes = ExpiringDict(self._state, "reaction_routes", ttl=_STATE_TTL)
+        self._perm_cache = PermissionCache(self._state, "permissions", ttl=_PERMISSION_TTL)
         self.tasks = {}
         self.locks: MutableMapping[int, asyncio.Lock] = {}
-        self.gb_task = None
 
-        self.config = Config.get_conf(self, 2_710_801_001, force_registration=True)
+        # Headless runs (see simulator.py) pass an in-memory config.
+        self.config = config if config is not None else Config.get_conf(self, 2_710_801_001, force_registration=True)
+        self._character_store = CharacterStore(self.config)
+        self._character_store_task = None
         self._daily_bonus = {}
         self._separate_economy = None
 
@@ -267,6 +294,9 @@ class Adventure(
                 self.THREATEE = json.load(f)
             with files["set"].open("r") as f:
                 self.TR_GEAR_SET = json.load(f)
+            register_gear_sets(self.TR_GEAR_SET)
+            # Cached sheets hold set stats and pets from the previous theme.
+            self._character_store.characters.clear()
             with files["prefixes"].open("r") as f:
                 self.PREFIXES = json.load(f)
             with files["materials"].open("r") as f:
@@ -277,6 +307,8 @@ class Adventure(
                 self.SUFFIXES = json.load(f)
             with files["set_bonuses"].open("r") as f:
                 self.SET_BONUSES = json.load(f)
+            register_set_bonuses(self.SET_BONUSES)
+            self._invalidate_monster_rosters()
 
             if not all(
                 i
@@ -305,7 +337,8 @@ class Adventure(
             log.exception("There was an error starting up the cog", exc_info=err)
         else:
             self._ready_event.set()
-            self.gb_task = self.bot.loop.create_task(self._garbage_collection())
+            if self._character_store_task is None or self._character_store_task.done():
+                self._character_store_task = self.bot.loop.create_task(self._character_store.flush_loop())
 
     async def cleanup_tasks(self):
         await self._ready_event.wait()
@@ -422,6 +455,22 @@ class Adventure(
                                 adventurers_data[user]["backpack"][item_name] = item_data
             await self.config.schema_version.set(4)
 
+        if from_version < 5 <= to_version:
+            group = self.config._get_base_group(self.config.USER)
+            async with group.all() as adventurers_data:
+                async for user in AsyncIter(list(adventurers_data), steps=100):
+                    user_data = adventurers_data[user]
+                    if "backpack" in user_data:
+                        user_data["backpack"] = self._set_item_migration(user_data["backpack"])
+                    for slot, item in user_data.get("items", {}).items():
+                        if slot in ORDER and item:
+                            user_data["items"][slot] = self._set_item_migration(item)
+                    for loadout in user_data.get("loadouts", {}).values():
+                        for slot, item in loadout.items():
+                            if item:
+                                loadout[slot] = self._set_item_migration(item)
+            await self.config.schema_version.set(5)
+
     def _convert_item_migration(self, item_name, item_dict):
         new_name = item_name
         if "name" in item_dict:
@@ -450,25 +499,28 @@ class Adventure(
                 del item_dict["set"]
         return (new_name, item_dict)
 
+    def _set_item_migration(self, items: dict) -> dict:
+        """Rewrite set items into the form ``Item.to_json`` stores for them.
+
+        Set pieces only keep what is specific to the owner, their stats come from the
+        gear set registry when they are loaded. Every other entry keeps its stats, since
+        nothing else records them.
+        """
+        new_items = {}
+        for (item_name, item_dict) in items.items():
+            if item_dict.get("rarity") == "set":
+                try:
+                    item_name, item_dict = next(iter(Item.from_json(None, {item_name: item_dict}).to_json().items()))
+                except (KeyError, TypeError, AttributeError):
+                    pass
+            if item_name in new_items:
+                item_dict["owned"] = item_dict.get("owned", 1) + new_items[item_name].get("owned", 1)
+            new_items[item_name] = item_dict
+        return new_items
+
     def in_adventure(self, ctx=None, user=None):
         author = user or ctx.author
-        sessions = self._sessions
-        if not sessions:
-            return False
-        participants_ids = set(
-            [
-                p.id
-                for _loop, session in self._sessions.items()
-                for p in [
-                    *session.fight,
-                    *session.magic,
-                    *session.pray,
-                    *session.talk,
-                    *session.run,
-                ]
-            ]
-        )
-        return bool(author.id in participants_ids)
+        return self._sessions.is_playing(author.id)
 
     async def allow_in_dm(self, ctx):
         """Checks if the bank is global and allows the command in dm."""
@@ -481,17 +533,6 @@ class Adventure(
             self.locks[member.id] = asyncio.Lock()
         return self.locks[member.id]
 
-    async def _garbage_collection(self):
-        await self.bot.wait_until_red_ready()
-        delta = timedelta(minutes=6)
-        with contextlib.suppress(asyncio.CancelledError):
-            while True:
-                async for guild_id, session in AsyncIter(self._sessions.copy(), steps=100):
-                    if session.start_time + delta > datetime.now():
-                        if guild_id in self._sessions:
-                            del self._sessions[guild_id]
-                await asyncio.sleep(5)
-
     @commands.cooldown(rate=1, per=5, type=commands.BucketType.guild)
     @commands.command(name="adventure", aliases=["a"])
     @commands.bot_has_permissions(add_reactions=True)
@@ -551,12 +592,15 @@ class Adventure(
         adventure_msg = _("You feel adventurous, **{}**?").format(escape(ctx.author.display_name))
         try:
             reward, participants = await self._simple(ctx, adventure_msg, challenge)
+            session = self._sessions.get(ctx.guild.id)
             await self.config.guild(ctx.guild).cooldown.set(time.time())
             if ctx.guild.id in self._sessions:
                 self._sessions[ctx.guild.id].finished = True
         except Exception as exc:
             if ctx.guild.id in self._sessions:
                 self._sessions[ctx.guild.id].finished = True
+                # Keep whatever the result phases already applied to the participants' sheets.
+                await self._sessions[ctx.guild.id].characters.flush(self.get_lock)
             await self.config.guild(ctx.guild).cooldown.set(0)
             log.exception("Something went wrong controlling the game", exc_info=exc)
             while ctx.guild.id in self._sessions:
@@ -567,6 +611,11 @@ class Adventure(
             while ctx.guild.id in self._sessions:
                 del self._sessions[ctx.guild.id]
             return
+        if session is not None:
+            characters = session.characters
+        else:
+            # The session was dropped or expired while the results were handed out, load the sheets afresh.
+            characters = SessionCharacters(ctx, self.config, self._daily_bonus, self._character_store)
         reward_copy = reward.copy()
         send_message = ""
         for (userid, rewards) in reward_copy.items():
@@ -575,27 +624,31 @@ class Adventure(
                 if user is None:
                     # sorry no rewards if you leave the server
                     continue
-                msg = await self._add_rewards(ctx, user, rewards["xp"], rewards["cp"], rewards["special"])
+                msg = await self._add_rewards(
+                    ctx, user, rewards["xp"], rewards["cp"], rewards["special"], characters=characters
+                )
                 if msg:
                     send_message += f"{msg}\n"
-                self._rewards[userid] = {}
+                self._rewards.pop(userid, None)
+        # Write the result and reward changes now, the session's sheets were loaded when the fight ended
+        # and anything the participants do from here on is saved from a fresh sheet.
+        await characters.flush(self.get_lock)
         if send_message:
             for page in pagify(send_message):
                 await smart_embed(ctx, page, success=True)
-        if participants:
-            for user in participants:  # reset activated abilities
-                async with self.get_lock(user):
-                    try:
-                        c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-                    except Exception as exc:
-                        log.exception("Error with the new character sheet", exc_info=exc)
-                        continue
-                    if c.heroclass["name"] != "Ranger" and c.heroclass["ability"]:
-                        c.heroclass["ability"] = False
-                    if c.last_currency_check + 600 < time.time() or c.bal > c.last_known_currency:
-                        c.last_known_currency = await bank.get_balance(user)
-                        c.last_currency_check = time.time()
-                    await self.config.user(user).set(await c.to_json(ctx, self.config))
+        for user in participants or []:  # reset activated abilities
+            async with self.get_lock(user):
+                try:
+                    c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
+                except Exception as exc:
+                    log.exception("Error with the new character sheet", exc_info=exc)
+                    continue
+                if c.heroclass["name"] != "Ranger" and c.heroclass["ability"]:
+                    c.heroclass["ability"] = False
+                if c.last_currency_check + 600 < time.time() or c.bal > c.last_known_currency:
+                    c.last_known_currency = await bank.get_balance(user)
+                    c.last_currency_check = time.time()
+                await self._character_store.save(ctx, user, c)
         if ctx.message.id in self._reward_message:
             extramsg = self._reward_message.pop(ctx.message.id)
             if extramsg:
@@ -660,40 +713,25 @@ class Adventure(
         await ctx.bot.on_command_error(ctx, error, unhandled_by_cog=not handled)
 
     async def get_challenge(self, ctx: commands.Context, monsters):
-        try:
-            c = await Character.from_json(ctx, self.config, ctx.author, self._daily_bonus)
-        except Exception as exc:
-            log.exception("Error with the new character sheet", exc_info=exc)
-            choice = random.choice(list(monsters.keys()) * 3)
-            return choice
-        possible_monsters = []
+        index = monsters.index if isinstance(monsters, MonsterRoster) else MonsterIndex(monsters)
         stat_range = self._adv_results.get_stat_range(ctx)
-        async for (e, (m, stats)) in AsyncIter(monsters.items(), steps=100).enumerate(start=1):
-            if stat_range["max_stat"] > 0:
-                main_stat = stats["hp"] if (stat_range["stat_type"] == "attack") else stats["dipl"]
-                appropriate_range = (stat_range["min_stat"] * 0.5) <= main_stat <= (stat_range["max_stat"] * 1.2)
-            else:
-                appropriate_range = max(stats["hp"], stats["dipl"]) <= (max(c.att, c.int, c.cha) * 5)
-            if not appropriate_range:
-                continue
-            if not stats["boss"] and not stats["miniboss"]:
-                count = 0
-                break_at = random.randint(1, 15)
-                while count < break_at:
-                    count += 1
-                    possible_monsters.append(m)
-                    if count == break_at:
-                        break
-            else:
-                possible_monsters.append(m)
-
-        if len(possible_monsters) == 0:
-            choice = random.choice(list(monsters.keys()) * 3)
+        if stat_range["max_stat"] > 0:
+            by_stat = index.hp if (stat_range["stat_type"] == "attack") else index.dipl
+            choice = by_stat.choose(stat_range["min_stat"] * 0.5, stat_range["max_stat"] * 1.2)
         else:
-            choice = random.choice(possible_monsters)
+            try:
+                c = await Character.from_json(ctx, self.config, ctx.author, self._daily_bonus)
+            except Exception as exc:
+                log.exception("Error with the new character sheet", exc_info=exc)
+                return index.choose_any()
+            choice = index.peak.choose(None, max(c.att, c.int, c.cha) * 5)
+        if choice is None:
+            choice = index.choose_any()
         return choice
 
-    def _dynamic_monster_stats(self, ctx: commands.Context, choice: MutableMapping):
+    def _dynamic_monster_stats(self, ctx: commands.Context, choice: Mapping) -> dict:
+        """Return a copy of `choice` with its stats adjusted to the guild's recent results."""
+        choice = dict(choice)
         stat_range = self._adv_results.get_stat_range(ctx)
         win_percentage = stat_range.get("win_percent", 0.5)
         choice["cdef"] = choice.get("cdef", 1.0)
@@ -787,21 +825,35 @@ class Adventure(
         choice["cdef"] = new_cdef
         return choice
 
-    async def update_monster_roster(self, ctx: commands.Context):
+    def _invalidate_monster_rosters(self) -> None:
+        """Forget the merged rosters, for when the bundled or custom theme data changes."""
+        self._themes_version += 1
+        self._monster_rosters.clear()
 
-        try:
-            c = await Character.from_json(ctx, self.config, ctx.author, self._daily_bonus)
-            failed = False
-        except Exception as exc:
-            log.exception("Error with the new character sheet", exc_info=exc)
-            failed = True
+    async def _monster_roster(self) -> MonsterRoster:
+        theme = await self.config.theme()
+        key = (theme, self._themes_version)
+        roster = self._monster_rosters.get(key)
+        if roster is None:
+            extra_monsters = await self.config.themes.all()
+            extra_monsters = extra_monsters.get(theme, {}).get("monsters", {})
+            roster = MonsterRoster({**self.MONSTERS, **self.AS_MONSTERS, **extra_monsters})
+            # A theme edit while the custom monsters were loading leaves this under a version nobody asks for.
+            self._monster_rosters[key] = roster
+        return roster
+
+    async def update_monster_roster(self, ctx: commands.Context, c: Optional[Character] = None):
+        failed = False
+        if c is None:
+            try:
+                c = await Character.from_json(ctx, self.config, ctx.author, self._daily_bonus)
+            except Exception as exc:
+                log.exception("Error with the new character sheet", exc_info=exc)
+                failed = True
 
         transcended_chance = random.randint(0, 10)
-        theme = await self.config.theme()
-        extra_monsters = await self.config.themes.all()
-        extra_monsters = extra_monsters.get(theme, {}).get("monsters", {})
+        monsters = await self._monster_roster()
         monster_stats = 1
-        monsters = {**self.MONSTERS, **self.AS_MONSTERS, **extra_monsters}
         transcended = False
         if not failed:
             if transcended_chance == 5:
@@ -829,7 +881,7 @@ class Adventure(
             else:
                 easy_mode = True
 
-        monster_roster, monster_stats, transcended = await self.update_monster_roster(ctx)
+        monster_roster, monster_stats, transcended = await self.update_monster_roster(ctx, c)
         if not challenge or challenge not in monster_roster:
             challenge = await self.get_challenge(ctx, monster_roster)
 
@@ -882,7 +934,9 @@ class Adventure(
             monster_modified_stats=self._dynamic_monster_stats(ctx, monster_roster[challenge]),
             easy_mode=easy_mode,
             no_monster=no_monster,
+            characters=SessionCharacters(ctx, self.config, self._daily_bonus, self._character_store),
         )
+        self._state.expire("sessions", ctx.guild.id, _STATE_TTL)
         adventure_msg = (
             f"{adventure_msg}{text}\n{random.choice(self.LOCATIONS)}\n"
             f"**{escape(ctx.author.display_name)}**{random.choice(self.RAISINS)}"
@@ -984,6 +1038,7 @@ class Adventure(
 
         session.message_id = adventure_msg.id
         session.message = adventure_msg
+        self._reaction_routes[adventure_msg.id] = "adventure"
         start_adding_reactions(adventure_msg, self._adventure_actions)
         timer = await self._adv_countdown(ctx, session.timer, "Adventure ending")
         self.tasks[adventure_msg.id] = timer
@@ -994,14 +1049,35 @@ class Adventure(
         except Exception as exc:
             timer.cancel()
             log.exception("Error with the countdown timer", exc_info=exc)
+        self._reaction_routes.pop(adventure_msg.id, None)
 
         return await self._result(ctx, adventure_msg)
 
     async def has_perm(self, user):
+        guild = getattr(user, "guild", None)
+        key = (guild.id if guild is not None else None, user.id)
+        allowed = self._perm_cache.lookup(key)
+        if allowed is not None:
+            return allowed
         if hasattr(self.bot, "allowed_by_whitelist_blacklist"):
-            return await self.bot.allowed_by_whitelist_blacklist(user)
+            allowed = await self.bot.allowed_by_whitelist_blacklist(user)
         else:
-            return await self.local_perms(user) or await self.global_perms(user)
+            allowed = await self.local_perms(user) or await self.global_perms(user)
+        self._perm_cache[key] = allowed
+        return allowed
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles != after.roles:
+            self._perm_cache.pop((after.guild.id, after.id), None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        self._perm_cache.invalidate_guild(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self._perm_cache.invalidate_guild(role.guild.id)
 
     async def local_perms(self, user):
         """Check the user is/isn't locally whitelisted/blacklisted.
@@ -1037,12 +1113,13 @@ class Adventure(
     @commands.Cog.listener()
     async def on_reaction_add(self, reaction: discord.Reaction, user: discord.Member):
         """This will be a cog level reaction_add listener for game logic."""
-        await self.bot.wait_until_ready()
-        if user.bot:
+        # Most reactions the bot sees are on other messages, turn them away before awaiting anything.
+        if user.bot or str(reaction.emoji) not in self._game_emojis:
             return
-        emojis = list(ReactionPredicate.NUMBER_EMOJIS) + self._adventure_actions
-        if str(reaction.emoji) not in emojis:
+        route = self._reaction_routes.get(reaction.message.id)
+        if route is None:
             return
+        await self.bot.wait_until_ready()
         if self.red_340_or_newer:
             if (guild := getattr(user, "guild", None)) is not None:
                 if await self.bot.cog_disabled_in_guild(self, guild):
@@ -1051,33 +1128,30 @@ class Adventure(
                 return
         if not await self.has_perm(user):
             return
-        if guild.id in self._sessions:
+        if route == "adventure" and guild.id in self._sessions:
             if reaction.message.id == self._sessions[guild.id].message_id:
-                if guild.id in self._adventure_countdown:
-                    (timer, done, sremain) = self._adventure_countdown[guild.id]
-                    if sremain > 3:
-                        await self._handle_adventure(reaction, user)
-        if guild.id in self._current_traders:
+                sremain = self._timers.remaining(("adventure", guild.id))
+                if sremain is not None and sremain > 3:
+                    await self._handle_adventure(reaction, user)
+        elif route == "cart" and guild.id in self._current_traders:
             if reaction.message.id == self._current_traders[guild.id]["msg"] and not self.in_adventure(user=user):
                 if user in self._current_traders[guild.id]["users"]:
                     return
-                if guild.id in self._trader_countdown:
-                    (timer, done, sremain) = self._trader_countdown[guild.id]
-                    if sremain > 3:
-                        await self._handle_cart(reaction, user)
+                sremain = self._timers.remaining(("cart", guild.id))
+                if sremain is not None and sremain > 3:
+                    await self._handle_cart(reaction, user)
 
     async def _handle_adventure(self, reaction: discord.Reaction, user: discord.Member):
-        action = {v: k for k, v in self._adventure_controls.items()}[str(reaction.emoji)]
+        action = self._adventure_actions_by_emoji.get(str(reaction.emoji))
+        if action is None:
+            return
         session = self._sessions[user.guild.id]
         has_fund = await has_funds(user, 250)
-        for x in ["fight", "magic", "talk", "pray", "run"]:
-            if user in getattr(session, x, []):
-                getattr(session, x).remove(user)
-
-            if not has_fund or user in getattr(session, x, []):
-                if reaction.message.channel.permissions_for(user.guild.me).manage_messages:
-                    symbol = self._adventure_controls[x]
-                    await reaction.message.remove_reaction(symbol, user)
+        self._sessions.leave(user.guild.id, user)
+        if not has_fund and reaction.message.channel.permissions_for(user.guild.me).manage_messages:
+            for x in ["fight", "magic", "talk", "pray", "run"]:
+                symbol = self._adventure_controls[x]
+                await reaction.message.remove_reaction(symbol, user)
 
         restricted = await self.config.restrict()
         if user not in getattr(session, action, []):
@@ -1095,34 +1169,21 @@ class Adventure(
                         )
                     )
                 return
-            if restricted:
-                all_users = []
-                for (guild_id, guild_session) in self._sessions.items():
-                    guild_users_in_game = (
-                        guild_session.fight
-                        + guild_session.magic
-                        + guild_session.talk
-                        + guild_session.pray
-                        + guild_session.run
+            if restricted and self._sessions.is_playing(user.id, exclude=user.guild.id):
+                user_id = f"{user.id}-{user.guild.id}"
+                # iterating through reactions here and removing them seems to be expensive
+                # so they can just keep their react on the adventures they can't join
+                if user_id not in self._react_messaged:
+                    await reaction.message.channel.send(
+                        _(
+                            "**{c}**, you are already in an existing adventure. "
+                            "Wait for it to finish before joining another one."
+                        ).format(c=escape(user.display_name))
                     )
-                    all_users = all_users + guild_users_in_game
-
-                if user in all_users:
-                    user_id = f"{user.id}-{user.guild.id}"
-                    # iterating through reactions here and removing them seems to be expensive
-                    # so they can just keep their react on the adventures they can't join
-                    if user_id not in self._react_messaged:
-                        await reaction.message.channel.send(
-                            _(
-                                "**{c}**, you are already in an existing adventure. "
-                                "Wait for it to finish before joining another one."
-                            ).format(c=escape(user.display_name))
-                        )
-                        self._react_messaged.append(user_id)
-                else:
-                    getattr(session, action).append(user)
-            else:
-                getattr(session, action).append(user)
+                    self._react_messaged[user_id] = True
+            elif self._sessions.get(user.guild.id) is session:
+                # The adventure may have ended while we were waiting on the bank or config.
+                self._sessions.join(user.guild.id, user, action)
 
     async def _result(self, ctx: commands.Context, message: discord.Message):
         if ctx.guild.id not in self._sessions:
@@ -1150,6 +1211,8 @@ class Adventure(
         self._sessions[ctx.guild.id].pray = pray_list
         self._sessions[ctx.guild.id].run = run_list
         self._sessions[ctx.guild.id].magic = magic_list
+        # Load every participant once; all phases below share these sheets.
+        await session.characters.load(set(fight_list + magic_list + talk_list + pray_list + run_list))
         fight_name_list = []
         wizard_name_list = []
         talk_name_list = []
@@ -1211,10 +1274,8 @@ class Adventure(
             parsed_users = []
             for (action_name, action) in participants.items():
                 for user in action:
-                    try:
-                        c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-                    except Exception as exc:
-                        log.exception("Error with the new character sheet", exc_info=exc)
+                    c = await session.characters.get(user)
+                    if c is None:
                         continue
                     current_val = c.adventures.get(action_name, 0)
                     c.adventures.update({action_name: current_val + 1})
@@ -1224,7 +1285,7 @@ class Adventure(
                         c.adventures.update({special_action: current_val + 1})
                         c.weekly_score.update({"adventures": c.weekly_score.get("adventures", 0) + 1})
                         parsed_users.append(user)
-                    await self.config.user(user).set(await c.to_json(ctx, self.config))
+                    session.characters.mark_dirty(user)
             attack, diplomacy, magic, run_msg = await self.handle_run(
                 ctx.guild.id, attack, diplomacy, magic, shame=True
             )
@@ -1298,10 +1359,8 @@ class Adventure(
         if run_list:
             users = run_list
             for user in users:
-                try:
-                    c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-                except Exception as exc:
-                    log.exception("Error with the new character sheet", exc_info=exc)
+                c = await session.characters.get(user)
+                if c is None:
                     continue
                 if c.bal > 0:
                     multiplier = 1 / 3
@@ -1426,10 +1485,8 @@ class Adventure(
                 ctx.guild,
             )
             for user in session.participants:
-                try:
-                    c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-                except Exception as exc:
-                    log.exception("Error with the new character sheet", exc_info=exc)
+                c = await session.characters.get(user)
+                if c is None:
                     continue
                 if c.bal > 0:
                     multiplier = 1 / 3 if c.rebirths >= 10 else 0.01
@@ -1449,7 +1506,7 @@ class Adventure(
                             await bank.set_balance(user, 0)
                 c.adventures.update({"loses": c.adventures.get("loses", 0) + 1})
                 c.weekly_score.update({"adventures": c.weekly_score.get("adventures", 0) + 1})
-                await self.config.user(user).set(await c.to_json(ctx, self.config))
+                session.characters.mark_dirty(user)
             loss_list = []
             result_msg += session.miniboss["defeat"]
             if len(repair_list) > 0:
@@ -1474,10 +1531,8 @@ class Adventure(
                 ctx.guild,
             )
             for user in session.participants:
-                try:
-                    c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-                except Exception as exc:
-                    log.exception("Error with the new character sheet", exc_info=exc)
+                c = await session.characters.get(user)
+                if c is None:
                     continue
                 if c.bal > 0:
                     multiplier = 1 / 3 if c.rebirths >= 10 else 0.01
@@ -1552,10 +1607,8 @@ class Adventure(
                 )
                 users = set(fight_list + magic_list + talk_list + pray_list + fumblelist)
                 for user in users:
-                    try:
-                        c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-                    except Exception as exc:
-                        log.exception("Error with the new character sheet", exc_info=exc)
+                    c = await session.characters.get(user)
+                    if c is None:
                         continue
                     if c.bal > 0:
                         multiplier = 1 / 3 if c.rebirths >= 10 else 0.01
@@ -1724,10 +1777,8 @@ class Adventure(
                 )
                 users = set(fight_list + magic_list + talk_list + pray_list + fumblelist)
                 for user in users:
-                    try:
-                        c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-                    except Exception as exc:
-                        log.exception("Error with the new character sheet", exc_info=exc)
+                    c = await session.characters.get(user)
+                    if c is None:
                         continue
                     if c.bal > 0:
                         multiplier = 1 / 3 if c.rebirths >= 10 else 0.01
@@ -1787,10 +1838,8 @@ class Adventure(
         parsed_users = []
         for (action_name, action) in participants.items():
             for user in action:
-                try:
-                    c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-                except Exception as exc:
-                    log.exception("Error with the new character sheet", exc_info=exc)
+                c = await session.characters.get(user)
+                if c is None:
                     continue
                 current_val = c.adventures.get(action_name, 0)
                 c.adventures.update({action_name: current_val + 1})
@@ -1800,7 +1849,7 @@ class Adventure(
                     c.adventures.update({special_action: current_val + 1})
                     c.weekly_score.update({"adventures": c.weekly_score.get("adventures", 0) + 1})
                     parsed_users.append(user)
-                await self.config.user(user).set(await c.to_json(ctx, self.config))
+                session.characters.mark_dirty(user)
 
     async def handle_run(self, guild_id, attack, diplomacy, magic, shame=False):
         runners = []
@@ -1816,9 +1865,16 @@ class Adventure(
                 )
         return (attack, diplomacy, magic, msg)
 
+    async def _combatants(self, session: GameSession, users: list) -> list:
+        party = []
+        for user in users:
+            c = await session.characters.get(user)
+            if c is not None:
+                party.append((user, c))
+        return party
+
     async def handle_fight(self, guild_id, fumblelist, critlist, attack, magic):
         session = self._sessions[guild_id]
-        ctx = session.ctx
         fight_list = list(set(session.fight))
         magic_list = list(set(session.magic))
         attack_list = list(set(fight_list + magic_list))
@@ -1834,65 +1890,30 @@ class Adventure(
         else:
             return (fumblelist, critlist, attack, magic, "")
 
-        for user in fight_list:
-            try:
-                c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-            except Exception as exc:
-                log.exception("Error with the new character sheet", exc_info=exc)
-                continue
-            crit_mod = max(max(c.dex, c.luck // 2) + (c.total_att // 20), 0)  # Thanks GoaFan77
-            mod = 0
-            max_roll = 100 if c.rebirths >= 30 else 50 if c.rebirths >= 15 else 20
-            if crit_mod != 0:
-                mod = round(crit_mod / 10)
-            if c.rebirths < 15 < mod:
-                mod = 15
-                max_roll = 20
-            elif (mod + 1) > 45:
-                mod = 45
-
-            roll = max(random.randint((1 + mod), max_roll), 1)
-            if c.heroclass.get("pet", {}).get("bonuses", {}).get("crit", False):
-                pet_crit = c.heroclass.get("pet", {}).get("bonuses", {}).get("crit", 0)
-                pet_crit = random.randint(pet_crit, 100)
-                if pet_crit == 100:
-                    roll = max_roll
-                elif roll <= 25 and pet_crit >= 95:
-                    roll = random.randint(max_roll - 5, max_roll)
-                elif roll > 25 and pet_crit >= 95:
-                    roll = random.randint(roll, max_roll)
-            roll_perc = roll / max_roll
+        fighters = await self._combatants(session, fight_list)
+        rolls = self._combat.rolls("fight", [Combatant.from_character(c) for (user, c) in fighters], pdef)
+        for ((user, c), result) in zip(fighters, rolls):
+            roll = result.roll
             att_value = c.total_att
-            rebirths = c.rebirths * (3 if c.heroclass["name"] == "Berserker" else 1)
-            if roll_perc < 0.10:
-                if c.heroclass["name"] == "Berserker" and c.heroclass["ability"]:
-                    bonus_roll = random.randint(5, 15)
-                    bonus_multi = random.choice([0.2, 0.3, 0.4, 0.5])
-                    bonus = max(bonus_roll, int((roll + att_value + rebirths) * bonus_multi))
-                    attack += int((roll - bonus + att_value) / pdef)
-                    report += (
-                        f"**{escape(user.display_name)}**: "
-                        f"{self.emojis.dice}({roll}) + "
-                        f"{self.emojis.berserk}{humanize_number(bonus)} + "
-                        f"{self.emojis.attack}{str(humanize_number(att_value))}\n"
-                    )
-                else:
-                    msg += _("**{}** fumbled the attack.\n").format(escape(user.display_name))
-                    fumblelist.append(user)
-                    fumble_count += 1
-            elif roll_perc > 0.95 or c.heroclass["name"] == "Berserker":
+            attack += result.value
+            if result.rescued:
+                report += (
+                    f"**{escape(user.display_name)}**: "
+                    f"{self.emojis.dice}({roll}) + "
+                    f"{self.emojis.berserk}{humanize_number(result.bonus)} + "
+                    f"{self.emojis.attack}{str(humanize_number(att_value))}\n"
+                )
+            elif result.fumbled:
+                msg += _("**{}** fumbled the attack.\n").format(escape(user.display_name))
+                fumblelist.append(user)
+                fumble_count += 1
+            elif result.boosted:
                 crit_str = ""
-                crit_bonus = 0
-                base_bonus = random.randint(5, 10) + rebirths
-                if roll_perc > 0.95:
+                if result.crit:
                     msg += _("**{}** landed a critical hit.\n").format(escape(user.display_name))
                     critlist.append(user)
-                    crit_bonus = (random.randint(5, 20)) + (rebirths * 2)
-                    crit_str = f"{self.emojis.crit} {humanize_number(crit_bonus)}"
-                if c.heroclass["name"] == "Berserker" and c.heroclass["ability"]:
-                    base_bonus = (random.randint(1, 10) + 5) * (rebirths // 2)
-                base_str = f"{self.emojis.crit}️ {humanize_number(base_bonus)}"
-                attack += int((roll + base_bonus + crit_bonus + att_value) / pdef)
+                    crit_str = f"{self.emojis.crit} {humanize_number(result.crit_bonus)}"
+                base_str = f"{self.emojis.crit}️ {humanize_number(result.bonus)}"
                 bonus = base_str + crit_str
                 report += (
                     f"**{escape(user.display_name)}**: "
@@ -1901,7 +1922,6 @@ class Adventure(
                     f"{self.emojis.attack}{str(humanize_number(att_value))}\n"
                 )
             else:
-                attack += int((roll + att_value) / pdef) + rebirths
                 report += (
                     f"**{escape(user.display_name)}**: "
                     f"{self.emojis.dice}({roll}) + "
@@ -1909,64 +1929,30 @@ class Adventure(
                 )
             if session.insight[0] == 1 and user.id != session.insight[1].user.id:
                 attack += int(session.insight[1].total_att * 0.2)
-        for user in magic_list:
-            try:
-                c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-            except Exception as exc:
-                log.exception("Error with the new character sheet", exc_info=exc)
-                continue
-            crit_mod = max(max(c.dex, c.luck // 2) + (c.total_int // 20), 0)
-            mod = 0
-            max_roll = 100 if c.rebirths >= 30 else 50 if c.rebirths >= 15 else 20
-            if crit_mod != 0:
-                mod = round(crit_mod / 10)
-            if c.rebirths < 15 < mod:
-                mod = 15
-                max_roll = 20
-            elif (mod + 1) > 45:
-                mod = 45
-            roll = max(random.randint((1 + mod), max_roll), 1)
-            if c.heroclass.get("pet", {}).get("bonuses", {}).get("crit", False):
-                pet_crit = c.heroclass.get("pet", {}).get("bonuses", {}).get("crit", 0)
-                pet_crit = random.randint(pet_crit, 100)
-                if pet_crit == 100:
-                    roll = max_roll
-                elif roll <= 25 and pet_crit >= 95:
-                    roll = random.randint(max_roll - 5, max_roll)
-                elif roll > 25 and pet_crit >= 95:
-                    roll = random.randint(roll, max_roll)
-            roll_perc = roll / max_roll
+        casters = await self._combatants(session, magic_list)
+        rolls = self._combat.rolls("magic", [Combatant.from_character(c) for (user, c) in casters], mdef)
+        for ((user, c), result) in zip(casters, rolls):
+            roll = result.roll
             int_value = c.total_int
-            rebirths = c.rebirths * (3 if c.heroclass["name"] == "Wizard" else 1)
-            if roll_perc < 0.10:
+            magic += result.value
+            if result.fumbled:
                 msg += _("{}**{}** almost set themselves on fire.\n").format(failed_emoji, escape(user.display_name))
                 fumblelist.append(user)
                 fumble_count += 1
-                if c.heroclass["name"] == "Wizard" and c.heroclass["ability"]:
-                    bonus_roll = random.randint(5, 15)
-                    bonus_multi = random.choice([0.2, 0.3, 0.4, 0.5])
-                    bonus = max(bonus_roll, int((roll + int_value + rebirths) * bonus_multi))
-                    magic += int((roll - bonus + int_value) / mdef)
+                if result.rescued:
                     report += (
                         f"**{escape(user.display_name)}**: "
                         f"{self.emojis.dice}({roll}) + "
-                        f"{self.emojis.magic_crit}{humanize_number(bonus)} + "
+                        f"{self.emojis.magic_crit}{humanize_number(result.bonus)} + "
                         f"{self.emojis.magic}{str(humanize_number(int_value))}\n"
                     )
-            elif roll_perc > 0.95 or (c.heroclass["name"] == "Wizard"):
+            elif result.boosted:
                 crit_str = ""
-                crit_bonus = 0
-                base_bonus = random.randint(5, 10) + rebirths
-                base_str = f"{self.emojis.magic_crit}️ {humanize_number(base_bonus)}"
-                if roll_perc > 0.95:
+                base_str = f"{self.emojis.magic_crit}️ {humanize_number(result.bonus)}"
+                if result.crit:
                     msg += _("**{}** had a surge of energy.\n").format(escape(user.display_name))
                     critlist.append(user)
-                    crit_bonus = (random.randint(5, 20)) + (rebirths * 2)
-                    crit_str = f"{self.emojis.crit} {humanize_number(crit_bonus)}"
-                if c.heroclass["name"] == "Wizard" and c.heroclass["ability"]:
-                    base_bonus = (random.randint(1, 10) + 5) * (rebirths // 2)
-                    base_str = f"{self.emojis.magic_crit}️ {humanize_number(base_bonus)}"
-                magic += int((roll + base_bonus + crit_bonus + int_value) / mdef)
+                    crit_str = f"{self.emojis.crit} {humanize_number(result.crit_bonus)}"
                 bonus = base_str + crit_str
                 report += (
                     f"**{escape(user.display_name)}**: "
@@ -1975,7 +1961,6 @@ class Adventure(
                     f"{self.emojis.magic}{humanize_number(int_value)}\n"
                 )
             else:
-                magic += int((roll + int_value) / mdef) + c.rebirths // 5
                 report += (
                     f"**{escape(user.display_name)}**: "
                     f"{self.emojis.dice}({roll}) + "
@@ -1990,16 +1975,15 @@ class Adventure(
             if user in session.fight:
                 if session.insight[0] == 1 and user.id != session.insight[1].user.id:
                     attack -= int(session.insight[1].total_att * 0.2)
-                session.fight.remove(user)
+                self._sessions.leave(guild_id, user)
             elif user in session.magic:
                 if session.insight[0] == 1 and user.id != session.insight[1].user.id:
                     attack -= int(session.insight[1].total_int * 0.2)
-                session.magic.remove(user)
+                self._sessions.leave(guild_id, user)
         return (fumblelist, critlist, attack, magic, msg)
 
     async def handle_pray(self, guild_id, fumblelist, attack, diplomacy, magic):
         session = self._sessions[guild_id]
-        ctx = session.ctx
         talk_list = list(set(session.talk))
         pray_list = list(set(session.pray))
         fight_list = list(set(session.fight))
@@ -2010,43 +1994,21 @@ class Adventure(
             god = guild_god_name
         msg = ""
         failed_emoji = self.emojis.fumble
-        for user in pray_list:
-            try:
-                c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-            except Exception as exc:
-                log.exception("Error with the new character sheet", exc_info=exc)
-                continue
-            rebirths = c.rebirths * (2 if c.heroclass["name"] == "Cleric" else 1)
+        party = await self._combatants(session, pray_list)
+        prayers = self._combat.prayers(
+            [Combatant.from_character(c) for (user, c) in party], len(fight_list), len(talk_list), len(magic_list)
+        )
+        for ((user, c), result) in zip(party, prayers):
+            roll = result.roll
             if c.heroclass["name"] == "Cleric":
-                crit_mod = max(max(c.dex, c.luck // 2) + (c.total_int // 20), 0)
-                mod = 0
-                max_roll = 100 if c.rebirths >= 30 else 50 if c.rebirths >= 15 else 20
-                if crit_mod != 0:
-                    mod = round(crit_mod / 10)
-                if c.rebirths < 15 < mod:
-                    mod = 15
-                    max_roll = 20
-                elif (mod + 1) > 45:
-                    mod = 45
-                roll = max(random.randint((1 + mod), max_roll), 1)
-                roll_perc = roll / max_roll
                 if len(fight_list + talk_list + magic_list) == 0:
                     msg += _("**{}** blessed like a madman but nobody was there to receive it.\n").format(
                         escape(user.display_name)
                     )
-                if roll_perc < 0.15:
-                    pray_att_bonus = 0
-                    pray_diplo_bonus = 0
-                    pray_magic_bonus = 0
-                    if fight_list:
-                        pray_att_bonus = (5 * len(fight_list)) - ((5 * len(fight_list)) * max(rebirths * 0.01, 1.5))
-                    if talk_list:
-                        pray_diplo_bonus = (5 * len(talk_list)) - ((5 * len(talk_list)) * max(rebirths * 0.01, 1.5))
-                    if magic_list:
-                        pray_magic_bonus = (5 * len(magic_list)) - ((5 * len(magic_list)) * max(rebirths * 0.01, 1.5))
-                    attack -= pray_att_bonus
-                    diplomacy -= pray_diplo_bonus
-                    magic -= pray_magic_bonus
+                attack += result.attack
+                diplomacy += result.talk
+                magic += result.magic
+                if result.fumbled:
                     fumblelist.append(user)
                     msg += _(
                         "**{user}'s** sermon offended the mighty {god}. {failed_emoji}"
@@ -2058,33 +2020,13 @@ class Adventure(
                         attack=self.emojis.attack,
                         talk=self.emojis.talk,
                         magic=self.emojis.magic,
-                        len_f_list=humanize_number(pray_att_bonus),
-                        len_t_list=humanize_number(pray_diplo_bonus),
-                        len_m_list=humanize_number(pray_magic_bonus),
+                        len_f_list=humanize_number(-result.attack),
+                        len_t_list=humanize_number(-result.talk),
+                        len_m_list=humanize_number(-result.magic),
                         roll_emoji=self.emojis.dice,
                         roll=roll,
                     )
                 else:
-                    mod = roll // 3 if not c.heroclass["ability"] else roll
-                    pray_att_bonus = 0
-                    pray_diplo_bonus = 0
-                    pray_magic_bonus = 0
-
-                    if fight_list:
-                        pray_att_bonus = int(
-                            (mod * len(fight_list)) + ((mod * len(fight_list)) * max(rebirths * 0.05, 1.5))
-                        )
-                    if talk_list:
-                        pray_diplo_bonus = int(
-                            (mod * len(talk_list)) + ((mod * len(talk_list)) * max(rebirths * 0.05, 1.5))
-                        )
-                    if magic_list:
-                        pray_magic_bonus = int(
-                            (mod * len(magic_list)) + ((mod * len(magic_list)) * max(rebirths * 0.05, 1.5))
-                        )
-                    attack += pray_att_bonus
-                    magic += pray_magic_bonus
-                    diplomacy += pray_diplo_bonus
                     if roll == 50:
                         roll_msg = _(
                             "**{user}** turned into an avatar of mighty {god}. "
@@ -2101,33 +2043,22 @@ class Adventure(
                         attack=self.emojis.attack,
                         talk=self.emojis.talk,
                         magic=self.emojis.magic,
-                        len_f_list=humanize_number(pray_att_bonus),
-                        len_t_list=humanize_number(pray_diplo_bonus),
-                        len_m_list=humanize_number(pray_magic_bonus),
+                        len_f_list=humanize_number(result.attack),
+                        len_t_list=humanize_number(result.talk),
+                        len_m_list=humanize_number(result.magic),
                         roll_emoji=self.emojis.dice,
                         roll=roll,
                     )
             else:
-                roll = random.randint(1, 10)
                 if len(fight_list + talk_list + magic_list) == 0:
                     msg += _("**{}** prayed like a madman but nobody else helped them.\n").format(
                         escape(user.display_name)
                     )
 
-                elif roll == 5:
-                    attack_buff = 0
-                    talk_buff = 0
-                    magic_buff = 0
-                    if fight_list:
-                        attack_buff = 10 * (len(fight_list) + rebirths // 15)
-                    if talk_list:
-                        talk_buff = 10 * (len(talk_list) + rebirths // 15)
-                    if magic_list:
-                        magic_buff = 10 * (len(magic_list) + rebirths // 15)
-
-                    attack += attack_buff
-                    magic += magic_buff
-                    diplomacy += talk_buff
+                elif not result.fumbled:
+                    attack += result.attack
+                    magic += result.magic
+                    diplomacy += result.talk
                     msg += _(
                         "**{user}'s** prayer called upon the mighty {god} to help you. "
                         "(+{len_f_list}{attack}/+{len_t_list}{talk}/+{len_m_list}{magic}) {roll_emoji}({roll})\n"
@@ -2137,9 +2068,9 @@ class Adventure(
                         attack=self.emojis.attack,
                         talk=self.emojis.talk,
                         magic=self.emojis.magic,
-                        len_f_list=humanize_number(attack_buff),
-                        len_t_list=humanize_number(talk_buff),
-                        len_m_list=humanize_number(magic_buff),
+                        len_f_list=humanize_number(result.attack),
+                        len_t_list=humanize_number(result.talk),
+                        len_m_list=humanize_number(result.magic),
                         roll_emoji=self.emojis.dice,
                         roll=roll,
                     )
@@ -2153,7 +2084,6 @@ class Adventure(
 
     async def handle_talk(self, guild_id, fumblelist, critlist, diplomacy):
         session = self._sessions[guild_id]
-        ctx = session.ctx
         cdef = max(session.monster_modified_stats["cdef"], 0.5)
         talk_list = list(set(session.talk))
         if len(talk_list) >= 1:
@@ -2163,52 +2093,27 @@ class Adventure(
         else:
             return (fumblelist, critlist, diplomacy, "")
         failed_emoji = self.emojis.fumble
-        for user in talk_list:
-            try:
-                c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-            except Exception as exc:
-                log.exception("Error with the new character sheet", exc_info=exc)
-                continue
-            crit_mod = max(max(c.dex, c.luck // 2) + (c.total_int // 50) + (c.total_cha // 20), 0)
-            mod = 0
-            max_roll = 100 if c.rebirths >= 30 else 50 if c.rebirths >= 15 else 20
-            if crit_mod != 0:
-                mod = round(crit_mod / 10)
-            if c.rebirths < 15 < mod:
-                mod = 15
-            elif (mod + 1) > 45:
-                mod = 45
-            roll = max(random.randint((1 + mod), max_roll), 1)
+        talkers = await self._combatants(session, talk_list)
+        rolls = self._combat.rolls("talk", [Combatant.from_character(c) for (user, c) in talkers], cdef)
+        for ((user, c), result) in zip(talkers, rolls):
+            roll = result.roll
             dipl_value = c.total_cha
-            rebirths = c.rebirths * (3 if c.heroclass["name"] == "Bard" else 1)
-            roll_perc = roll / max_roll
-            if roll_perc < 0.10:
-                if c.heroclass["name"] == "Bard" and c.heroclass["ability"]:
-                    bonus = random.randint(5, 15)
-                    diplomacy += int((roll - bonus + dipl_value + rebirths) / cdef)
-                    report += (
-                        f"**{escape(user.display_name)}** " f"🎲({roll}) +💥{bonus} +🗨{humanize_number(dipl_value)} | "
-                    )
-                else:
-                    msg += _("{}**{}** accidentally offended the enemy.\n").format(
-                        failed_emoji, escape(user.display_name)
-                    )
-                    fumblelist.append(user)
-                    fumble_count += 1
-            elif roll_perc > 0.95 or c.heroclass["name"] == "Bard":
+            diplomacy += result.value
+            if result.rescued:
+                report += (
+                    f"**{escape(user.display_name)}** " f"🎲({roll}) +💥{result.bonus} +🗨{humanize_number(dipl_value)} | "
+                )
+            elif result.fumbled:
+                msg += _("{}**{}** accidentally offended the enemy.\n").format(failed_emoji, escape(user.display_name))
+                fumblelist.append(user)
+                fumble_count += 1
+            elif result.boosted:
                 crit_str = ""
-                crit_bonus = 0
-                base_bonus = random.randint(5, 10) + rebirths
-                if roll_perc > 0.95:
+                if result.crit:
                     msg += _("**{}** made a compelling argument.\n").format(escape(user.display_name))
                     critlist.append(user)
-                    crit_bonus = (random.randint(5, 20)) + (rebirths * 2)
-                    crit_str = f"{self.emojis.crit} {crit_bonus}"
-
-                if c.heroclass["name"] == "Bard" and c.heroclass["ability"]:
-                    base_bonus = (random.randint(1, 10) + 5) * (rebirths // 2)
-                base_str = f"🎵 {humanize_number(base_bonus)}"
-                diplomacy += int((roll + base_bonus + crit_bonus + dipl_value) / cdef)
+                    crit_str = f"{self.emojis.crit} {result.crit_bonus}"
+                base_str = f"🎵 {humanize_number(result.bonus)}"
                 bonus = base_str + crit_str
                 report += (
                     f"**{escape(user.display_name)}** "
@@ -2217,7 +2122,6 @@ class Adventure(
                     f"{self.emojis.talk}{humanize_number(dipl_value)}\n"
                 )
             else:
-                diplomacy += int((roll + dipl_value + c.rebirths // 5) / cdef)
                 report += (
                     f"**{escape(user.display_name)}** "
                     f"{self.emojis.dice}({roll}) + "
@@ -2232,12 +2136,11 @@ class Adventure(
             if user in talk_list:
                 if session.insight[0] == 1 and user.id != session.insight[1].user.id:
                     diplomacy -= int(session.insight[1].total_cha * 0.2)
-                session.talk.remove(user)
+                self._sessions.leave(guild_id, user)
         return (fumblelist, critlist, diplomacy, msg)
 
     async def handle_basilisk(self, ctx: commands.Context):
         session = self._sessions[ctx.guild.id]
-        ctx = session.ctx
         fight_list = list(set(session.fight))
         talk_list = list(set(session.talk))
         pray_list = list(set(session.pray))
@@ -2253,10 +2156,8 @@ class Adventure(
                 failed = False
             else:
                 for user in participants:  # check if any fighter has an equipped mirror shield to give them a chance.
-                    try:
-                        c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-                    except Exception as exc:
-                        log.exception("Error with the new character sheet", exc_info=exc)
+                    c = await session.characters.get(user)
+                    if c is None:
                         continue
                     if any(x in c.sets for x in ["The Supreme One", "Ainz Ooal Gown"]):
                         failed = False
@@ -2272,7 +2173,15 @@ class Adventure(
             failed = False
         return failed
 
-    async def _add_rewards(self, ctx: commands.Context, user, exp, cp, special):
+    async def _add_rewards(self, ctx: commands.Context, user, exp, cp, special, characters: SessionCharacters = None):
+        if characters is not None:
+            # Adventure rewards land on the shared session sheet, which is flushed under lock later.
+            c = await characters.get(user)
+            if c is None:
+                return
+            rebirth_text = await self._apply_rewards(ctx, user, c, exp, cp, special)
+            characters.mark_dirty(user)
+            return rebirth_text
         lock = self.get_lock(user)
         if not lock.locked():
             await lock.acquire()
@@ -2283,136 +2192,108 @@ class Adventure(
             lock.release()
             return
         else:
-            rebirth_text = ""
-            c.exp += exp
-            member = ctx.guild.get_member(user.id)
-            cp = max(cp, 0)
-            if cp > 0:
-                try:
-                    await bank.deposit_credits(member, cp)
-                except BalanceTooHigh as e:
-                    await bank.set_balance(member, e.max_balance)
-            extra = ""
-            rebirthextra = ""
-            lvl_start = c.lvl
-            lvl_end = int(max(c.exp, 0) ** (1 / 3.5))
-            lvl_end = lvl_end if lvl_end < c.maxlevel else c.maxlevel
-            levelup_emoji = self.emojis.level_up
-            rebirth_emoji = self.emojis.rebirth
-            if lvl_end >= c.maxlevel:
-                rebirthextra = _("{} You can now rebirth {}").format(rebirth_emoji, user.mention)
-            if lvl_start < lvl_end:
-                # recalculate free skillpoint pool based on new level and already spent points.
-                c.lvl = lvl_end
-                assigned_stats = c.skill["att"] + c.skill["cha"] + c.skill["int"]
-                starting_points = await calculate_sp(lvl_start, c) + assigned_stats
-                ending_points = await calculate_sp(lvl_end, c) + assigned_stats
-
-                if c.skill["pool"] < 0:
-                    c.skill["pool"] = 0
-                c.skill["pool"] += ending_points - starting_points
-                if c.skill["pool"] > 0:
-                    extra = _(" You have **{}** skill points available.").format(c.skill["pool"])
-                rebirth_text = _("{} {} is now level **{}**!{}\n{}").format(
-                    levelup_emoji, user.mention, lvl_end, extra, rebirthextra
-                )
-            if c.rebirths > 1:
-                roll = random.randint(1, 100)
-                if lvl_end == c.maxlevel:
-                    roll += random.randint(50, 100)
-                if special is False:
-                    special = [0, 0, 0, 0, 0, 0]
-                    if c.rebirths > 1 and roll < 50:
-                        special[0] += 1
-                    if c.rebirths > 5 and roll < 30:
-                        special[1] += 1
-                    if c.rebirths > 10 > roll:
-                        special[2] += 1
-                    if c.rebirths > 15 and roll < 5:
-                        special[3] += 1
-                    if special == [0, 0, 0, 0, 0, 0]:
-                        special = False
-                else:
-                    if c.rebirths > 1 and roll < 50:
-                        special[0] += 1
-                    if c.rebirths > 5 and roll < 30:
-                        special[1] += 1
-                    if c.rebirths > 10 > roll:
-                        special[2] += 1
-                    if c.rebirths > 15 and roll < 5:
-                        special[3] += 1
-                    if special == [0, 0, 0, 0, 0, 0]:
-                        special = False
-            if special is not False:
-                c.treasure = [sum(x) for x in zip(c.treasure, special)]
-            await self.config.user(user).set(await c.to_json(ctx, self.config))
+            rebirth_text = await self._apply_rewards(ctx, user, c, exp, cp, special)
+            await self._character_store.save(ctx, user, c)
             return rebirth_text
         finally:
             lock = self.get_lock(user)
             with contextlib.suppress(Exception):
                 lock.release()
 
-    async def _adv_countdown(self, ctx: commands.Context, seconds, title) -> asyncio.Task:
+    async def _apply_rewards(self, ctx: commands.Context, user, c: Character, exp, cp, special) -> str:
+        rebirth_text = ""
+        c.exp += exp
+        member = ctx.guild.get_member(user.id)
+        cp = max(cp, 0)
+        if cp > 0:
+            try:
+                await bank.deposit_credits(member, cp)
+            except BalanceTooHigh as e:
+                await bank.set_balance(member, e.max_balance)
+        extra = ""
+        rebirthextra = ""
+        lvl_start = c.lvl
+        lvl_end = level_for_xp(c.exp)
+        lvl_end = lvl_end if lvl_end < c.maxlevel else c.maxlevel
+        levelup_emoji = self.emojis.level_up
+        rebirth_emoji = self.emojis.rebirth
+        if lvl_end >= c.maxlevel:
+            rebirthextra = _("{} You can now rebirth {}").format(rebirth_emoji, user.mention)
+        if lvl_start < lvl_end:
+            # recalculate free skillpoint pool based on new level and already spent points.
+            c.lvl = lvl_end
+            assigned_stats = c.skill["att"] + c.skill["cha"] + c.skill["int"]
+            starting_points = skill_points(lvl_start, c.rebirths) + assigned_stats
+            ending_points = skill_points(lvl_end, c.rebirths) + assigned_stats
+
+            if c.skill["pool"] < 0:
+                c.skill["pool"] = 0
+            c.skill["pool"] += ending_points - starting_points
+            if c.skill["pool"] > 0:
+                extra = _(" You have **{}** skill points available.").format(c.skill["pool"])
+            rebirth_text = _("{} {} is now level **{}**!{}\n{}").format(
+                levelup_emoji, user.mention, lvl_end, extra, rebirthextra
+            )
+        if c.rebirths > 1:
+            roll = random.randint(1, 100)
+            if lvl_end == c.maxlevel:
+                roll += random.randint(50, 100)
+            if special is False:
+                special = [0, 0, 0, 0, 0, 0]
+                if c.rebirths > 1 and roll < 50:
+                    special[0] += 1
+                if c.rebirths > 5 and roll < 30:
+                    special[1] += 1
+                if c.rebirths > 10 > roll:
+                    special[2] += 1
+                if c.rebirths > 15 and roll < 5:
+                    special[3] += 1
+                if special == [0, 0, 0, 0, 0, 0]:
+                    special = False
+            else:
+                if c.rebirths > 1 and roll < 50:
+                    special[0] += 1
+                if c.rebirths > 5 and roll < 30:
+                    special[1] += 1
+                if c.rebirths > 10 > roll:
+                    special[2] += 1
+                if c.rebirths > 15 and roll < 5:
+                    special[3] += 1
+                if special == [0, 0, 0, 0, 0, 0]:
+                    special = False
+        if special is not False:
+            c.treasure = [sum(x) for x in zip(c.treasure, special)]
+        return rebirth_text
+
+    async def _adv_countdown(self, ctx: commands.Context, seconds, title) -> asyncio.Future:
         await self._data_check(ctx)
+        adv_end = await _get_epoch(int(seconds))
+        message_adv = await ctx.send(f"⏳ [{title}] <t:{int(adv_end)}:R>")
 
-        async def adv_countdown():
-            secondint = int(seconds)
-            adv_end = await _get_epoch(secondint)
-            timer, done, sremain = await _remaining(adv_end)
-            timer = f"<t:{int(adv_end)}:R>"
-            message_adv = await ctx.send(f"⏳ [{title}] {timer}")
-            deleted = False
-            while not done:
-                timer, done, sremain = await _remaining(adv_end)
-                self._adventure_countdown[ctx.guild.id] = (timer, done, sremain)
-                if done:
-                    if not deleted:
-                        await message_adv.delete()
-                    break
-                await asyncio.sleep(1)
+        async def countdown_done():
+            with contextlib.suppress(discord.HTTPException):
+                await message_adv.delete()
             log.debug("Timer countdown done.")
 
-        return ctx.bot.loop.create_task(adv_countdown())
+        return self._timers.schedule(("adventure", ctx.guild.id), adv_end, countdown_done)
 
-    async def _cart_countdown(self, ctx: commands.Context, seconds, title, room=None) -> asyncio.Task:
+    async def _cart_countdown(self, ctx: commands.Context, seconds, title, room=None) -> asyncio.Future:
         room = room or ctx
         await self._data_check(ctx)
+        cart_end = await _get_epoch(int(seconds))
+        message_cart = await room.send(f"⏳ [{title}] <t:{int(cart_end)}:R>")
 
-        async def cart_countdown():
-            secondint = int(seconds)
-            cart_end = await _get_epoch(secondint)
-            timer, done, sremain = await _remaining(cart_end)
-            message_cart = await room.send(f"⏳ [{title}] {timer}s")
-            deleted = False
-            while not done:
-                timer, done, sremain = await _remaining(cart_end)
-                self._trader_countdown[ctx.guild.id] = (timer, done, sremain)
-                if done:
-                    if not deleted:
-                        await message_cart.delete()
-                    break
-                if not deleted and int(sremain) % 5 == 0:
-                    try:
-                        await message_cart.edit(content=f"⏳ [{title}] {timer}s")
-                    except discord.NotFound:
-                        deleted = True
-                await asyncio.sleep(1)
+        async def countdown_done():
+            with contextlib.suppress(discord.HTTPException):
+                await message_cart.delete()
 
-        return ctx.bot.loop.create_task(cart_countdown())
+        return self._timers.schedule(("cart", ctx.guild.id), cart_end, countdown_done)
 
     async def _data_check(self, ctx: commands.Context):
-        try:
-            self._adventure_countdown[ctx.guild.id]
-        except KeyError:
-            self._adventure_countdown[ctx.guild.id] = 0
         try:
             self._rewards[ctx.author.id]
         except KeyError:
             self._rewards[ctx.author.id] = {}
-        try:
-            self._trader_countdown[ctx.guild.id]
-        except KeyError:
-            self._trader_countdown[ctx.guild.id] = 0
 
     @commands.Cog.listener()
     async def on_message_without_command(self, message):
@@ -2518,14 +2399,15 @@ class Adventure(
         session = self._sessions.get(ctx.guild.id)
         if session:
             session_bonus = 0 if session.easy_mode else 1
+            characters = session.characters
         else:
             session_bonus = 0
+            characters = SessionCharacters(ctx, self.config, self._daily_bonus, self._character_store)
+        await characters.load(userlist)
         async for user in AsyncIter(userlist, steps=100):
             self._rewards[user.id] = {}
-            try:
-                c = await Character.from_json(ctx, self.config, user, self._daily_bonus)
-            except Exception as exc:
-                log.exception("Error with the new character sheet", exc_info=exc)
+            c = await characters.get(user)
+            if c is None:
                 continue
             userxp = int(xp + (xp * 0.5 * c.rebirths) + max((xp * 0.1 * min(250, c._int / 10)), 0))
             usercp = int(cp + max((cp * 0.1 * min(1000, (c._luck + c._att) / 10)), 0))
@@ -2617,13 +2499,14 @@ class Adventure(
             )
         return phrase
 
-    def cog_unload(self):
+    async def cog_unload(self):
         if self.cleanup_loop:
             self.cleanup_loop.cancel()
         if self._init_task:
             self._init_task.cancel()
-        if self.gb_task:
-            self.gb_task.cancel()
+        if self._character_store_task:
+            self._character_store_task.cancel()
+        self._timers.close()
 
         for (msg_id, task) in self.tasks.items():
             task.cancel()
@@ -2631,3 +2514,5 @@ class Adventure(
         for lock in self.locks.values():
             with contextlib.suppress(Exception):
                 lock.release()
+        # Staged sheet changes would be lost with the cog, write them out before it goes.
+        await self._character_store.flush_all()
@@ -347,6 +347,7 @@ class AdventureSetCommands(AdventureMixin):
     async def clear_user(self, ctx: commands.Context, users: commands.Greedy[discord.User]):
         """[Owner] Lets you clear multiple users character sheets."""
         for user in users:
+            self._character_store.discard(user.id)
             await self.config.user(user).clear()
             await smart_embed(ctx, _("{user}'s character sheet has been erased.").format(user=user))
 
@@ -382,7 +383,7 @@ class AdventureSetCommands(AdventureMixin):
                     )
             with contextlib.suppress(KeyError):
                 del c.backpack[item.name]
-            await self.config.user(user).set(await c.to_json(self.config))
+            await self._character_store.save(ctx, user, c)
         await ctx.send(_("{item} removed from {user}.").format(item=box(str(item), lang="css"), user=user))
 
     @adventureset.command()
@@ -28,7 +28,7 @@ from .converters import (
     SlotConverter,
 )
 from .helpers import _sell, escape, is_dev, smart_embed
-from .menus import BackpackMenu, BaseMenu, SimpleSource
+from .menus import BackpackMenu, BaseMenu, SimpleSource, TableSource
 
 _ = Translator("Adventure", __file__)
 
@@ -92,7 +92,7 @@ class BackPackCommands(AdventureMixin):
                     _("You have no items in your backpack."),
                 )
             await BackpackMenu(
-                source=SimpleSource(msgs),
+                source=TableSource(msgs),
                 help_command=self._backpack,
                 delete_message_after=True,
                 clear_reactions_after=True,
@@ -148,7 +148,7 @@ class BackPackCommands(AdventureMixin):
                     )
                 await ctx.send(equip_msg)
                 c = await c.equip_item(equip, True, is_dev(ctx.author))  # FIXME:
-                await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                await self._character_store.save(ctx, ctx.author, c)
 
     @_backpack.command(name="eset", cooldown_after_parsing=True)
     @commands.cooldown(rate=1, per=600, type=commands.BucketType.user)
@@ -184,7 +184,7 @@ class BackPackCommands(AdventureMixin):
                 )
             for piece in pieces:
                 character = await character.equip_item(piece, from_backpack=True)
-            await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+            await self._character_store.save(ctx, ctx.author, character)
             await smart_embed(
                 ctx,
                 _("I've equipped all pieces of `{set_name}` that you are able to equip.").format(set_name=set_name),
@@ -253,7 +253,7 @@ class BackPackCommands(AdventureMixin):
                         item.owned -= 1
                         if item.owned <= 0:
                             del character.backpack[item.name]
-                        await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+                        await self._character_store.save(ctx, ctx.author, character)
                         return await smart_embed(
                             ctx,
                             _("Your attempt at disassembling `{}` failed and it has been destroyed.").format(item.name),
@@ -263,7 +263,7 @@ class BackPackCommands(AdventureMixin):
                         if item.owned <= 0:
                             del character.backpack[item.name]
                         character.treasure[index] += chests
-                        await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+                        await self._character_store.save(ctx, ctx.author, character)
                         return await smart_embed(
                             ctx,
                             _("Your attempt at disassembling `{}` was successful and you have received {} {}.").format(
@@ -291,7 +291,7 @@ class BackPackCommands(AdventureMixin):
                                 del character.backpack[item.name]
                             character.treasure[index] += chests
                             success += 1
-            await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+            await self._character_store.save(ctx, ctx.author, character)
             return await smart_embed(
                 ctx,
                 _("You attempted to disassemble multiple items: {succ} were successful and {fail} failed.").format(
@@ -368,16 +368,16 @@ class BackPackCommands(AdventureMixin):
                 return
             total_price = 0
             async with ctx.typing():
-                items = [i for n, i in c.backpack.items() if i.rarity not in ["forged"]]
+                items = [
+                    c.backpack[n]
+                    for n in c.backpack.select(
+                        slots=(slot,) if slot else None,
+                        rarities=(rarity,) if rarity else None,
+                        exclude_rarities=("forged",),
+                    )
+                ]
                 count = 0
                 async for item in AsyncIter(items, steps=100):
-                    if rarity and item.rarity != rarity:
-                        continue
-                    if slot:
-                        if len(item.slot) == 1 and slot != item.slot[0]:
-                            continue
-                        elif len(item.slot) == 2 and slot != "two handed":
-                            continue
                     item_price = 0
                     old_owned = item.owned
                     async for _loop_counter in AsyncIter(range(0, old_owned), steps=100):
@@ -398,7 +398,8 @@ class BackPackCommands(AdventureMixin):
                         await bank.set_balance(ctx.author, e.max_balance)
                 c.last_known_currency = await bank.get_balance(ctx.author)
                 c.last_currency_check = time.time()
-                await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                await self._character_store.save(ctx, ctx.author, c)
+                await self._character_store.flush(ctx.author)
         msg_list = []
         new_msg = _("{author} sold all their{rarity} items for {price}.\n\n{items}").format(
             author=escape(ctx.author.display_name),
@@ -560,7 +561,8 @@ class BackPackCommands(AdventureMixin):
         if msg:
             character.last_known_currency = await bank.get_balance(ctx.author)
             character.last_currency_check = time.time()
-            await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+            await self._character_store.save(ctx, ctx.author, character)
+            await self._character_store.flush(ctx.author)
             pages = [page for page in pagify(msg, delims=["\n"], page_length=1900)]
             await BaseMenu(
                 source=SimpleSource(pages),
@@ -721,9 +723,12 @@ class BackPackCommands(AdventureMixin):
                                 else:
                                     item.owned = 1
                                     buy_user.backpack[item.name] = item
-                                await self.config.user(buyer).set(await buy_user.to_json(ctx, self.config))
+                                await self._character_store.save(ctx, buyer, buy_user)
                                 item.owned = newly_owned
-                                await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                                await self._character_store.save(ctx, ctx.author, c)
+                                # Trades move items and currency between two sheets, write both immediately.
+                                await self._character_store.flush(buyer)
+                                await self._character_store.flush(ctx.author)
 
                             await trade_msg.edit(
                                 content=(
@@ -795,7 +800,7 @@ class BackPackCommands(AdventureMixin):
             backpack_pages = await c.get_backpack(rarity=rarity, slot=slot, show_delta=show_diff, equippable=True)
             if backpack_pages:
                 await BackpackMenu(
-                    source=SimpleSource(backpack_pages),
+                    source=TableSource(backpack_pages),
                     help_command=self.commands_equipable_backpack,
                     delete_message_after=True,
                     clear_reactions_after=True,
@@ -839,7 +844,7 @@ class BackPackCommands(AdventureMixin):
         backpack_pages = await c.get_argparse_backpack(query)
         if backpack_pages:
             await BackpackMenu(
-                source=SimpleSource(backpack_pages),
+                source=TableSource(backpack_pages),
                 help_command=self.commands_cbackpack,
                 delete_message_after=True,
                 clear_reactions_after=True,
@@ -935,7 +940,7 @@ class BackPackCommands(AdventureMixin):
             )
         else:
 
-            await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+            await self._character_store.save(ctx, ctx.author, character)
             return await smart_embed(
                 ctx,
                 _("You attempted to disassemble multiple items: {succ} were successful and {fail} failed.").format(
@@ -1008,7 +1013,8 @@ class BackPackCommands(AdventureMixin):
                         await bank.set_balance(ctx.author, e.max_balance)
                 character.last_known_currency = await bank.get_balance(ctx.author)
                 character.last_currency_check = time.time()
-                await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+                await self._character_store.save(ctx, ctx.author, character)
+                await self._character_store.flush(ctx.author)
             if total_price == 0:
                 return await smart_embed(
                     ctx,
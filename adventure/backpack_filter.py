@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+from typing import Any, Callable, FrozenSet, List, Mapping, Optional, Tuple
+
+from .constants import ORDER, RARITIES
+
+_DEGRADING = frozenset({"legendary", "ascended", "event"})
+_STATS = (
+    ("dexterity", "dex"),
+    ("luck", "luck"),
+    ("charisma", "cha"),
+    ("intelligence", "int"),
+    ("strength", "att"),
+)
+
+# A check takes the item, its equip level and the character's level. It returns None
+# when it doesn't apply to the item, otherwise whether the item passes it.
+Check = Callable[[Any, int, int], Optional[bool]]
+
+
+def _range_check(bounds: Mapping[str, Any], value: Callable[[Any, int], int], inclusive_max: bool = False) -> Check:
+    if (equal := bounds.get("equal")) is not None:
+        return lambda item, e_level, lvl: value(item, e_level) == equal
+    low, high = bounds["min"], bounds["max"]
+    if inclusive_max:
+        return lambda item, e_level, lvl: low < value(item, e_level) <= high
+    return lambda item, e_level, lvl: low < value(item, e_level) < high
+
+
+def _text_check(needle: str, ignore_case: bool, present: bool) -> Check:
+    if ignore_case:
+        needle = needle.lower()
+        return lambda item, e_level, lvl: (needle in str(item).lower()) is present
+    return lambda item, e_level, lvl: (needle in str(item)) is present
+
+
+class BackpackFilter:
+    """A `cbackpack` query compiled once into the checks it needs.
+
+    Slot, rarity and set filters are frozensets answered by the backpack indexes, the
+    rest become a short list of checks. Without ``--except`` an item is kept when it
+    passes every check, with it an item is kept when it passes none of them.
+    """
+
+    __slots__ = (
+        "delta",
+        "equippable",
+        "ignore_case",
+        "except_",
+        "slots",
+        "rarities",
+        "sets",
+        "match",
+        "no_match",
+        "checks",
+    )
+
+    def __init__(self, query: Mapping[str, Any]):
+        self.delta: bool = query.get("delta", False)
+        self.equippable: bool = query.get("equippable", False)
+        self.ignore_case: bool = query.get("icase", False)
+        self.except_: bool = query.get("except", False)
+        self.slots: FrozenSet[str] = frozenset(query.get("slot", []))
+        self.rarities: FrozenSet[str] = frozenset(query.get("rarity", []))
+        self.sets: FrozenSet[str] = frozenset(query.get("set", []))
+        self.match: Optional[str] = query.get("match")
+        self.no_match: Optional[str] = query.get("no_match")
+        if self.except_:
+            # Every slot or rarity means no slot or rarity filter at all.
+            self.rarities = frozenset() if self.rarities == frozenset(RARITIES) else self.rarities
+            self.slots = frozenset() if self.slots == frozenset(ORDER) else self.slots
+
+        checks: List[Check] = []
+        if self.no_match:
+            checks.append(_text_check(self.no_match, self.ignore_case, present=False))
+        if self.match:
+            checks.append(_text_check(self.match, self.ignore_case, present=True))
+        if self.equippable:
+            checks.append(lambda item, e_level, lvl: lvl >= e_level)
+        if degrade := query.get("degrade"):
+            in_range = _range_check(degrade, lambda item, e_level: item.degrade)
+            checks.append(
+                lambda item, e_level, lvl: in_range(item, e_level, lvl) if item.rarity in _DEGRADING else None
+            )
+        if level := query.get("level"):
+            checks.append(_range_check(level, lambda item, e_level: e_level))
+        for (stat, attr) in _STATS:
+            if bounds := query.get(stat):
+                checks.append(
+                    _range_check(
+                        bounds, lambda item, e_level, attr=attr: getattr(item, attr), inclusive_max=attr == "att"
+                    )
+                )
+        self.checks: Tuple[Check, ...] = tuple(checks)
+
+    def keep(self, item, e_level: int, lvl: int) -> bool:
+        if self.except_:
+            return not any(check(item, e_level, lvl) for check in self.checks)
+        return all(check(item, e_level, lvl) is not False for check in self.checks)
+
+    @property
+    def show_degrade(self) -> bool:
+        return not self.rarities or not self.rarities.isdisjoint(_DEGRADING)
+
+    @property
+    def show_set(self) -> bool:
+        return bool(self.sets) or not self.rarities or "set" in self.rarities
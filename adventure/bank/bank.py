@@ -493,11 +493,11 @@ async def get_account(
     if _forced or (cog := _bot.get_cog("Adventure")) is None or not cog._separate_economy:
         return await bank.get_account(member)
 
-    all_accounts = await _config.all_users()
-    if member.id not in all_accounts:
+    acc_data = await _config._get_base_group(_config.USER).get_raw(str(member.id), default=None)
+    if acc_data is None:
         acc_data = {"balance": 250, "next_payday": 0}
     else:
-        acc_data = all_accounts[member.id]
+        acc_data = {**_DEFAULT_MEMBER, **acc_data}
     return AdventureAccount(**acc_data)
 
 
@@ -0,0 +1,798 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for the cog's hot paths, run headless in a :class:`~.simulator.Sandbox`.
+
+::
+
+    python -m adventure.benchmarks --save .benchmarks/baseline.json
+    python -m adventure.benchmarks --compare .benchmarks/baseline.json
+
+Every case gets a freshly seeded sandbox, so the generated heroes, backpacks and guilds
+are the same from run to run. Each case is run until it has both ``--min-rounds`` rounds
+and ``--min-time`` seconds behind it, and only the part of a round inside ``with clock``
+is timed. Figures other than time, like memory, go in ``clock.notes`` and are reported
+next to the timings. ``--compare`` fails the run when a case is more than ``--tolerance``
+slower than in the baseline.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from beautifultable import ALIGN_LEFT, BeautifulTable
+from redbot.core.utils.chat_formatting import box
+
+from . import combat
+from .adventure import Adventure
+from .bank import bank
+from .charsheet import Character, Item, ItemTemplate
+from .combat import ACTION_CLASSES
+from .constants import ORDER
+from .converters import BackpackFilterParser, EquipableItemConverter, ItemConverter, ItemsConverter
+from .simulator import Sandbox, SimulatedMember
+from .tables import PAGE_LIMIT, TablePages, paginate
+
+BACKPACK_SIZES = (10, 100, 1_000, 10_000)
+GUILD_SIZES = (10, 1_000, 10_000, 100_000)
+PARTY_SIZES = (1, 10, 50)
+CHEST_AMOUNTS = (1, 100, 1_000)
+# Cases bigger than this are skipped by --quick.
+QUICK_LIMIT = 1_000
+CBACKPACK_QUERY = "--rarity rare epic legendary --slot head charm --lvl >10 <500"
+
+
+class Clock:
+    """Adds up the time spent inside ``with clock`` during a round."""
+
+    def __init__(self):
+        self.elapsed = 0.0
+        self._start = 0.0
+        self.notes: Dict[str, float] = {}
+
+    def __enter__(self) -> "Clock":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.elapsed += time.perf_counter() - self._start
+
+
+Round = Callable[[Clock], Awaitable[None]]
+
+
+class Benchmark(NamedTuple):
+    name: str
+    param: str
+    values: Tuple[int, ...]
+    setup: Callable[[Sandbox, int], Awaitable[Round]]
+
+    def cases(self, quick: bool = False) -> List[Tuple[str, int]]:
+        return [
+            (f"{self.name}[{self.param}={value}]", value) for value in self.values if not quick or value <= QUICK_LIMIT
+        ]
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+class Skipped(Exception):
+    """Raised by a benchmark's setup when the case can't run here, with the reason."""
+
+
+def benchmark(name: str, **params: Sequence[int]):
+    """Register a benchmark over the values of its one parameter.
+
+    The decorated coroutine gets a fresh sandbox and the parameter value, prepares
+    whatever it needs and returns the coroutine function run for every round.
+    """
+    ((param, values),) = params.items()
+
+    def decorator(setup: Callable[[Sandbox, int], Awaitable[Round]]):
+        BENCHMARKS.append(Benchmark(name, param, tuple(values), setup))
+        return setup
+
+    return decorator
+
+
+async def _hero(sandbox: Sandbox, backpack: int = 0, **kwargs) -> SimulatedMember:
+    (member,) = sandbox.add_members(1)
+    await sandbox.create_hero(member, backpack=backpack, **kwargs)
+    return member
+
+
+async def _character(sandbox: Sandbox, member: SimulatedMember) -> Character:
+    return await Character.from_json(sandbox.context(member), sandbox.config, member, sandbox.cog._daily_bonus)
+
+
+@benchmark("character.from_json", items=BACKPACK_SIZES)
+async def bench_from_json(sandbox: Sandbox, items: int) -> Round:
+    """A sheet load that misses the character cache.
+
+    Reading the sheet from config copies all of it, so it grows with the backpack whatever
+    the cog does; it is noted rather than timed. Turning it into a character should not.
+    """
+    member = await _hero(sandbox, items)
+    store = sandbox.cog._character_store
+    ctx = sandbox.context(member)
+
+    async def run(clock: Clock) -> None:
+        start = time.perf_counter()
+        data = await store.get(member)
+        clock.notes["config read ms"] = round((time.perf_counter() - start) * 1000, 3)
+        with clock:
+            sheet = await Character._parse_sheet(ctx, sandbox.config, data)
+            Character(
+                **sheet,
+                bal=await bank.get_balance(member),
+                user=member,
+                ctx=ctx,
+                daily_bonus_mapping=sandbox.cog._daily_bonus,
+            )
+
+    return run
+
+
+def _legacy_set_item_count(c: Character) -> int:
+    """Set pieces counted by serialising every item, as every sheet load used to."""
+    count = sum(1 for slot in ORDER if slot != "two handed" and getattr(c, slot) and getattr(c, slot).rarity == "set")
+    for item in c.backpack.values():
+        for data in item.to_json().values():
+            if data.get("rarity", False) in ["set"]:
+                count += item.owned
+    return count
+
+
+@benchmark("character.from_json_cached", items=BACKPACK_SIZES)
+async def bench_from_json_cached(sandbox: Sandbox, items: int) -> Round:
+    member = await _hero(sandbox, items)
+    c = await _character(sandbox, member)
+    start = time.perf_counter()
+    legacy = _legacy_set_item_count(await _character(sandbox, member))
+    notes = {"legacy set count ms": round((time.perf_counter() - start) * 1000, 3)}
+    if c.set_items != legacy:
+        raise RuntimeError(f"counted {c.set_items} set pieces, {legacy} by serialising every item")
+
+    async def run(clock: Clock) -> None:
+        with clock:
+            await _character(sandbox, member)
+        clock.notes.update(notes)
+
+    return run
+
+
+@benchmark("character.to_json", items=BACKPACK_SIZES)
+async def bench_to_json(sandbox: Sandbox, items: int) -> Round:
+    member = await _hero(sandbox, items)
+    c = await _character(sandbox, member)
+    ctx = sandbox.context(member)
+
+    async def run(clock: Clock) -> None:
+        with clock:
+            await c.to_json(ctx, sandbox.config)
+
+    return run
+
+
+class LegacyItem:
+    """The attributes every item carried before items were slotted and shared their templates."""
+
+    def __init__(self, **kwargs):
+        self._ctx = kwargs.pop("ctx")
+        if kwargs.get("rarity") in ["event"]:
+            self.name = kwargs.get("name")
+        elif kwargs.get("rarity") in ["set", "legendary", "ascended"]:
+            self.name = kwargs.get("name").title()
+        else:
+            self.name = kwargs.get("name").lower()
+        self.slot = kwargs.get("slot")
+        self.att = kwargs.get("att")
+        self.int = kwargs.get("int")
+        self.cha = kwargs.get("cha")
+        self.rarity = kwargs.get("rarity")
+        self.dex = kwargs.get("dex")
+        self.luck = kwargs.get("luck")
+        self.owned = kwargs.get("owned")
+        self.set = kwargs.get("set", False)
+        self.parts = kwargs.get("parts")
+        self.total_stats = self.att + self.int + self.cha + self.dex + self.luck
+        if len(self.slot) > 2:
+            self.total_stats *= 2
+        self.max_main_stat = max(self.att, self.int, self.cha, 1)
+        self.lvl = kwargs.get("lvl")
+        self.degrade = kwargs.get("degrade", 5)
+
+
+def _traced_size(build: Callable[[], object]) -> int:
+    """Bytes still allocated by `build` when it returns."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        built = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del built
+    return size
+
+
+@benchmark("item.from_json", items=BACKPACK_SIZES)
+async def bench_item_from_json(sandbox: Sandbox, items: int) -> Round:
+    member = await _hero(sandbox, items)
+    ctx = sandbox.context(member)
+    entries = [{key: value} for (key, value) in (await sandbox.cog._character_store.get(member))["backpack"].items()]
+    fields = [
+        {
+            "name": item.name,
+            "slot": item.slot,
+            "att": item.att,
+            "int": item.int,
+            "cha": item.cha,
+            "rarity": item.rarity,
+            "dex": item.dex,
+            "luck": item.luck,
+            "owned": item.owned,
+            "set": item.set,
+            "parts": item.parts,
+            "lvl": item.lvl,
+            "degrade": item.degrade,
+        }
+        for item in (Item.from_json(ctx, entry) for entry in entries)
+    ]
+    # Templates left by earlier cases would otherwise be counted as shared.
+    ItemTemplate.prune()
+    # Every legacy item had its own slot list, straight from the stored entry.
+    notes = {
+        "bytes/item": round(_traced_size(lambda: [Item.from_json(ctx, entry) for entry in entries]) / len(entries)),
+        "legacy bytes/item": round(
+            _traced_size(lambda: [LegacyItem(ctx=ctx, **{**data, "slot": list(data["slot"])}) for data in fields])
+            / len(entries)
+        ),
+    }
+
+    async def run(clock: Clock) -> None:
+        with clock:
+            [Item.from_json(ctx, entry) for entry in entries]
+        clock.notes.update(notes)
+
+    return run
+
+
+@benchmark("character.get_backpack", items=BACKPACK_SIZES)
+async def bench_get_backpack(sandbox: Sandbox, items: int) -> Round:
+    member = await _hero(sandbox, items)
+    c = await _character(sandbox, member)
+
+    async def run(clock: Clock) -> None:
+        with clock:
+            pages = await c.get_backpack()
+            if pages:
+                pages[0]
+
+    return run
+
+
+TABLE_HEADERS = ("Name", "Slot", "ATT", "CHA", "INT", "DEX", "LUC", "LVL", "QTY", "DEG", "SET")
+
+
+def _table_rows(c: Character) -> List[Tuple[Any, ...]]:
+    return [
+        (
+            str(item),
+            item.slot[0] if len(item.slot) == 1 else "two handed",
+            item.att,
+            item.cha,
+            item.int,
+            item.dex,
+            item.luck,
+            f"{item.lvl}",
+            item.owned,
+            f"[{item.degrade}]" if item.rarity in ["legendary", "event", "ascended"] else "N/A",
+            item.set or "N/A",
+        )
+        for item in c.backpack.values()
+    ]
+
+
+def _beautifultable_pages(rows: List[Tuple[Any, ...]]) -> List[str]:
+    """The pages as the backpack and loot commands used to build them, rendering the table after every row."""
+    pages = []
+    table = None
+    for row in rows:
+        if table is None or len(str(table)) > PAGE_LIMIT:
+            if table is not None:
+                pages.append(box(str(table) + f"\nPage {len(pages) + 1}", lang="css"))
+            table = BeautifulTable(default_alignment=ALIGN_LEFT, maxwidth=500)
+            table.set_style(BeautifulTable.STYLE_RST)
+            table.columns.header = TABLE_HEADERS
+        table.rows.append(row)
+    if table is not None:
+        pages.append(box(str(table) + f"\nPage {len(pages) + 1}", lang="css"))
+    return pages
+
+
+@benchmark("tables.paginate", rows=BACKPACK_SIZES)
+async def bench_paginate(sandbox: Sandbox, rows: int) -> Round:
+    member = await _hero(sandbox, rows)
+    table_rows = _table_rows(await _character(sandbox, member))
+    start = time.perf_counter()
+    legacy = _beautifultable_pages(table_rows)
+    notes = {"beautifultable ms": round((time.perf_counter() - start) * 1000, 3)}
+    if list(paginate(TABLE_HEADERS, table_rows)) != legacy or list(TablePages(TABLE_HEADERS, table_rows)) != legacy:
+        raise RuntimeError("the streaming table pages differ from BeautifulTable's")
+
+    async def run(clock: Clock) -> None:
+        with clock:
+            list(paginate(TABLE_HEADERS, table_rows))
+        clock.notes.update(notes)
+
+    return run
+
+
+@benchmark("cbackpack.show", items=BACKPACK_SIZES)
+async def bench_cbackpack(sandbox: Sandbox, items: int) -> Round:
+    member = await _hero(sandbox, items)
+    c = await _character(sandbox, member)
+    ctx = sandbox.context(member)
+
+    async def run(clock: Clock) -> None:
+        with clock:
+            query = await BackpackFilterParser().convert(ctx, CBACKPACK_QUERY)
+            pages = await c.get_argparse_backpack(query)
+            if pages:
+                pages[0]
+
+    return run
+
+
+async def _converter_round(sandbox: Sandbox, items: int, converter, argument: Callable[[Character], str]) -> Round:
+    member = await _hero(sandbox, items)
+    ctx = sandbox.context(member)
+    name = argument(await _character(sandbox, member))
+
+    async def run(clock: Clock) -> None:
+        with clock:
+            await converter.convert(ctx, name)
+
+    return run
+
+
+@benchmark("converters.item", items=BACKPACK_SIZES)
+async def bench_item_converter(sandbox: Sandbox, items: int) -> Round:
+    return await _converter_round(sandbox, items, ItemConverter(), lambda c: str(next(iter(c.backpack.values()))))
+
+
+@benchmark("converters.equipable_item", items=BACKPACK_SIZES)
+async def bench_equipable_item_converter(sandbox: Sandbox, items: int) -> Round:
+    return await _converter_round(
+        sandbox, items, EquipableItemConverter(), lambda c: str(next(iter(c.backpack.values())))
+    )
+
+
+@benchmark("converters.items", items=BACKPACK_SIZES)
+async def bench_items_converter(sandbox: Sandbox, items: int) -> Round:
+    return await _converter_round(sandbox, items, ItemsConverter(), lambda c: "legendary")
+
+
+async def _guild(sandbox: Sandbox, members: int) -> None:
+    """Fill the guild with `members` light sheets, the fields the scoreboards read and not much else."""
+    rng = sandbox.rng
+    week = date.today().isocalendar()[1]
+    for member in sandbox.add_members(members):
+        await sandbox.config.user(member).set(
+            {
+                "lvl": rng.randint(1, 500),
+                "rebirths": rng.randint(0, 50),
+                "set_items": rng.randint(0, 40),
+                "adventures": {"wins": rng.randint(0, 5000), "loses": rng.randint(0, 5000)},
+                "weekly_score": {"week": week, "adventures": rng.randint(0, 200), "rebirths": rng.randint(0, 3)},
+            }
+        )
+
+
+@benchmark("leaderboards.get_leaderboard", members=GUILD_SIZES)
+async def bench_leaderboard(sandbox: Sandbox, members: int) -> Round:
+    await _guild(sandbox, members)
+
+    async def run(clock: Clock) -> None:
+        with clock:
+            await sandbox.cog.get_leaderboard(guild=sandbox.guild)
+
+    return run
+
+
+@benchmark("leaderboards.get_global_scoreboard", members=GUILD_SIZES)
+async def bench_global_scoreboard(sandbox: Sandbox, members: int) -> Round:
+    await _guild(sandbox, members)
+
+    async def run(clock: Clock) -> None:
+        with clock:
+            await sandbox.cog.get_global_scoreboard(guild=sandbox.guild)
+
+    return run
+
+
+@benchmark("leaderboards.get_weekly_scoreboard", members=GUILD_SIZES)
+async def bench_weekly_scoreboard(sandbox: Sandbox, members: int) -> Round:
+    await _guild(sandbox, members)
+
+    async def run(clock: Clock) -> None:
+        with clock:
+            await sandbox.cog.get_weekly_scoreboard(guild=sandbox.guild)
+
+    return run
+
+
+@benchmark("loot._open_chests", chests=CHEST_AMOUNTS)
+async def bench_open_chests(sandbox: Sandbox, chests: int) -> Round:
+    member = await _hero(sandbox, 100)
+    ctx = sandbox.context(member)
+
+    async def run(clock: Clock) -> None:
+        c = await _character(sandbox, member)
+        with clock:
+            await sandbox.cog._open_chests(ctx, "epic", chests, c)
+
+    return run
+
+
+@benchmark("backpack.sellall", items=BACKPACK_SIZES)
+async def bench_sellall(sandbox: Sandbox, items: int) -> Round:
+    member = await _hero(sandbox, items)
+    ctx = sandbox.context(member)
+    store = sandbox.cog._character_store
+    sheet = await store.get(member)
+
+    async def run(clock: Clock) -> None:
+        store.set(member, sheet)
+        await bank.set_balance(member, 10_000)
+        with clock:
+            await Adventure.backpack_sellall.callback(sandbox.cog, ctx, None, slot=None)
+        if (await store.get(member))["backpack"]:
+            raise RuntimeError("backpack sellall did not sell the backpack")
+
+    return run
+
+
+@benchmark("rebirth", items=BACKPACK_SIZES)
+async def bench_rebirth(sandbox: Sandbox, items: int) -> Round:
+    member = await _hero(sandbox, items, rebirths=10)
+    ctx = sandbox.context(member)
+    store = sandbox.cog._character_store
+    sheet = await store.get(member)
+    c = await _character(sandbox, member)
+    sheet.update(lvl=c.maxlevel, last_known_currency=0, last_currency_check=0)
+
+    async def run(clock: Clock) -> None:
+        store.set(member, sheet)
+        await bank.set_balance(member, 100_000)
+        with clock:
+            await Adventure.rebirth.callback(sandbox.cog, ctx)
+        if (await store.get(member))["rebirths"] != sheet["rebirths"] + 1:
+            raise RuntimeError("rebirth did not rebirth the character")
+
+    return run
+
+
+@benchmark("adventure._result", party=PARTY_SIZES)
+async def bench_result(sandbox: Sandbox, party: int) -> Round:
+    members = sandbox.add_members(party)
+    actions = {heroclass: action for (action, heroclass) in ACTION_CLASSES.items()}
+    for member in members:
+        await sandbox.create_hero(member)
+    sheets = {member.id: await sandbox.cog._character_store.get(member) for member in members}
+    cog = sandbox.cog
+    cog.party = {
+        member: actions.get(sheets[member.id]["heroclass"]["name"], sandbox.rng.choice(("fight", "magic", "talk")))
+        for member in members
+    }
+    ctx = sandbox.context(members[0])
+    result = cog._result
+    clocks: List[Clock] = []
+
+    async def timed_result(ctx, message):
+        with clocks[-1]:
+            return await result(ctx, message)
+
+    cog._result = timed_result
+
+    async def run(clock: Clock) -> None:
+        clocks.append(clock)
+        await Adventure._adventure.callback(cog, ctx)
+        if not clock.elapsed:
+            raise RuntimeError("the adventure ended before its result")
+
+    return run
+
+
+COMBAT_PARTY_SIZES = (10, 100, 1_000, 10_000)
+COMBAT_CLASSES = ("Berserker", "Wizard", "Bard", "Cleric", "Ranger", "Tinkerer")
+# Rolls per action and profile for the vectorized distribution check.
+COMBAT_SAMPLES = 20_000
+# The vectorized rolls fail the check when any field's homogeneity test against the one
+# at a time rolls scores above this. There are about 350 tests, so a z of 5
+# fails a correct engine about once in 10,000 runs.
+COMBAT_Z_LIMIT = 5.0
+
+
+def _combatants(rng, count: int) -> List[combat.Combatant]:
+    """`count` generated profiles, about half of them weak enough to fumble."""
+
+    def stat(high: int) -> int:
+        return rng.randint(0, high if rng.random() < 0.5 else high // 50)
+
+    return [
+        combat.Combatant(
+            *(stat(1000) for _loop_counter in range(3)),
+            stat(300),
+            stat(600),
+            rng.choice((0, 5, 16, 31, 60)),
+            rng.choice(COMBAT_CLASSES),
+            rng.random() < 0.5,
+            rng.choice((0, 0, 90, 97)),
+        )
+        for _loop_counter in range(count)
+    ]
+
+
+def _resolve(engine: combat.CombatEngine, party: List[combat.Combatant]) -> None:
+    for kind in ("fight", "magic", "talk"):
+        engine.rolls(kind, party, 1.25)
+    engine.prayers(party, 3, 2, 1)
+
+
+@benchmark("combat.rolls", party=COMBAT_PARTY_SIZES)
+async def bench_combat_rolls(sandbox: Sandbox, party: int) -> Round:
+    combatants = _combatants(sandbox.rng, party)
+    engine = combat.CombatEngine(sandbox.seed)
+    single = combat.CombatEngine(sandbox.seed, threshold=party + 1)
+    start = time.perf_counter()
+    _resolve(single, combatants)
+    notes = {"one at a time ms": round((time.perf_counter() - start) * 1000, 3)}
+
+    async def run(clock: Clock) -> None:
+        with clock:
+            _resolve(engine, combatants)
+        clock.notes.update(notes)
+
+    return run
+
+
+def _outcomes(engine: combat.CombatEngine, kind: str, party: List[combat.Combatant]) -> Sequence:
+    if kind == "pray":
+        return engine.prayers(party, 3, 2, 1)
+    return engine.rolls(kind, party, 1.25)
+
+
+def _homogeneity_z(first: Sequence, second: Sequence) -> float:
+    """How unlikely two equally sized samples are to share a distribution, as a z score.
+
+    This is a chi-square homogeneity test turned into a z score with the Wilson-Hilferty
+    approximation. Outcomes seen fewer than ten times in both samples together are pooled.
+    """
+    (first, second) = (Counter(first), Counter(second))
+    statistic = 0.0
+    bins = 0
+    pooled = [0, 0]
+    for key in first.keys() | second.keys():
+        (x, y) = (first[key], second[key])
+        if x + y < 10:
+            pooled[0] += x
+            pooled[1] += y
+            continue
+        statistic += (x - y) ** 2 / (x + y)
+        bins += 1
+    if sum(pooled):
+        statistic += (pooled[0] - pooled[1]) ** 2 / sum(pooled)
+        bins += 1
+    dof = bins - 1
+    if dof < 1:
+        return 0.0
+    return ((statistic / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+
+
+def _worst_field_z(first: Sequence[tuple], second: Sequence[tuple]) -> float:
+    return max(_homogeneity_z([r[index] for r in first], [r[index] for r in second]) for index in range(len(first[0])))
+
+
+@benchmark("combat.vectorized_rolls", samples=(COMBAT_SAMPLES,))
+async def bench_vectorized_rolls(sandbox: Sandbox, samples: int) -> Round:
+    """Fails when the vectorized rolls are distributed unlike the one at a time rolls.
+
+    Two generated profiles of every class are rolled `samples` times both ways for each
+    action, and each field of the results (roll, crit, fumble and so on) is compared on
+    its own. The same comparison between two
+    runs of the one at a time rolls is reported as the noise.
+    """
+    if combat.np is None:
+        raise Skipped("NumPy is not installed")
+    single = combat.CombatEngine(sandbox.seed, threshold=samples + 1)
+    vector = combat.CombatEngine(sandbox.seed, threshold=1)
+    worst = noise = 0.0
+    profiles = [p._replace(heroclass=heroclass) for heroclass in COMBAT_CLASSES for p in _combatants(sandbox.rng, 2)]
+    for profile in profiles:
+        party = [profile] * samples
+        for kind in ("fight", "magic", "talk", "pray"):
+            reference = _outcomes(single, kind, party)
+            worst = max(worst, _worst_field_z(reference, _outcomes(vector, kind, party)))
+            noise = max(noise, _worst_field_z(reference, _outcomes(single, kind, party)))
+    if worst > COMBAT_Z_LIMIT:
+        raise RuntimeError(f"vectorized rolls differ from the one at a time rolls, z={worst:.2f}")
+    notes = {"z": round(worst, 2), "noise z": round(noise, 2)}
+    party = _combatants(sandbox.rng, samples)
+
+    async def run(clock: Clock) -> None:
+        with clock:
+            _resolve(vector, party)
+        clock.notes.update(notes)
+
+    return run
+
+
+class Result(NamedTuple):
+    rounds: int
+    min_ms: float
+    median_ms: float
+    mean_ms: float
+    stdev_ms: float
+    notes: Dict[str, float]
+
+    @classmethod
+    def from_times(cls, times: List[float], notes: Optional[Dict[str, float]] = None) -> "Result":
+        ms = [t * 1000 for t in times]
+        return cls(
+            rounds=len(ms),
+            min_ms=round(min(ms), 4),
+            median_ms=round(statistics.median(ms), 4),
+            mean_ms=round(statistics.fmean(ms), 4),
+            stdev_ms=round(statistics.stdev(ms), 4) if len(ms) > 1 else 0.0,
+            notes=dict(notes or {}),
+        )
+
+
+async def run_case(
+    bench: Benchmark, value: int, *, seed: int, min_rounds: int, max_rounds: int, min_time: float
+) -> Result:
+    async with Sandbox(seed) as sandbox:
+        run = await bench.setup(sandbox, value)
+        # One round to warm up caches and imports, it isn't counted.
+        await run(Clock())
+        times = []
+        spent = 0.0
+        notes: Dict[str, float] = {}
+        while len(times) < max_rounds and (len(times) < min_rounds or spent < min_time):
+            clock = Clock()
+            await run(clock)
+            times.append(clock.elapsed)
+            spent += clock.elapsed
+            notes.update(clock.notes)
+        if sandbox.errors.count:
+            raise RuntimeError(f"{bench.name} logged {sandbox.errors.count} errors")
+    return Result.from_times(times, notes)
+
+
+async def run_benchmarks(
+    names: Optional[Sequence[str]] = None,
+    *,
+    quick: bool = False,
+    seed: int = 0,
+    min_rounds: int = 3,
+    max_rounds: int = 1000,
+    min_time: float = 0.5,
+    report: Callable[[str, Result], None] = lambda name, result: None,
+    skipped: Callable[[str, str], None] = lambda name, reason: None,
+) -> Dict[str, Result]:
+    results = {}
+    for bench in BENCHMARKS:
+        for (case, value) in bench.cases(quick):
+            if names and not any(name in case for name in names):
+                continue
+            try:
+                result = await run_case(
+                    bench, value, seed=seed, min_rounds=min_rounds, max_rounds=max_rounds, min_time=min_time
+                )
+            except Skipped as exc:
+                skipped(case, str(exc))
+                continue
+            results[case] = result
+            report(case, result)
+    return results
+
+
+def compare(
+    results: Dict[str, Result], baseline: Dict[str, dict], tolerance: float, stat: str = "min_ms"
+) -> Tuple[Dict[str, float], List[str]]:
+    """Return each case's `stat` as a ratio of the baseline's, and the cases slower than `tolerance` allows."""
+    ratios = {}
+    for (case, result) in results.items():
+        if case in baseline and baseline[case][stat] > 0:
+            ratios[case] = getattr(result, stat) / baseline[case][stat]
+    return ratios, [case for (case, ratio) in ratios.items() if ratio > 1 + tolerance]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m adventure.benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", help="only run cases containing one of these")
+    parser.add_argument("--quick", action="store_true", help=f"skip cases larger than {QUICK_LIMIT:,}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-rounds", type=int, default=3)
+    parser.add_argument("--max-rounds", type=int, default=1000)
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to spend on each case")
+    parser.add_argument("--save", help="write the results here as a baseline")
+    parser.add_argument("--compare", help="compare against the baseline stored here")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 is 25%%")
+    parser.add_argument(
+        "--stat",
+        choices=("min", "median", "mean"),
+        default="min",
+        help="statistic compared against the baseline, the minimum is the least noisy",
+    )
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for bench in BENCHMARKS:
+            for (case, value) in bench.cases(args.quick):
+                print(case)
+        return 0
+    stat = f"{args.stat}_ms"
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    def report(case: str, result: Result) -> None:
+        line = (
+            f"{case:<55} {result.rounds:>6} rounds  median {result.median_ms:>11.3f} ms  min {result.min_ms:>11.3f} ms"
+        )
+        if case in baseline and baseline[case][stat] > 0:
+            line += f"  {getattr(result, stat) / baseline[case][stat]:>6.2f}x {args.stat}"
+        for (name, value) in result.notes.items():
+            line += f"  {name} {value:g}"
+        print(line, flush=True)
+
+    def skipped(case: str, reason: str) -> None:
+        print(f"{case:<55} skipped: {reason}", flush=True)
+
+    results = asyncio.run(
+        run_benchmarks(
+            args.names,
+            quick=args.quick,
+            seed=args.seed,
+            min_rounds=args.min_rounds,
+            max_rounds=args.max_rounds,
+            min_time=args.min_time,
+            report=report,
+            skipped=skipped,
+        )
+    )
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        data = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "results": {case: result._asdict() for (case, result) in results.items()},
+        }
+        with open(args.save, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        (ratios, slower) = compare(results, baseline, args.tolerance, stat)
+        for case in slower:
+            print(f"SLOWER: {case} is {ratios[case]:.2f}x its baseline", file=sys.stderr)
+        if slower:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -83,7 +83,9 @@ class AdventureCart(AdventureMixin):
                 item = items["item"]
                 item.owned = pred.result
                 await c.add_to_backpack(item, number=pred.result)
-                await self.config.user(user).set(await c.to_json(ctx, self.config))
+                await self._character_store.save(ctx, user, c)
+                # The bank was charged above, don't leave the items it paid for in the write-behind window.
+                await self._character_store.flush(user)
                 with contextlib.suppress(discord.HTTPException):
                     await to_delete.delete()
                     await msg.delete()
@@ -131,7 +133,8 @@ class AdventureCart(AdventureMixin):
             elif self._last_trade[ctx.guild.id] >= time.time() - timeout:
                 # trader can return after 3 hours have passed since last visit.
                 return  # silent return.
-        self._last_trade[ctx.guild.id] = time.time()
+        # Forgetting the visit is the same as the cart being allowed back, so keep it for the whole timeout.
+        self._last_trade.set(ctx.guild.id, time.time(), ttl=max(timeout, self._last_trade.ttl))
 
         room = await self.config.guild(ctx.guild).cartroom()
         if room:
@@ -196,16 +199,19 @@ class AdventureCart(AdventureMixin):
         msg = await room.send(text)
         start_adding_reactions(msg, controls.keys())
         self._current_traders[ctx.guild.id] = {"msg": msg.id, "stock": stock, "users": []}
+        self._reaction_routes[msg.id] = "cart"
         timeout = self._last_trade[ctx.guild.id] + 180 - time.time()
         if timeout <= 0:
             timeout = 0
-        timer = await self._cart_countdown(ctx, timeout, _("The cart will leave in: "), room=room)
+        timer = await self._cart_countdown(ctx, timeout, _("The cart will leave"), room=room)
         self.tasks[msg.id] = timer
         try:
             await asyncio.wait_for(timer, timeout + 5)
         except asyncio.TimeoutError:
             await self._clear_react(msg)
             return
+        finally:
+            self._reaction_routes.pop(msg.id, None)
         with contextlib.suppress(discord.HTTPException):
             await msg.delete()
 
@@ -2,7 +2,6 @@
 import asyncio
 import logging
 import time
-from operator import itemgetter
 
 import discord
 from beautifultable import ALIGN_LEFT, BeautifulTable
@@ -15,7 +14,7 @@ from redbot.core.utils.predicates import ReactionPredicate
 
 from .abc import AdventureMixin
 from .bank import bank
-from .charsheet import Character, Item
+from .charsheet import SET_BONUS_TIERS, Character, Item
 from .constants import ORDER
 from .converters import EquipableItemConverter, EquipmentConverter
 from .helpers import _title_case, escape, smart_embed
@@ -53,7 +52,7 @@ class CharacterCommands(AdventureMixin):
                 log.exception("Error with the new character sheet", exc_info=exc)
                 return
             if spend == "reset":
-                last_reset = await self.config.user(ctx.author).last_skill_reset()
+                last_reset = c.last_skill_reset
                 if last_reset + 3600 > time.time():
                     return await smart_embed(ctx, _("You reset your skills within the last hour, try again later."))
                 bal = c.bal
@@ -92,8 +91,9 @@ class CharacterCommands(AdventureMixin):
                     c.skill["att"] = 0
                     c.skill["cha"] = 0
                     c.skill["int"] = 0
-                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
-                    await self.config.user(ctx.author).last_skill_reset.set(int(time.time()))
+                    c.last_skill_reset = int(time.time())
+                    await self._character_store.save(ctx, ctx.author, c)
+                    await self._character_store.flush(ctx.author)
                     await bank.withdraw_credits(ctx.author, offering)
                     await smart_embed(
                         ctx,
@@ -153,7 +153,7 @@ class CharacterCommands(AdventureMixin):
                     c.skill["pool"] -= amount
                     c.skill["int"] += amount
                     spend = "intelligence"
-                await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                await self._character_store.save(ctx, ctx.author, c)
                 await smart_embed(
                     ctx,
                     _("{author}, you permanently raised your {spend} value by {amount}.").format(
@@ -166,7 +166,7 @@ class CharacterCommands(AdventureMixin):
     async def set_show(self, ctx: commands.Context, *, set_name: str = None):
         """Show set bonuses for the specified set."""
 
-        set_list = humanize_list(sorted([f"`{i}`" for i in self.SET_BONUSES.keys()], key=str.lower))
+        set_list = humanize_list(sorted([f"`{i}`" for i in SET_BONUS_TIERS.keys()], key=str.lower))
         if set_name is None:
             return await smart_embed(
                 ctx,
@@ -174,8 +174,8 @@ class CharacterCommands(AdventureMixin):
             )
 
         title_cased_set_name = await _title_case(set_name)
-        sets = self.SET_BONUSES.get(title_cased_set_name)
-        if sets is None:
+        bonus_list = SET_BONUS_TIERS.get(title_cased_set_name)
+        if bonus_list is None:
             return await smart_embed(
                 ctx,
                 _("`{input}` is not a valid set.\n\nPlease use one of the following full set names: \n{sets}").format(
@@ -189,7 +189,6 @@ class CharacterCommands(AdventureMixin):
             log.exception("Error with the new character sheet", exc_info=exc)
             return
 
-        bonus_list = sorted(sets, key=itemgetter("parts"))
         msg_list = []
         for bonus in bonus_list:
             parts = bonus.get("parts", 0)
@@ -486,7 +485,7 @@ class CharacterCommands(AdventureMixin):
                         break
             if msg:
                 await ctx.send(box(msg, lang="css"))
-                await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                await self._character_store.save(ctx, ctx.author, c)
             else:
                 await smart_embed(
                     ctx,
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import contextlib
+import json
+import logging
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, MutableMapping, Optional, Tuple, Union
+
+import discord
+from redbot.core import Config, commands
+
+from .defaults import default_user
+
+log = logging.getLogger("red.cogs.adventure")
+
+# How long a staged change may sit in memory before it is written to config.
+WRITE_BEHIND_DELAY = 5
+# Snapshots of sheets that were read but never saved are dropped after this long.
+SNAPSHOT_TTL = 600
+# Parsed sheets kept by CharacterCache, and how long one may be served for.
+CHARACTER_CACHE_SIZE = 1000
+CHARACTER_CACHE_TTL = 60
+
+
+def _dump(value) -> str:
+    return json.dumps(value, sort_keys=True)
+
+
+# Fields snapshotted entry by entry instead of as JSON. Their entries are never changed in
+# place, so an entry that is the same object as the one that was read hasn't changed.
+_ENTRY_FIELDS = frozenset({"backpack"})
+_MISSING = object()
+
+
+def _snapshot(field: str, value) -> Union[str, dict]:
+    if field in _ENTRY_FIELDS and isinstance(value, dict):
+        return dict(value)
+    return _dump(value)
+
+
+def _entries_unchanged(snapshot: Union[str, dict, None], value: dict) -> bool:
+    if not isinstance(snapshot, dict) or len(snapshot) != len(value):
+        return False
+    for (key, entry) in value.items():
+        old = snapshot.get(key, _MISSING)
+        if old is not entry and old != entry:
+            return False
+    return True
+
+
+def _full_sheet(data: Mapping) -> Dict[str, Any]:
+    """`data` with the fields it leaves out set to their defaults, as ``config.user(...).set`` would store it."""
+    return {**default_user, **data}
+
+
+class CharacterCache:
+    """LRU cache of parsed character sheets, bounded by size and age.
+
+    Each entry remembers the sheet version it was parsed from and is only served while
+    that is still the user's current version in the :class:`CharacterStore`, so a write
+    anywhere makes every older entry a miss. Entries are the keyword arguments
+    ``Character`` is built from, the caller copies them before building a sheet.
+    """
+
+    def __init__(self, maxsize: int = CHARACTER_CACHE_SIZE, ttl: float = CHARACTER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: MutableMapping[int, Tuple[int, float, Dict[str, Any]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int, version: int) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] != version or entry[1] < time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[2]
+
+    def put(self, user_id: int, version: int, sheet: Dict[str, Any]) -> None:
+        self._entries[user_id] = (version, time.monotonic() + self.ttl, sheet)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class CharacterStore:
+    """Write-behind cache in front of the user config group.
+
+    Every read takes a per-field snapshot of the sheet, the backpack by entry and every
+    other field as JSON. A saved sheet means the same as
+    it did for ``config.user(...).set``, fields it leaves out go back to their defaults,
+    but only the top level fields that differ from that snapshot are staged. Staged fields are
+    written with one ``set_raw`` per field once they have been pending for
+    ``WRITE_BEHIND_DELAY`` seconds. Reads always see staged values, so callers do not
+    need to know whether a change has reached config yet.
+
+    Paths that must be durable right away call :meth:`flush` after saving: trades,
+    rebirths, and anything that moves currency in the bank along with the sheet
+    (buying, selling, bank transfers, class changes, negaverse losses).
+    """
+
+    def __init__(self, config: Config, delay: float = WRITE_BEHIND_DELAY):
+        self.config = config
+        self.delay = delay
+        self.characters = CharacterCache()
+        self._versions: Dict[int, int] = {}
+        self._pending: Dict[int, Dict[str, str]] = {}
+        self._due: Dict[int, float] = {}
+        self._snapshots: Dict[int, Dict[str, Union[str, dict]]] = {}
+        self._touched: Dict[int, float] = {}
+        # A lock is only dropped once nothing holds or waits on it, so a woken waiter
+        # can never end up with a different lock than the next caller.
+        self._locks: MutableMapping[int, asyncio.Lock] = weakref.WeakValueDictionary()
+
+    def _get_lock(self, user_id: int) -> asyncio.Lock:
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        return lock
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def version(self, user_id: int) -> int:
+        """A counter that changes every time the user's sheet changes."""
+        return self._versions.get(user_id, 0)
+
+    def _bump(self, user_id: int) -> None:
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        self.characters.invalidate(user_id)
+
+    async def get(self, user: Union[discord.abc.User, discord.Object]) -> dict:
+        """Return the user's sheet with any staged changes applied on top."""
+        async with self._get_lock(user.id):
+            data = await self.config.user_from_id(user.id).all()
+        for (field, value) in self._pending.get(user.id, {}).items():
+            data[field] = json.loads(value)
+        self._snapshots[user.id] = {field: _snapshot(field, value) for (field, value) in data.items()}
+        self._touched[user.id] = time.monotonic()
+        return data
+
+    def set(self, user: Union[discord.Member, discord.User], data: Mapping) -> None:
+        """Stage the sheet `data`, only the top level fields that changed since the last read are written."""
+        self._stage(user, _full_sheet(data), every_field=False)
+
+    def replace(self, user: Union[discord.Member, discord.User], data: Mapping) -> None:
+        """Stage every field of the sheet `data`, whatever the last read saw.
+
+        For rebirths and resets, which overwrite the whole sheet.
+        """
+        self._stage(user, _full_sheet(data), every_field=True)
+
+    def _stage(self, user: Union[discord.Member, discord.User], data: Mapping, every_field: bool) -> None:
+        snapshot = self._snapshots.setdefault(user.id, {})
+        changed = {}
+        for (field, value) in data.items():
+            if field in _ENTRY_FIELDS and isinstance(value, dict):
+                if every_field or not _entries_unchanged(snapshot.get(field), value):
+                    changed[field] = _dump(value)
+                    snapshot[field] = dict(value)
+                continue
+            # Other fields are snapshotted as their JSON, which is also what gets written.
+            dumped = _dump(value)
+            if every_field or snapshot.get(field) != dumped:
+                changed[field] = snapshot[field] = dumped
+        self._touched[user.id] = time.monotonic()
+        if not changed:
+            return
+        self._bump(user.id)
+        self._pending.setdefault(user.id, {}).update(changed)
+        self._due.setdefault(user.id, time.monotonic() + self.delay)
+
+    async def save(self, ctx: commands.Context, user: Union[discord.Member, discord.User], character) -> None:
+        """Stage `character` for writing."""
+        self.set(user, await character.to_json(ctx, self.config))
+
+    async def flush(self, user: Union[discord.Member, discord.User]) -> None:
+        """Write the user's staged fields to config now."""
+        await self._flush_id(user.id)
+
+    async def _flush_id(self, user_id: int) -> None:
+        async with self._get_lock(user_id):
+            self._due.pop(user_id, None)
+            pending = self._pending.pop(user_id, None)
+            if not pending:
+                return
+            group = self.config.user_from_id(user_id)
+            try:
+                for (field, value) in pending.items():
+                    await group.set_raw(field, value=json.loads(value))
+            except Exception as exc:
+                # Put back whatever we failed to write, newer staged values win.
+                self._pending[user_id] = {**pending, **self._pending.get(user_id, {})}
+                self._due.setdefault(user_id, time.monotonic() + self.delay)
+                log.exception("Error writing character sheet for %s", user_id, exc_info=exc)
+
+    async def flush_all(self) -> None:
+        for user_id in list(self._pending):
+            await self._flush_id(user_id)
+
+    def discard(self, user_id: int) -> None:
+        """Forget everything staged or cached for `user_id`."""
+        self._bump(user_id)
+        self._pending.pop(user_id, None)
+        self._due.pop(user_id, None)
+        self._snapshots.pop(user_id, None)
+        self._touched.pop(user_id, None)
+
+    async def flush_loop(self) -> None:
+        with contextlib.suppress(asyncio.CancelledError):
+            while True:
+                now = time.monotonic()
+                for (user_id, due) in list(self._due.items()):
+                    if due <= now:
+                        await self._flush_id(user_id)
+                for (user_id, touched) in list(self._touched.items()):
+                    if touched + SNAPSHOT_TTL < now and user_id not in self._pending:
+                        self._snapshots.pop(user_id, None)
+                        self._touched.pop(user_id, None)
+                        if user_id not in self.characters._entries:
+                            self._versions.pop(user_id, None)
+                await asyncio.sleep(1)
@@ -1,21 +1,24 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
 import random
+import sys
 import time
-from copy import copy
+from copy import copy, deepcopy
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, MutableMapping, Optional, Tuple
+from typing import Any, Dict, Iterable, List, MutableMapping, NamedTuple, Optional, Set, Tuple, Union
 
 import discord
-from beautifultable import ALIGN_LEFT, BeautifulTable
 from discord.ext.commands import check
 from redbot.core import Config, commands
 from redbot.core.i18n import Translator
 from redbot.core.utils import AsyncIter
-from redbot.core.utils.chat_formatting import box, escape, humanize_number
+from redbot.core.utils.chat_formatting import escape, humanize_number
 
+from .backpack_filter import BackpackFilter
 from .bank import bank
 from .constants import (
     ASC_OPEN,
@@ -25,73 +28,242 @@ from .constants import (
     LEGENDARY_OPEN,
     ORDER,
     RARITIES,
-    REBIRTH_LVL,
-    REBIRTH_STEP,
     SET_OPEN,
     TINKER_CLOSE,
     TINKER_OPEN,
 )
+from .progression import extra_stat_points, max_level, xp_for_level
+from .tables import TablePages
 
 log = logging.getLogger("red.cogs.adventure")
 
 _ = Translator("Adventure", __file__)
 
+# How many sheets Character.load_many reads from config at once.
+LOAD_CONCURRENCY = 10
 
-class Item:
-    """An object to represent an item in the game world."""
 
-    def __init__(self, **kwargs):
-        self._ctx: commands.Context = kwargs.pop("ctx")
-        if kwargs.get("rarity") in ["event"]:
-            self.name: str = kwargs.get("name")
-        elif kwargs.get("rarity") in ["set", "legendary", "ascended"]:
-            self.name: str = kwargs.get("name").title()
-        else:
-            self.name: str = kwargs.get("name").lower()
-        self.slot: List[str] = kwargs.get("slot")
-        self.att: int = kwargs.get("att")
-        self.int: int = kwargs.get("int")
-        self.cha: int = kwargs.get("cha")
-        self.rarity: str = kwargs.get("rarity")
-        self.dex: int = kwargs.get("dex")
-        self.luck: int = kwargs.get("luck")
-        self.owned: int = kwargs.get("owned")
-        self.set: bool = kwargs.get("set", False)
-        self.parts: int = kwargs.get("parts")
-        self.total_stats: int = self.att + self.int + self.cha + self.dex + self.luck
+# Canonical stats of every set item keyed by name, registered when the theme data loads.
+# Set items look themselves up here so they don't need to hold on to a command context.
+GEAR_SETS: Dict[str, dict] = {}
+
+# Bonus tiers of every set sorted by the pieces they need, registered when the theme data loads.
+SET_BONUS_TIERS: Dict[str, List[dict]] = {}
+# For every set and piece count, the (stat, change) steps of all the tiers that count unlocks,
+# in the order they are applied.
+_SET_BONUS_STEPS: Dict[str, List[Tuple[Tuple[str, float], ...]]] = {}
+_MULTIPLIERS = frozenset({"cpmult", "xpmult", "statmult"})
+# Distinct combinations of equipped set pieces whose bonus is remembered.
+SET_BONUS_CACHE_SIZE = 1024
+
+# One shared list per distinct slot combination, items never mutate their slot list.
+_SLOT_LISTS: Dict[Tuple[str, ...], List[str]] = {}
+
+
+def register_gear_sets(data: Dict[str, dict]) -> None:
+    GEAR_SETS.clear()
+    GEAR_SETS.update(data)
+
+
+def register_set_bonuses(data: Dict[str, List[dict]]) -> None:
+    SET_BONUS_TIERS.clear()
+    _SET_BONUS_STEPS.clear()
+    for (set_name, tiers) in data.items():
+        SET_BONUS_TIERS[set_name] = sorted(tiers, key=lambda tier: tier.get("parts", 0))
+        most = max((tier.get("parts", 100) for tier in tiers), default=0)
+        _SET_BONUS_STEPS[set_name] = [
+            tuple(step for tier in tiers if tier.get("parts", 100) <= count for step in _tier_steps(tier))
+            for count in range(most + 1)
+        ]
+    set_bonus.cache_clear()
+
+
+def _tier_steps(tier: dict) -> List[Tuple[str, float]]:
+    steps = []
+    for (key, value) in tier.items():
+        if key == "parts":
+            continue
+        if key not in _MULTIPLIERS:
+            steps.append((key, value))
+        elif value >= 0:
+            # Multipliers stack by how far they are from 1.
+            steps.append((key, value - 1))
+    return steps
+
+
+@functools.lru_cache(maxsize=SET_BONUS_CACHE_SIZE)
+def set_bonus(equipped: Tuple[Tuple[str, int, int], ...]) -> Tuple[Dict[str, float], Tuple[str, ...]]:
+    """The combined bonus and the completed sets for `equipped` ``(set, pieces in set, pieces worn)``.
+
+    The result is shared between callers and must not be modified.
+    """
+    bonus = {
+        "att": 0,
+        "cha": 0,
+        "int": 0,
+        "dex": 0,
+        "luck": 0,
+        "statmult": 1,
+        "xpmult": 1,
+        "cpmult": 1,
+    }
+    for (set_name, parts, count) in equipped:
+        steps = _SET_BONUS_STEPS.get(set_name)
+        if steps:
+            for (key, value) in steps[min(count, len(steps) - 1)]:
+                bonus[key] += value
+    bonus["cpmult"] = max(0, bonus["cpmult"])
+    bonus["xpmult"] = max(0, bonus["xpmult"])
+    bonus["statmult"] = max(-0.25, bonus["statmult"])
+    return bonus, tuple(set_name for (set_name, parts, count) in equipped if set_name and count >= parts)
+
+
+def _intern_slot(slot: List[str]) -> List[str]:
+    key = tuple(slot)
+    interned = _SLOT_LISTS.get(key)
+    if interned is None:
+        interned = _SLOT_LISTS[key] = [sys.intern(s) for s in key]
+    return interned
+
+
+def format_item_name(name: str, rarity: str) -> str:
+    """How an item called `name` of `rarity` is shown to users, e.g. ``[name]`` for epics."""
+    if rarity == "normal":
+        return name
+    elif rarity == "rare":
+        return f".{name.replace(' ', '_')}"
+    elif rarity == "epic":
+        return f"[{name}]"
+    elif rarity == "legendary":
+        return f"{LEGENDARY_OPEN}{name}{LEGENDARY_CLOSE}"
+    elif rarity == "ascended":
+        return f"{ASC_OPEN}'{name}'{LEGENDARY_CLOSE}"
+    elif rarity == "set":
+        return f"{SET_OPEN}'{name}'{LEGENDARY_CLOSE}"
+    elif rarity == "forged":
+        name = name.replace("'", "’")
+        return f"{TINKER_OPEN}{name}{TINKER_CLOSE}"
+    elif rarity == "event":
+        return f"{EVENT_OPEN}'{name}'{LEGENDARY_CLOSE}"
+    return name
+
+
+def normalize_item_name(name: str, rarity: str) -> str:
+    """The case an item name is stored in for its rarity."""
+    if rarity in ["event"]:
+        return name
+    elif rarity in ["set", "legendary", "ascended"]:
+        return name.title()
+    return name.lower()
+
+
+def _slot_name(slot: List[str]) -> str:
+    """The slot an item is listed under, items taking both hands are "two handed"."""
+    if len(slot) > 1:
+        return "two handed"
+    return slot[0] if slot else ""
+
+
+def _template_field(field: str) -> property:
+    return property(lambda self: getattr(self.template, field))
+
+
+class ItemTemplate:
+    """The immutable part of an item, shared by every copy of the same item.
+
+    Templates are interned on their full stat line, so a set piece or a generated item
+    that rolled the same name and stats is one object no matter how many users own it.
+    They are looked up by name first, which needs no key of its own since the name is
+    already held by the template. Only a name seen with a second stat line is keyed on
+    the whole line.
+
+    The registry holds its templates strongly, a weak reference per template would cost
+    more than most items. Once it has doubled in size it drops every template that
+    nothing else refers to any more.
+
+    Templates only exist in memory. Stored entries keep each item's own stat line,
+    set pieces excepted, whose stats always come from the gear set registry.
+    """
+
+    FIELDS = ("name", "slot", "att", "int", "cha", "rarity", "dex", "luck", "set", "parts")
+    __slots__ = FIELDS + ("equip_level",)
+
+    _registry: Dict[Union[str, tuple], ItemTemplate] = {}
+    _prune_at = 1024
+
+    def __init__(self, fields: dict):
+        setter = object.__setattr__
+        for field in self.FIELDS:
+            setter(self, field, fields[field])
+        setter(self, "slot", _intern_slot(fields["slot"]))
+        setter(self, "equip_level", self._equip_level())
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self):
+        return f"<ItemTemplate name={self.name!r} rarity={self.rarity!r}>"
+
+    @property
+    def display(self) -> str:
+        return format_item_name(self.name, self.rarity)
+
+    @property
+    def total_stats(self) -> int:
+        total_stats = self.att + self.int + self.cha + self.dex + self.luck
         if len(self.slot) > 2:
-            self.total_stats *= 2
-        self.max_main_stat = max(self.att, self.int, self.cha, 1)
-        self.lvl: int = (
-            (kwargs.get("lvl") or self.get_equip_level()) if self.rarity == "event" else self.get_equip_level()
-        )
-        self.degrade = kwargs.get("degrade", 5)
+            total_stats *= 2
+        return total_stats
 
-    def __str__(self):
-        if self.rarity == "normal":
-            return self.name
-        elif self.rarity == "rare":
-            return f".{self.name.replace(' ', '_')}"
-        elif self.rarity == "epic":
-            return f"[{self.name}]"
-        elif self.rarity == "legendary":
-            return f"{LEGENDARY_OPEN}{self.name}{LEGENDARY_CLOSE}"
-        elif self.rarity == "ascended":
-            return f"{ASC_OPEN}'{self.name}'{LEGENDARY_CLOSE}"
-        elif self.rarity == "set":
-            return f"{SET_OPEN}'{self.name}'{LEGENDARY_CLOSE}"
-        elif self.rarity == "forged":
-            name = self.name.replace("'", "’")
-            return f"{TINKER_OPEN}{name}{TINKER_CLOSE}"
-        elif self.rarity == "event":
-            return f"{EVENT_OPEN}'{self.name}'{LEGENDARY_CLOSE}"
-        return self.name
+    @property
+    def max_main_stat(self) -> int:
+        return max(self.att, self.int, self.cha, 1)
 
     @property
-    def formatted_name(self):
-        return str(self)
+    def slot_name(self) -> str:
+        return _slot_name(self.slot)
 
-    def get_equip_level(self):
+    @classmethod
+    def get(cls, **fields) -> ItemTemplate:
+        """Return the shared template for `fields`, creating it if nobody holds one yet."""
+        name = fields["name"]
+        template = cls._registry.get(name)
+        if template is not None and template._matches(fields):
+            return template
+        key = tuple(tuple(fields[f]) if f == "slot" else fields[f] for f in cls.FIELDS)
+        template = cls._registry.get(key)
+        if template is None:
+            template = cls(fields)
+            cls._registry[key if name in cls._registry else name] = template
+            if len(cls._registry) > cls._prune_at:
+                cls.prune()
+        return template
+
+    @classmethod
+    def prune(cls) -> None:
+        """Drop every template that no item refers to any more."""
+        # Only the registry and getrefcount's own argument refer to an unused template.
+        for key in [key for key in cls._registry if sys.getrefcount(cls._registry[key]) <= 2]:
+            del cls._registry[key]
+        cls._prune_at = 2 * len(cls._registry) + 1024
+
+    def _matches(self, fields: dict) -> bool:
+        return (
+            self.att == fields["att"]
+            and self.int == fields["int"]
+            and self.cha == fields["cha"]
+            and self.dex == fields["dex"]
+            and self.luck == fields["luck"]
+            and self.rarity == fields["rarity"]
+            and self.set == fields["set"]
+            and self.parts == fields["parts"]
+            and self.slot == fields["slot"]
+        )
+
+    def replace(self, **changes) -> ItemTemplate:
+        return self.get(**{**{f: getattr(self, f) for f in self.FIELDS}, **changes})
+
+    def _equip_level(self) -> int:
         lvl = 1
         if self.rarity not in ["forged"]:
             # epic and legendary stats too similar so make level req's
@@ -111,6 +283,60 @@ class Item:
             lvl = positive_stats + negative_stats
         return max(int(lvl), 1)
 
+
+class Item:
+    """An object to represent an item in the game world.
+
+    The stats live on a shared :class:`ItemTemplate`, an item only owns how many
+    copies there are, its degrade and, for event items, its level.
+    """
+
+    __slots__ = ("template", "owned", "degrade", "lvl")
+
+    name = _template_field("name")
+    slot = _template_field("slot")
+    att = _template_field("att")
+    int = _template_field("int")
+    cha = _template_field("cha")
+    rarity = _template_field("rarity")
+    dex = _template_field("dex")
+    luck = _template_field("luck")
+    set = _template_field("set")
+    parts = _template_field("parts")
+    total_stats = _template_field("total_stats")
+    max_main_stat = _template_field("max_main_stat")
+
+    def __init__(self, **kwargs):
+        rarity = kwargs.get("rarity")
+        name = normalize_item_name(kwargs.get("name"), rarity)
+        self.template: ItemTemplate = ItemTemplate.get(
+            name=name,
+            slot=kwargs.get("slot"),
+            att=kwargs.get("att"),
+            int=kwargs.get("int"),
+            cha=kwargs.get("cha"),
+            rarity=sys.intern(rarity) if isinstance(rarity, str) else rarity,
+            dex=kwargs.get("dex"),
+            luck=kwargs.get("luck"),
+            set=kwargs.get("set", False),
+            parts=kwargs.get("parts"),
+        )
+        self.owned: int = kwargs.get("owned")
+        self.lvl: int = (
+            (kwargs.get("lvl") or self.get_equip_level()) if self.rarity == "event" else self.get_equip_level()
+        )
+        self.degrade: int = kwargs.get("degrade", 5)
+
+    def __str__(self):
+        return self.template.display
+
+    @property
+    def formatted_name(self):
+        return str(self)
+
+    def get_equip_level(self):
+        return self.template.equip_level
+
     @staticmethod
     def remove_markdowns(item):
         if item.startswith(".") or "_" in item:
@@ -141,10 +367,12 @@ class Item:
             item = item.replace("{Event:'", "").replace("'}", "")
         return item
 
-    @classmethod
-    def from_json(cls, ctx: commands.Context, data: dict):
-        name = "".join(data.keys())
-        data = data[name]
+    @staticmethod
+    def parse_name(name: str) -> Tuple[str, str]:
+        """Strip the legacy rarity markdown from a stored item name.
+
+        Returns the clean name and the rarity implied by the markdown.
+        """
         rarity = "normal"
         if name.startswith("."):
             name = name.replace("_", " ").replace(".", "")
@@ -185,6 +413,13 @@ class Item:
         elif name.startswith("{Event:'"):
             name = name.replace("{Event:'", "").replace("''}", "")
             rarity = "event"
+        return name, rarity
+
+    @classmethod
+    def from_json(cls, ctx: commands.Context, data: dict):
+        name = "".join(data.keys())
+        data = data[name]
+        name, rarity = cls.parse_name(name)
         rarity = data["rarity"] if "rarity" in data else rarity
         att = data["att"] if "att" in data else 0
         dex = data["dex"] if "dex" in data else 0
@@ -200,7 +435,7 @@ class Item:
         # This is used to preserve integrity of Set items
         # db = get_item_db(rarity)
         if rarity == "set":
-            item = ctx.cog.TR_GEAR_SET.get(name, {})
+            item = GEAR_SETS.get(name, {})
             if item:
                 parts = item.get("parts", parts)
                 _set = item.get("set", _set)
@@ -230,20 +465,22 @@ class Item:
             "parts": parts,
             "degrade": degrade,
         }
-        return cls(**item_data, ctx=ctx)
+        return cls(**item_data)
 
     def to_json(self) -> dict:
         # db = get_item_db(self.rarity)
         if self.rarity == "set":
-            updated_set = self._ctx.cog.TR_GEAR_SET.get(self.name)
+            updated_set = GEAR_SETS.get(self.name)
             if updated_set:
-                self.att = updated_set.get("att", self.att)
-                self.int = updated_set.get("int", self.int)
-                self.cha = updated_set.get("cha", self.cha)
-                self.dex = updated_set.get("dex", self.dex)
-                self.luck = updated_set.get("luck", self.luck)
-                self.set = updated_set.get("set", self.set)
-                self.parts = updated_set.get("parts", self.parts)
+                self.template = self.template.replace(
+                    att=updated_set.get("att", self.att),
+                    int=updated_set.get("int", self.int),
+                    cha=updated_set.get("cha", self.cha),
+                    dex=updated_set.get("dex", self.dex),
+                    luck=updated_set.get("luck", self.luck),
+                    set=updated_set.get("set", self.set),
+                    parts=updated_set.get("parts", self.parts),
+                )
         data = {
             self.name: {
                 "slot": self.slot,
@@ -272,11 +509,380 @@ class Item:
         return data
 
 
+class ItemMatches(NamedTuple):
+    """Backpack keys matching an item name, each list in backpack order."""
+
+    exact: List[str]
+    folded: List[str]
+    partial: List[str]
+
+
+class ItemNameIndex:
+    """Name lookups for the item converters without scanning the backpack.
+
+    Displayed names are indexed as typed and lowercased for exact matches, and the
+    lowercased keys are broken into trigrams so a substring search only has to check
+    the keys sharing every trigram of the needle.
+    """
+
+    GRAM = 3
+
+    def __init__(self):
+        self._display: Dict[str, str] = {}
+        self._exact: Dict[str, Set[str]] = {}
+        self._folded: Dict[str, Set[str]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+
+    def _grams_of(self, text: str) -> Set[str]:
+        return {text[i : i + self.GRAM] for i in range(len(text) - self.GRAM + 1)}
+
+    def add(self, key: str, display: str) -> None:
+        self._display[key] = display
+        self._exact.setdefault(display, set()).add(key)
+        self._folded.setdefault(display.lower(), set()).add(key)
+        for gram in self._grams_of(key.lower()):
+            self._grams.setdefault(gram, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        display = self._display.pop(key, None)
+        if display is None:
+            return
+        for (index, value) in ((self._exact, display), (self._folded, display.lower())):
+            index[value].discard(key)
+            if not index[value]:
+                del index[value]
+        for gram in self._grams_of(key.lower()):
+            self._grams[gram].discard(key)
+            if not self._grams[gram]:
+                del self._grams[gram]
+
+    def display(self, key: str) -> str:
+        return self._display[key]
+
+    def exact(self, name: str) -> Set[str]:
+        return self._exact.get(name, set())
+
+    def folded(self, name: str) -> Set[str]:
+        return self._folded.get(name.lower(), set())
+
+    def containing(self, needle: str) -> Set[str]:
+        """Keys whose lowercased name contains `needle`, which must already be lowercase."""
+        if len(needle) < self.GRAM:
+            return {key for key in self._display if needle in key.lower()}
+        postings = sorted((self._grams.get(g, set()) for g in self._grams_of(needle)), key=len)
+        if not postings[0]:
+            return set()
+        return {key for key in postings[0].intersection(*postings[1:]) if needle in key.lower()}
+
+
+class Backpack(MutableMapping):
+    """A backpack mapping that only builds :class:`Item` objects when they are accessed.
+
+    Entries loaded from config are kept as their raw dicts until something reads them,
+    so loading a character for its level, stats or treasure doesn't pay for every
+    item in a large backpack. ``len`` and :attr:`set_pieces` never build items.
+
+    The first filtered lookup builds indexes by rarity, slot and set, from there on they
+    are kept up to date as entries are added and removed, so :meth:`select` costs as much
+    as the items it returns rather than the whole backpack.
+
+    The number of set pieces is counted once and then kept as entries are added, removed
+    and built. Built items change their owned count in place, and the same item can be
+    equipped or in another backpack too, so the built set pieces are summed when the
+    count is read rather than told to report back.
+    """
+
+    def __init__(self, ctx: commands.Context, raw: Optional[Dict[str, dict]] = None):
+        self._ctx = ctx
+        self._entries: Dict[str, Any] = dict(raw or {})
+        # Keys whose entry has been built into an Item, the only ones a copy has to copy.
+        self._loaded: Set[str] = set()
+        self._indexed = False
+        self._fields: Dict[str, Tuple[str, str, Optional[str]]] = {}
+        self._position: Dict[str, int] = {}
+        self._counter = 0
+        self._by_rarity: Dict[str, Set[str]] = {}
+        self._by_slot: Dict[str, Set[str]] = {}
+        self._by_set: Dict[str, Set[str]] = {}
+        self._names: Optional[ItemNameIndex] = None
+        # Owned count of the set entries not built yet, None until it is first asked for.
+        self._raw_set_pieces: Optional[int] = None
+        self._loaded_sets: Set[str] = set()
+
+    def __getitem__(self, key: str) -> Item:
+        value = self._entries[key]
+        if not isinstance(value, Item):
+            if self._raw_set_pieces is not None:
+                self._forget_set_piece(key)
+            value = Item.from_json(self._ctx, {key: value})
+            self._entries[key] = value
+            self._loaded.add(key)
+            if self._raw_set_pieces is not None:
+                self._count_set_piece(key, value)
+        return value
+
+    def __setitem__(self, key: str, value: Item) -> None:
+        if self._raw_set_pieces is not None:
+            if key in self._entries:
+                self._forget_set_piece(key)
+            self._count_set_piece(key, value)
+        self._loaded.add(key)
+        if self._indexed:
+            self._unindex(key)
+            self._entries[key] = value
+            self._index(key, value)
+        else:
+            self._entries[key] = value
+        if self._names is not None:
+            self._names.remove(key)
+            self._names.add(key, self.display_of(key))
+
+    def __delitem__(self, key: str) -> None:
+        if self._raw_set_pieces is not None and key in self._entries:
+            self._forget_set_piece(key)
+        del self._entries[key]
+        self._loaded.discard(key)
+        if self._indexed:
+            self._unindex(key)
+            del self._position[key]
+        if self._names is not None:
+            self._names.remove(key)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def copy(self) -> Backpack:
+        """A backpack whose loaded items are copies, raw entries are shared since they are never mutated."""
+        backpack = Backpack(self._ctx, self._entries)
+        for key in self._loaded:
+            backpack._entries[key] = copy(self._entries[key])
+        backpack._loaded = set(self._loaded)
+        backpack._raw_set_pieces = self._raw_set_pieces
+        backpack._loaded_sets = set(self._loaded_sets)
+        return backpack
+
+    def __repr__(self) -> str:
+        loaded = sum(1 for v in self._entries.values() if isinstance(v, Item))
+        return f"<Backpack items={len(self._entries)} loaded={loaded}>"
+
+    def to_json(self) -> Dict[str, dict]:
+        """The backpack as it is stored in config.
+
+        Entries that were never built into an Item are passed through as they were loaded.
+        """
+        backpack = {}
+        for (key, value) in self._entries.items():
+            if isinstance(value, Item):
+                backpack.update(value.to_json())
+            else:
+                backpack[key] = value
+        return backpack
+
+    def rarity_of(self, key: str) -> str:
+        """Return the rarity of an entry without building its item."""
+        value = self._entries[key]
+        if isinstance(value, Item):
+            return value.rarity
+        return value["rarity"] if "rarity" in value else Item.parse_name(key)[1]
+
+    def slot_of(self, key: str) -> str:
+        """Return the slot an entry is listed under without building its item."""
+        if self._indexed:
+            return self._fields[key][1]
+        return self._describe(key, self._entries[key])[1]
+
+    def display_of(self, key: str) -> str:
+        """Return ``str(item)`` for an entry without building its item."""
+        value = self._entries[key]
+        if isinstance(value, Item):
+            return str(value)
+        rarity = self.rarity_of(key)
+        return format_item_name(normalize_item_name(Item.parse_name(key)[0], rarity), rarity)
+
+    @property
+    def set_pieces(self) -> int:
+        """Total number owned of every set entry."""
+        if self._raw_set_pieces is None:
+            self._raw_set_pieces = 0
+            for (key, value) in self._entries.items():
+                self._count_set_piece(key, value)
+        return self._raw_set_pieces + sum(self._entries[key].owned for key in self._loaded_sets)
+
+    def _count_set_piece(self, key: str, value: Any) -> None:
+        if isinstance(value, Item):
+            if value.rarity == "set":
+                self._loaded_sets.add(key)
+        elif self.rarity_of(key) == "set":
+            self._raw_set_pieces += value.get("owned", 1)
+
+    def _forget_set_piece(self, key: str) -> None:
+        if isinstance(self._entries[key], Item):
+            self._loaded_sets.discard(key)
+        elif self.rarity_of(key) == "set":
+            self._raw_set_pieces -= self._entries[key].get("owned", 1)
+
+    def _describe(self, key: str, value: Any) -> Tuple[str, str, Optional[str]]:
+        """The indexed fields of an entry, read the same way ``Item.from_json`` would."""
+        if isinstance(value, Item):
+            return value.rarity, value.template.slot_name, value.set or None
+        rarity = self.rarity_of(key)
+        slot = value.get("slot") or []
+        set_name = value.get("set")
+        if rarity == "set":
+            gear_set = GEAR_SETS.get(Item.parse_name(key)[0], {})
+            slot = gear_set.get("slot", slot)
+            set_name = gear_set.get("set", set_name)
+        return rarity, _slot_name(slot), set_name or None
+
+    def _index(self, key: str, value: Any) -> None:
+        fields = self._describe(key, value)
+        self._fields[key] = fields
+        if key not in self._position:
+            self._position[key] = self._counter
+            self._counter += 1
+        rarity, slot_name, set_name = fields
+        self._by_rarity.setdefault(rarity, set()).add(key)
+        self._by_slot.setdefault(slot_name, set()).add(key)
+        if set_name:
+            self._by_set.setdefault(set_name, set()).add(key)
+
+    def _unindex(self, key: str) -> None:
+        fields = self._fields.pop(key, None)
+        if fields is None:
+            return
+        rarity, slot_name, set_name = fields
+        for (index, value) in (
+            (self._by_rarity, rarity),
+            (self._by_slot, slot_name),
+            (self._by_set, set_name),
+        ):
+            keys = index.get(value)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del index[value]
+
+    def _build_index(self) -> None:
+        if self._indexed:
+            return
+        for (key, value) in self._entries.items():
+            self._index(key, value)
+        self._indexed = True
+
+    def select(
+        self,
+        *,
+        slots: Optional[Iterable[str]] = None,
+        rarities: Optional[Iterable[str]] = None,
+        sets: Optional[Iterable[str]] = None,
+        exclude_slots: Optional[Iterable[str]] = None,
+        exclude_rarities: Optional[Iterable[str]] = None,
+        exclude_sets: Optional[Iterable[str]] = None,
+    ) -> List[str]:
+        """Return the keys matching every given filter, in backpack order.
+
+        Each filter matches any of its values, e.g. ``rarities=("legendary", "ascended")``.
+        """
+        self._build_index()
+        include = [
+            set().union(*(index.get(v, ()) for v in values))
+            for (index, values) in ((self._by_slot, slots), (self._by_rarity, rarities), (self._by_set, sets))
+            if values is not None
+        ]
+        if include:
+            include.sort(key=len)
+            keys = include[0].intersection(*include[1:])
+        else:
+            keys = set(self._entries)
+        for (index, values) in (
+            (self._by_slot, exclude_slots),
+            (self._by_rarity, exclude_rarities),
+            (self._by_set, exclude_sets),
+        ):
+            if values is not None and keys:
+                keys = keys.difference(*(index.get(v, ()) for v in values))
+        return sorted(keys, key=self._position.__getitem__)
+
+    def resolve(self, argument: str) -> ItemMatches:
+        """Find the entries a user could mean by `argument`.
+
+        ``exact`` entries are shown exactly as `argument`, ``folded`` ones match it ignoring
+        case and ``partial`` ones contain it in their name once markdown is stripped.
+        """
+        self._build_index()
+        if self._names is None:
+            self._names = ItemNameIndex()
+            for key in self._entries:
+                self._names.add(key, self.display_of(key))
+        names = self._names
+        exact = names.exact(argument) if argument else set()
+        folded = names.folded(argument) if argument else set()
+        partial = names.containing(Item.remove_markdowns(argument).lower())
+        position = self._position.__getitem__
+        return ItemMatches(sorted(exact, key=position), sorted(folded, key=position), sorted(partial, key=position))
+
+    def rank(self, keys: Iterable[str], argument: str) -> List[str]:
+        """Order candidate keys by how closely they match `argument`, best first."""
+        self._build_index()
+        needle = Item.remove_markdowns(argument).lower()
+
+        def _rank(key):
+            display = self.display_of(key)
+            name = key.lower()
+            return (
+                display != argument,
+                display.lower() != argument.lower(),
+                name != needle,
+                not name.startswith(needle),
+                len(name) - len(needle),
+                self._position[key],
+            )
+
+        return sorted(keys, key=_rank)
+
+
+def _equipment_slot(slot: str) -> property:
+    """An equipment slot that keeps the character's count of equipped set pieces."""
+    attr = f"_equipped_{slot}"
+
+    def getter(self) -> Optional[Item]:
+        return getattr(self, attr)
+
+    def setter(self, item: Optional[Item]) -> None:
+        current = getattr(self, attr, None)
+        self._equipped_sets += (item is not None and item.rarity == "set") - (
+            current is not None and current.rarity == "set"
+        )
+        setattr(self, attr, item)
+
+    return property(getter, setter)
+
+
 class Character:
     """An class to represent the characters stats."""
 
+    head = _equipment_slot("head")
+    neck = _equipment_slot("neck")
+    chest = _equipment_slot("chest")
+    gloves = _equipment_slot("gloves")
+    belt = _equipment_slot("belt")
+    legs = _equipment_slot("legs")
+    boots = _equipment_slot("boots")
+    left = _equipment_slot("left")
+    right = _equipment_slot("right")
+    ring = _equipment_slot("ring")
+    charm = _equipment_slot("charm")
+
     def __init__(self, **kwargs):
         self._ctx: commands.Context = kwargs.pop("ctx")
+        self._equipped_sets = 0
         self.exp: int = kwargs.pop("exp")
         self.lvl: int = kwargs.pop("lvl")
         self.treasure: List[int] = kwargs.pop("treasure")
@@ -291,7 +897,7 @@ class Character:
         self.right: Item = kwargs.pop("right")
         self.ring: Item = kwargs.pop("ring")
         self.charm: Item = kwargs.pop("charm")
-        self.backpack: dict = kwargs.pop("backpack")
+        self.backpack: Backpack = kwargs.pop("backpack")
         self.loadouts: dict = kwargs.pop("loadouts")
         self.heroclass: dict = kwargs.pop("heroclass")
         self.skill: dict = kwargs.pop("skill")
@@ -305,7 +911,6 @@ class Character:
         self.get_set_bonus()
         self.maxlevel = self.get_max_level()
         self.lvl = self.lvl if self.lvl < self.maxlevel else self.maxlevel
-        self.set_items = self.get_set_item_count()
         self.att, self._att = self.get_stat_value("att")
         self.cha, self._cha = self.get_stat_value("cha")
         self.int, self._int = self.get_stat_value("int")
@@ -376,22 +981,7 @@ class Character:
 
     def get_stat_value(self, stat: str):
         """Calculates the stats dynamically for each slot of equipment."""
-        extrapoints = 0
-        rebirths = copy(self.rebirths)
-        extrapoints += rebirths // 10 * 5
-
-        for _loop_counter in range(rebirths):
-            if rebirths >= 30:
-                extrapoints += 3
-            elif rebirths >= 20:
-                extrapoints += 5
-            elif rebirths >= 10:
-                extrapoints += 1
-            elif rebirths < 10:
-                extrapoints += 2
-            rebirths -= 1
-
-        extrapoints = int(extrapoints)
+        extrapoints = extra_stat_points(self.rebirths)
 
         stats = 0 + extrapoints
         for slot in ORDER:
@@ -412,16 +1002,13 @@ class Character:
         set_names = {}
         returnable_items = []
         item_names = set()
-        async for item in AsyncIter(self.backpack, steps=100):
+        keys = self.backpack.select(rarities=("set",), sets=(set_name,) if set_name else None)
+        async for item in AsyncIter(keys, steps=100):
             item = self.backpack[item]
-            if item.rarity != "set":
-                continue
             if item.name in item_names:
                 continue
             if not item.set:
                 continue
-            if set_name and set_name != item.set:
-                continue
             if item.set and item.set not in set_names:
                 returnable_items.append(item)
                 item_names.add(item.name)
@@ -433,70 +1020,32 @@ class Character:
                 set_names[item.set] = (parts, count + 1)
         if return_items:
             return returnable_items
-        for set_name in self._ctx.cog.SET_BONUSES:
+        for (set_name, tiers) in SET_BONUS_TIERS.items():
             if set_name in set_names:
                 continue
-            set_names[set_name] = (max(bonus["parts"] for bonus in self._ctx.cog.SET_BONUSES[set_name]), 0)
+            set_names[set_name] = (tiers[-1]["parts"], 0)
         return set_names
 
     def get_set_bonus(self):
-        set_names = {}
-        last_slot = ""
-        base = {
-            "att": 0,
-            "cha": 0,
-            "int": 0,
-            "dex": 0,
-            "luck": 0,
-            "statmult": 1,
-            "xpmult": 1,
-            "cpmult": 1,
-        }
-        added = []
-        for slots in ORDER:
-            if slots == "two handed":
-                continue
-            if last_slot == "two handed":
-                last_slot = slots
+        equipped = {}
+        added = set()
+        for slot in ORDER:
+            if slot == "two handed":
                 continue
-            item = getattr(self, slots)
-            if item is None or item.name in added:
+            item = getattr(self, slot)
+            if item is None or not item.set or item.name in added:
                 continue
-            if item.set and item.set not in set_names:
-                added.append(item.name)
-                set_names.update({item.set: (item.parts, 1, self._ctx.cog.SET_BONUSES.get(item.set, []))})
-            elif item.set and item.set in set_names:
-                added.append(item.name)
-                parts, count, bonus = set_names[item.set]
-                set_names[item.set] = (parts, count + 1, bonus)
-        full_sets = [(s, v[1]) for s, v in set_names.items() if v[1] >= v[0]]
-        partial_sets = [(s, v[1]) for s, v in set_names.items()]
-        self.sets = [s for s, _ in full_sets if s]
-        for (_set, parts) in partial_sets:
-            set_bonuses = self._ctx.cog.SET_BONUSES.get(_set, [])
-            for bonus in set_bonuses:
-                required_parts = bonus.get("parts", 100)
-                if required_parts > parts:
-                    continue
-                for (key, value) in bonus.items():
-                    if key == "parts":
-                        continue
-                    if key not in ["cpmult", "xpmult", "statmult"]:
-                        base[key] += value
-                    elif key in ["cpmult", "xpmult", "statmult"]:
-                        if value > 1:
-                            base[key] += value - 1
-                        elif value >= 0:
-                            base[key] -= 1 - value
-        self.gear_set_bonus = base
-        self.gear_set_bonus["cpmult"] = max(0, self.gear_set_bonus["cpmult"])
-        self.gear_set_bonus["xpmult"] = max(0, self.gear_set_bonus["xpmult"])
-        self.gear_set_bonus["statmult"] = max(-0.25, self.gear_set_bonus["statmult"])
+            added.add(item.name)
+            parts, count = equipped.get(item.set, (item.parts, 0))
+            equipped[item.set] = (parts, count + 1)
+        bonus, sets = set_bonus(tuple((set_name, parts, count) for (set_name, (parts, count)) in equipped.items()))
+        self.sets = list(sets)
+        self.gear_set_bonus = dict(bonus)
 
     def __str__(self):
         """Define str to be our default look for the character sheet :thinkies:"""
-        next_lvl = int((self.lvl + 1) ** 3.5)
-        max_level_xp = int((self.maxlevel + 1) ** 3.5)
+        next_lvl = xp_for_level(self.lvl + 1)
+        max_level_xp = xp_for_level(self.maxlevel + 1)
 
         if self.heroclass != {} and "name" in self.heroclass:
             class_desc = self.heroclass["name"] + "\n\n" + self.heroclass["desc"]
@@ -633,22 +1182,7 @@ class Character:
         return form_string + "\n"
 
     def get_max_level(self) -> int:
-        rebirths = max(self.rebirths, 0)
-
-        if rebirths == 0:
-            maxlevel = 5
-        else:
-            maxlevel = REBIRTH_LVL
-
-        for _loop_counter in range(rebirths):
-            if rebirths >= 20:
-                maxlevel += REBIRTH_STEP
-            elif rebirths > 10:
-                maxlevel += 10
-            elif rebirths <= 10:
-                maxlevel += 5
-            rebirths -= 1
-        return min(maxlevel, 10000)
+        return max_level(self.rebirths)
 
     @staticmethod
     def get_slot_index(slot):
@@ -663,22 +1197,17 @@ class Character:
         reverse_rarities = list(reversed(RARITIES))
         return reverse_rarities.index(rarity)
 
-    async def get_sorted_backpack(self, backpack: dict, slot=None, rarity=None):
+    async def get_sorted_backpack(self, backpack: Backpack, slot=None, rarity=None):
         tmp = {}
 
         def _sort(item):
             return self.get_rarity_index(item[1].rarity), item[1].lvl, item[1].total_stats
 
-        async for item in AsyncIter(backpack, steps=100):
-            slots = backpack[item].slot
-            slot_name = slots[0]
-            if len(slots) > 1:
-                slot_name = "two handed"
-            if slot is not None and slot_name != slot:
-                continue
-            if rarity is not None and rarity != backpack[item].rarity:
-                continue
-
+        keys = backpack.select(
+            slots=(slot,) if slot is not None else None, rarities=(rarity,) if rarity is not None else None
+        )
+        async for item in AsyncIter(keys, steps=100):
+            slot_name = backpack.slot_of(item)
             if slot_name not in tmp:
                 tmp[slot_name] = []
             tmp[slot_name].append((item, backpack[item]))
@@ -690,7 +1219,7 @@ class Character:
         return final
 
     async def looted(self, how_many: int = 1) -> List[Tuple[str, int]]:
-        items = [i for n, i in self.backpack.items() if i.rarity not in ["normal", "rare", "epic", "forged"]]
+        items = [self.backpack[n] for n in self.backpack.select(exclude_rarities=("normal", "rare", "epic", "forged"))]
         looted_so_far = 0
         looted = []
         if not items:
@@ -735,11 +1264,7 @@ class Character:
             msg = _("{author}'s backpack\n\n").format(author=escape(self.user.display_name, formatting=True))
         else:
             msg = _("{author}'s forgeables\n\n").format(author=escape(self.user.display_name, formatting=True))
-        msg_len = len(msg)
-        table = BeautifulTable(default_alignment=ALIGN_LEFT, maxwidth=500)
-        table.set_style(BeautifulTable.STYLE_RST)
-        tables = []
-        table.columns.header = [
+        headers = [
             "Name",
             "Slot",
             "ATT",
@@ -752,8 +1277,8 @@ class Character:
             "DEG",
             "SET",
         ]
+        rows = []
         consumed_list = consumed
-        remainder = False
         async for slot_group in AsyncIter(bkpk, steps=100):
             slot_name_org = slot_group[0][1].slot
             slot_name = slot_name_org[0] if len(slot_name_org) < 2 else "two handed"
@@ -774,24 +1299,6 @@ class Character:
                     continue
                 if set_name is not None and set_name != item.set:
                     continue
-                if len(str(table)) > 1500:
-                    remainder = False
-                    tables.append(box(msg + str(table) + f"\nPage {len(tables) + 1}", lang="css"))
-                    table = BeautifulTable(default_alignment=ALIGN_LEFT, maxwidth=500)
-                    table.set_style(BeautifulTable.STYLE_RST)
-                    table.columns.header = [
-                        "Name",
-                        "Slot",
-                        "ATT",
-                        "CHA",
-                        "INT",
-                        "DEX",
-                        "LUC",
-                        "LVL",
-                        "QTY",
-                        "DEG",
-                        "SET",
-                    ]
                 if show_delta:
                     att = self.get_equipped_delta(current_equipped, item, "att")
                     cha = self.get_equipped_delta(current_equipped, item, "cha")
@@ -804,8 +1311,7 @@ class Character:
                     int = item.int if len(slot_name_org) < 2 else item.int * 2
                     dex = item.dex if len(slot_name_org) < 2 else item.dex * 2
                     luck = item.luck if len(slot_name_org) < 2 else item.luck * 2
-                remainder = True
-                table.rows.append(
+                rows.append(
                     (
                         str(item),
                         slot_name,
@@ -822,196 +1328,40 @@ class Character:
                         item.set or "N/A",
                     )
                 )
-        if remainder:
-            tables.append(box(msg + str(table) + f"\nPage {len(tables) + 1}", lang="css"))
-        return tables
+        return TablePages(headers, rows, msg)
 
     async def get_sorted_backpack_arg_parse(
-        self,
-        backpack: dict,
-        slots: List[str],
-        rarities: List[str],
-        sets: List[str],
-        equippable: bool,
-        _except: bool,
-        strength: MutableMapping[str, Any],
-        intelligence: MutableMapping[str, Any],
-        charisma: MutableMapping[str, Any],
-        luck: MutableMapping[str, Any],
-        dexterity: MutableMapping[str, Any],
-        level: MutableMapping[str, Any],
-        degrade: MutableMapping[str, Any],
-        ignore_case: bool,
-        match: Optional[str],
-        no_match: Optional[str],
-        rarity_exclude: List[str] = None,
+        self, backpack: Backpack, query: BackpackFilter, rarity_exclude: List[str] = None
     ):
         tmp = {}
 
         def _sort(item):
             return self.get_rarity_index(item), item[1].lvl, item[1].total_stats
 
-        if not _except:
-            async for item_name in AsyncIter(backpack, steps=100):
-                item = backpack[item_name]
-                item_slots = item.slot
-                slot_name = item_slots[0]
-                if rarity_exclude is not None and item.rarity in rarity_exclude:
-                    continue
-
-                if len(item_slots) > 1:
-                    slot_name = "two handed"
-                if no_match:
-                    actual_item_name = str(item)
-                    if ignore_case:
-                        if no_match.lower() in actual_item_name.lower():
-                            continue
-                    elif no_match in actual_item_name:
-                        continue
-                if match:
-                    actual_item_name = str(item)
-                    if ignore_case:
-                        if match.lower() not in actual_item_name.lower():
-                            continue
-                    elif match not in actual_item_name:
-                        continue
-                if slots and slot_name not in slots:
-                    continue
-                if sets and item.rarity != "set":
-                    continue
-                elif rarities and item.rarity not in rarities:
-                    continue
-                if sets and item.set not in sets:
-                    continue
-                e_level = self.equip_level(item)
-                if equippable and self.lvl < e_level:
-                    continue
-                if degrade and item.rarity in ["legendary", "ascended", "event"]:
-                    if (d := degrade.get("equal")) is not None:
-                        if item.degrade != d:
-                            continue
-                    elif not degrade["min"] < item.degrade < degrade["max"]:
-                        continue
-                if level:
-                    if (d := level.get("equal")) is not None:
-                        if e_level != d:
-                            continue
-                    elif not level["min"] < e_level < level["max"]:
-                        continue
-                if dexterity:
-                    if (d := dexterity.get("equal")) is not None:
-                        if item.dex != d:
-                            continue
-                    elif not dexterity["min"] < item.dex < dexterity["max"]:
-                        continue
-                if luck:
-                    if (d := luck.get("equal")) is not None:
-                        if item.luck != d:
-                            continue
-                    elif not luck["min"] < item.luck < luck["max"]:
-                        continue
-                if charisma:
-                    if (d := charisma.get("equal")) is not None:
-                        if item.cha != d:
-                            continue
-                    elif not charisma["min"] < item.cha < charisma["max"]:
-                        continue
-                if intelligence:
-                    if (d := intelligence.get("equal")) is not None:
-                        if item.int != d:
-                            continue
-                    elif not intelligence["min"] < item.int < intelligence["max"]:
-                        continue
-                if strength:
-                    if (d := strength.get("equal")) is not None:
-                        if item.att != d:
-                            continue
-                    elif not strength["min"] < item.att <= strength["max"]:
-                        continue
-
-                if slot_name not in tmp:
-                    tmp[slot_name] = []
-                tmp[slot_name].append((item_name, item))
+        if not query.except_:
+            if query.sets:
+                # Asking for sets only ever matches set items, whatever rarities were given.
+                keys = backpack.select(
+                    slots=query.slots or None, rarities=("set",), sets=query.sets, exclude_rarities=rarity_exclude
+                )
+            else:
+                keys = backpack.select(
+                    slots=query.slots or None, rarities=query.rarities or None, exclude_rarities=rarity_exclude
+                )
         else:
-            rarities = [] if rarities == RARITIES else rarities
-            slots = [] if slots == ORDER else slots
-            async for item_name in AsyncIter(backpack, steps=100):
-                item = backpack[item_name]
-                item_slots = item.slot
-                slot_name = item_slots[0]
-                if rarity_exclude is not None and item.rarity in rarity_exclude:
-                    continue
-
-                if len(item_slots) > 1:
-                    slot_name = "two handed"
-                if no_match:
-                    actual_item_name = str(item)
-                    if ignore_case:
-                        if no_match.lower() not in actual_item_name.lower():
-                            continue
-                    elif no_match not in actual_item_name:
-                        continue
-                if match:
-                    actual_item_name = str(item)
-                    if ignore_case:
-                        if match.lower() in actual_item_name.lower():
-                            continue
-                    elif match in actual_item_name:
-                        continue
-                if slots and slot_name in slots:
-                    continue
-                elif rarities and item.rarity in rarities:
-                    continue
-                if sets and item.set in sets:
-                    continue
-                e_level = self.equip_level(item)
-                if equippable and self.lvl >= e_level:
-                    continue
-                if degrade and item.rarity in ["legendary", "ascended", "event"]:
-                    if (d := degrade.get("equal")) is not None:
-                        if item.degrade == d:
-                            continue
-                    elif degrade["min"] < item.degrade < degrade["max"]:
-                        continue
-                if level:
-                    if (d := level.get("equal")) is not None:
-                        if e_level == d:
-                            continue
-                    elif level["min"] < e_level < level["max"]:
-                        continue
-                if dexterity:
-                    if (d := dexterity.get("equal")) is not None:
-                        if item.dex == d:
-                            continue
-                    elif dexterity["min"] < item.dex < dexterity["max"]:
-                        continue
-                if luck:
-                    if (d := luck.get("equal")) is not None:
-                        if item.luck == d:
-                            continue
-                    elif luck["min"] < item.luck < luck["max"]:
-                        continue
-                if charisma:
-                    if (d := charisma.get("equal")) is not None:
-                        if item.cha == d:
-                            continue
-                    elif charisma["min"] < item.cha < charisma["max"]:
-                        continue
-                if intelligence:
-                    if (d := intelligence.get("equal")) is not None:
-                        if item.int == d:
-                            continue
-                    elif intelligence["min"] < item.int < intelligence["max"]:
-                        continue
-                if strength:
-                    if (d := strength.get("equal")) is not None:
-                        if item.att == d:
-                            continue
-                    elif strength["min"] < item.att <= strength["max"]:
-                        continue
-                if slot_name not in tmp:
-                    tmp[slot_name] = []
-                tmp[slot_name].append((item_name, item))
+            keys = backpack.select(
+                exclude_slots=query.slots or None,
+                exclude_rarities=[*query.rarities, *(rarity_exclude or [])],
+                exclude_sets=query.sets or None,
+            )
+        async for item_name in AsyncIter(keys, steps=100):
+            item = backpack[item_name]
+            if query.checks and not query.keep(item, self.equip_level(item), self.lvl):
+                continue
+            slot_name = backpack.slot_of(item_name)
+            if slot_name not in tmp:
+                tmp[slot_name] = []
+            tmp[slot_name].append((item_name, item))
 
         slots = sorted(list(tmp.keys()), key=self.get_slot_index)
         final = []
@@ -1020,47 +1370,10 @@ class Character:
                 final.append((slot_name, sorted(tmp[slot_name], key=_sort)))
         return final
 
-    async def get_argparse_backpack(self, query: MutableMapping[str, Any]) -> List[str]:
-        delta = query.pop("delta", False)
-        equippable = query.pop("equippable", False)
-        sets = query.pop("set", [])
-        rarities = query.pop("rarity", [])
-        slots = query.pop("slot", [])
-        strength = query.pop("strength", {})
-        intelligence = query.pop("intelligence", {})
-        charisma = query.pop("charisma", {})
-        luck = query.pop("luck", {})
-        dexterity = query.pop("dexterity", {})
-        level = query.pop("level", {})
-        degrade = query.pop("degrade", {})
-        ignore_case = query.pop("icase", False)
-        match = query.pop("match", None)
-        no_match = query.pop("no_match", None)
-        _except = query.pop("except", False)
-
-        bkpk = await self.get_sorted_backpack_arg_parse(
-            self.backpack,
-            slots=slots,
-            rarities=rarities,
-            sets=sets,
-            equippable=equippable,
-            strength=strength,
-            intelligence=intelligence,
-            charisma=charisma,
-            luck=luck,
-            dexterity=dexterity,
-            level=level,
-            degrade=degrade,
-            match=match,
-            no_match=no_match,
-            ignore_case=ignore_case,
-            _except=_except,
-        )
+    async def get_argparse_backpack(self, query: BackpackFilter) -> TablePages:
+        bkpk = await self.get_sorted_backpack_arg_parse(self.backpack, query)
 
         msg = _("{author}'s backpack\n\n").format(author=escape(self.user.display_name, formatting=True))
-        table = BeautifulTable(default_alignment=ALIGN_LEFT, maxwidth=500)
-        table.set_style(BeautifulTable.STYLE_RST)
-        tables = []
         headers = [
             "Name",
             "Slot",
@@ -1072,26 +1385,18 @@ class Character:
             "LVL",
             "QTY",
         ]
-        if not rarities or any(x in rarities for x in ["legendary", "event", "ascended"]):
+        if query.show_degrade:
             headers.append("DEG")
 
-        if sets or not rarities or "set" in rarities:
+        if query.show_set:
             headers.append("SET")
 
-        table.columns.header = headers
-
-        remainder = False
+        rows = []
         async for slot_name, slot_group in AsyncIter(bkpk, steps=100):
             slot_name_org = slot_group[0][1].slot
             current_equipped = getattr(self, slot_name if slot_name != "two handed" else "left", None)
             async for item_name, item in AsyncIter(slot_group, steps=100):
-                if len(str(table)) > 1500:
-                    tables.append(box(msg + str(table) + f"\nPage {len(tables) + 1}", lang="css"))
-                    table = BeautifulTable(default_alignment=ALIGN_LEFT, maxwidth=500)
-                    table.set_style(BeautifulTable.STYLE_RST)
-                    table.columns.header = headers
-                    remainder = False
-                if delta:
+                if query.delta:
                     att = self.get_equipped_delta(current_equipped, item, "att")
                     cha = self.get_equipped_delta(current_equipped, item, "cha")
                     int = self.get_equipped_delta(current_equipped, item, "int")
@@ -1124,50 +1429,13 @@ class Character:
                     data.append(
                         item.set or "N/A",
                     )
-                table.rows.append(data)
-                remainder = True
-        if remainder:
-            tables.append(box(msg + str(table) + f"\nPage {len(tables) + 1}", lang="css"))
-        return tables
+                rows.append(data)
+        return TablePages(headers, rows, msg)
 
     async def get_argparse_backpack_items(
-        self, query: MutableMapping[str, Any], rarity_exclude: List[str] = None
-    ) -> List[Item]:
-        equippable = query.pop("equippable", False)
-        sets = query.pop("set", [])
-        rarities = query.pop("rarity", [])
-        slots = query.pop("slot", [])
-        strength = query.pop("strength", {})
-        intelligence = query.pop("intelligence", {})
-        charisma = query.pop("charisma", {})
-        luck = query.pop("luck", {})
-        dexterity = query.pop("dexterity", {})
-        level = query.pop("level", {})
-        degrade = query.pop("degrade", {})
-        ignore_case = query.pop("icase", False)
-        match = query.pop("match", None)
-        no_match = query.pop("no_match", None)
-        _except = query.pop("except", False)
-
-        bkpk = await self.get_sorted_backpack_arg_parse(
-            self.backpack,
-            slots=slots,
-            rarities=rarities,
-            sets=sets,
-            equippable=equippable,
-            strength=strength,
-            intelligence=intelligence,
-            charisma=charisma,
-            luck=luck,
-            dexterity=dexterity,
-            level=level,
-            degrade=degrade,
-            match=match,
-            no_match=no_match,
-            ignore_case=ignore_case,
-            _except=_except,
-        )
-        return bkpk
+        self, query: BackpackFilter, rarity_exclude: List[str] = None
+    ) -> List[Tuple[str, List[Tuple[str, Item]]]]:
+        return await self.get_sorted_backpack_arg_parse(self.backpack, query, rarity_exclude=rarity_exclude)
 
     def get_equipped_delta(self, equiped: Item, to_compare: Item, stat_name: str) -> str:
         if (equiped and len(equiped.slot) == 2) and (to_compare and len(to_compare.slot) == 2):
@@ -1298,8 +1566,59 @@ class Character:
         cls, ctx: commands.Context, config: Config, user: discord.Member, daily_bonus_mapping: Dict[str, float]
     ):
         """Return a Character object from config and user."""
-        data = await config.user(user).all()
+        store = getattr(ctx.cog, "_character_store", None)
+        if store is None:
+            sheet = await cls._parse_sheet(ctx, config, await config.user(user).all())
+        else:
+            version = store.version(user.id)
+            sheet = store.characters.get(user.id, version)
+            if sheet is None:
+                sheet = await cls._parse_sheet(ctx, config, await store.get(user))
+                store.characters.put(user.id, version, sheet)
+            sheet = cls._copy_sheet(sheet)
         balance = await bank.get_balance(user)
+        return cls(**sheet, bal=balance, user=user, ctx=ctx, daily_bonus_mapping=daily_bonus_mapping)
+
+    @classmethod
+    async def load_many(
+        cls,
+        ctx: commands.Context,
+        config: Config,
+        users: Iterable[discord.abc.User],
+        daily_bonus_mapping: Dict[str, float],
+        concurrency: int = LOAD_CONCURRENCY,
+    ) -> List[Union[Character, BaseException]]:
+        """Load the sheets and balances of `users` with at most `concurrency` loads in flight.
+
+        Results are returned in the same order as `users`. If a sheet fails to load its
+        exception is returned in its place instead of being raised, including the
+        ``CancelledError`` of a load that was cancelled.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def load(user):
+            async with semaphore:
+                return await cls.from_json(ctx, config, user, daily_bonus_mapping)
+
+        return await asyncio.gather(*(load(user) for user in users), return_exceptions=True)
+
+    @staticmethod
+    def _copy_sheet(sheet: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a parsed sheet so the Character built from it can't change the cached one."""
+        copied = {}
+        for (key, value) in sheet.items():
+            if isinstance(value, Backpack):
+                value = value.copy()
+            elif isinstance(value, Item):
+                value = copy(value)
+            elif isinstance(value, (dict, list)):
+                value = deepcopy(value)
+            copied[key] = value
+        return copied
+
+    @classmethod
+    async def _parse_sheet(cls, ctx: commands.Context, config: Config, data: dict) -> Dict[str, Any]:
+        """Turn a raw config sheet into the keyword arguments for a Character, minus the user and balance."""
         equipment = {k: Item.from_json(ctx, v) if v else None for k, v in data["items"].items() if k != "backpack"}
         if "int" not in data["skill"]:
             data["skill"]["int"] = 0
@@ -1321,12 +1640,12 @@ class Character:
             heroclass = data["heroclass"]
         if "backpack" not in data:
             # helps move old data to new format
-            backpack = {}
+            backpack = Backpack(ctx)
             for (n, i) in data["items"]["backpack"].items():
                 item = Item.from_json(ctx, {n: i})
                 backpack[item.name] = item
         else:
-            backpack = {n: Item.from_json(ctx, {n: i}) for n, i in data["backpack"].items()}
+            backpack = Backpack(ctx, data["backpack"])
         while len(data["treasure"]) < 5:
             data["treasure"].append(0)
 
@@ -1383,43 +1702,29 @@ class Character:
             "loadouts": loadouts,
             "heroclass": heroclass,
             "skill": data["skill"],
-            "bal": balance,
-            "user": user,
             "rebirths": data.pop("rebirths", 0),
-            "set_items": data.get("set_items", 0),
         }
         for (k, v) in equipment.items():
             hero_data[k] = v
         hero_data["last_skill_reset"] = data.get("last_skill_reset", 0)
         hero_data["last_known_currency"] = data.get("last_known_currency", 0)
         hero_data["last_currency_check"] = data.get("last_currency_check", 0)
-        return cls(**hero_data, ctx=ctx, daily_bonus_mapping=daily_bonus_mapping)
+        return hero_data
+
+    @property
+    def set_items(self) -> int:
+        """Set pieces equipped and in the backpack, as shown on the leaderboard.
+
+        Kept up to date by the equipment slots and the backpack, so neither is walked
+        when the sheet is loaded or saved.
+        """
+        return self.get_set_item_count()
 
     def get_set_item_count(self):
-        count_set = 0
-        last_slot = ""
-        for slots in ORDER:
-            if slots == "two handed":
-                continue
-            if last_slot == "two handed":
-                last_slot = slots
-                continue
-            item = getattr(self, slots)
-            if item is None:
-                continue
-            if item.rarity in ["set"]:
-                count_set += 1
-        for (k, v) in self.backpack.items():
-            for (n, i) in v.to_json().items():
-                if i.get("rarity", False) in ["set"]:
-                    count_set += v.owned
-        return count_set
+        return self._equipped_sets + self.backpack.set_pieces
 
     async def to_json(self, ctx: commands.Context, config: Config) -> dict:
-        backpack = {}
-        for (k, v) in self.backpack.items():
-            for (n, i) in v.to_json().items():
-                backpack[n] = i
+        backpack = self.backpack.to_json()
 
         if self.heroclass["name"] == "Ranger" and self.heroclass.get("pet"):
             theme = await config.theme()
@@ -1559,22 +1864,6 @@ class Character:
         self.pieces_to_keep = items_to_keep
 
 
-async def calculate_sp(lvl_end: int, c: Character):
-    points = c.rebirths * 10
-    async for _loop_counter in AsyncIter(range(lvl_end), steps=100):
-        if lvl_end >= 300:
-            points += 1
-        elif lvl_end >= 200:
-            points += 5
-        elif lvl_end >= 100:
-            points += 1
-        elif lvl_end >= 0:
-            points += 0.5
-        lvl_end -= 1
-
-    return int(points)
-
-
 def has_funds_check(cost):
     async def predicate(ctx):
         if not await bank.can_spend(ctx.author, cost):
@@ -1595,7 +1884,6 @@ async def has_funds(user, cost):
 
 def get_place_holder(ctx, slot_name) -> Item:
     return Item(
-        ctx=ctx,
         name="Empty Slot",
         slot=[slot_name] if slot_name != "two handed" else ["left", "right"],
         rarity="N/A",
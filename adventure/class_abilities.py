@@ -20,7 +20,7 @@ from .charsheet import Character, Item
 from .constants import ORDER
 from .converters import ItemConverter
 from .helpers import escape, is_dev, smart_embed
-from .menus import BaseMenu, SimpleSource
+from .menus import BaseMenu, TableSource
 
 _ = Translator("Adventure", __file__)
 
@@ -249,7 +249,7 @@ class ClassAbilities(AdventureMixin):
                                 for item in tinker_wep:
                                     del c.backpack[item.name]
                                 if c.heroclass["name"] == "Tinkerer":
-                                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                                    await self._character_store.save(ctx, ctx.author, c)
                                     if tinker_wep:
                                         await class_msg.edit(
                                             content=box(
@@ -265,7 +265,7 @@ class ClassAbilities(AdventureMixin):
                                     c.heroclass["pet"] = {}
                                     c.heroclass = classes[clz]
 
-                                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                                    await self._character_store.save(ctx, ctx.author, c)
                                     await self._clear_react(class_msg)
                                     await class_msg.edit(
                                         content=box(
@@ -316,7 +316,8 @@ class ClassAbilities(AdventureMixin):
                             )
                         elif c.heroclass["name"] == "Psychic":
                             c.heroclass["cooldown"] = max(300, (900 - max((c.luck - c.total_cha) * 2, 0))) + time.time()
-                        await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                        await self._character_store.save(ctx, ctx.author, c)
+                        await self._character_store.flush(ctx.author)
                         await self._clear_react(class_msg)
                         await class_msg.edit(content=box(now_class_msg, lang="css"))
                         try:
@@ -467,7 +468,7 @@ class ClassAbilities(AdventureMixin):
                             await user_msg.edit(content=f"{pet_msg}\n{pet_msg2}\n{pet_msg3}")
                             c.heroclass["pet"] = pet_list[pet]
                             c.heroclass["catch_cooldown"] = time.time() + cooldown_time
-                            await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                            await self._character_store.save(ctx, ctx.author, c)
                         elif roll == 1:
                             bonus = _("But they stepped on a twig and scared it away.")
                             pet_msg3 = box(
@@ -519,7 +520,7 @@ class ClassAbilities(AdventureMixin):
             if c.heroclass["cooldown"] <= time.time():
                 await self._open_chest(ctx, c.heroclass["pet"]["name"], "pet", character=c)
                 c.heroclass["cooldown"] = time.time() + cooldown_time
-                await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                await self._character_store.save(ctx, ctx.author, c)
             else:
                 cooldown_time = c.heroclass["cooldown"] - time.time()
                 return await smart_embed(
@@ -547,7 +548,7 @@ class ClassAbilities(AdventureMixin):
                 )
             if c.heroclass["pet"]:
                 c.heroclass["pet"] = {}
-                await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                await self._character_store.save(ctx, ctx.author, c)
                 return await smart_embed(
                     ctx,
                     _("**{}** released their pet into the wild..").format(escape(ctx.author.display_name)),
@@ -585,7 +586,7 @@ class ClassAbilities(AdventureMixin):
                 if c.heroclass["cooldown"] <= time.time():
                     c.heroclass["ability"] = True
                     c.heroclass["cooldown"] = time.time() + cooldown_time
-                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, c)
 
                     await smart_embed(
                         ctx,
@@ -655,7 +656,7 @@ class ClassAbilities(AdventureMixin):
                 c.heroclass["ability"] = True
                 c.heroclass["cooldown"] = time.time()
                 async with self.get_lock(c.user):
-                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, c)
                     if good:
                         await smart_embed(
                             ctx,
@@ -830,7 +831,7 @@ class ClassAbilities(AdventureMixin):
                 if c.heroclass["cooldown"] <= time.time():
                     c.heroclass["ability"] = True
                     c.heroclass["cooldown"] = time.time() + cooldown_time
-                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, c)
                     await smart_embed(
                         ctx,
                         _("{skill} **{c}** is starting to froth at the mouth... {skill}").format(
@@ -882,7 +883,7 @@ class ClassAbilities(AdventureMixin):
                     c.heroclass["ability"] = True
                     c.heroclass["cooldown"] = time.time() + cooldown_time
 
-                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, c)
                     await smart_embed(
                         ctx,
                         _("{skill} **{c}** is focusing all of their energy... {skill}").format(
@@ -932,7 +933,7 @@ class ClassAbilities(AdventureMixin):
                 if c.heroclass["cooldown"] <= time.time():
                     c.heroclass["ability"] = True
                     c.heroclass["cooldown"] = time.time() + cooldown_time
-                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, c)
                     await smart_embed(
                         ctx,
                         _("{skill} **{c}** is whipping up a performance... {skill}").format(
@@ -993,7 +994,9 @@ class ClassAbilities(AdventureMixin):
                     ignored_rarities.append("ascended")
                     ascended_forge_msg += _("\n\nAscended items will be forgeable after 30 rebirths.")
                 consumed = []
-                forgeables_items = [str(i) for n, i in c.backpack.items() if i.rarity not in ignored_rarities]
+                forgeables_items = {
+                    c.backpack.display_of(n) for n in c.backpack.select(exclude_rarities=ignored_rarities)
+                }
                 if len(forgeables_items) <= 1:
                     return await smart_embed(
                         ctx,
@@ -1010,7 +1013,7 @@ class ClassAbilities(AdventureMixin):
                         ),
                     )
                 await BaseMenu(
-                    source=SimpleSource(pages),
+                    source=TableSource(pages),
                     delete_message_after=True,
                     clear_reactions_after=True,
                     timeout=180,
@@ -1126,7 +1129,7 @@ class ClassAbilities(AdventureMixin):
                     c.backpack[x.name].owned -= 1
                     if c.backpack[x.name].owned <= 0:
                         del c.backpack[x.name]
-                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, c)
                 # save so the items are eaten up already
                 for item in c.get_current_equipment():
                     if item.rarity == "forged":
@@ -1164,10 +1167,10 @@ class ClassAbilities(AdventureMixin):
                             del c.backpack[item.name]
                         await ctx.send(created_item)
                         c.backpack[newitem.name] = newitem
-                        await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                        await self._character_store.save(ctx, ctx.author, c)
                     else:
                         c.heroclass["cooldown"] = time.time() + cooldown_time
-                        await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                        await self._character_store.save(ctx, ctx.author, c)
                         mad_forge = box(
                             _("{author}, {newitem} got mad at your rejection and blew itself up.").format(
                                 author=escape(ctx.author.display_name), newitem=newitem
@@ -1178,7 +1181,7 @@ class ClassAbilities(AdventureMixin):
                 else:
                     c.heroclass["cooldown"] = time.time() + cooldown_time
                     c.backpack[newitem.name] = newitem
-                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, c)
                     forged_item = box(
                         _("{author}, your new {newitem} is lurking in your backpack.").format(
                             author=escape(ctx.author.display_name), newitem=newitem
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+import random
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Parties at least this big are resolved with NumPy when it is installed, smaller ones
+# are quicker to resolve one member at a time.
+VECTORIZE_THRESHOLD = 100
+
+# The class that gets a bonus on every roll of each action, and the multiplier on its rebirths.
+ACTION_CLASSES = {"fight": "Berserker", "magic": "Wizard", "talk": "Bard"}
+_CLASS_REBIRTHS = 3
+_RESCUE_MULTIPLIERS = (0.2, 0.3, 0.4, 0.5)
+
+
+class Combatant(NamedTuple):
+    """The stats of one participant the rolls depend on."""
+
+    att: int
+    int: int
+    cha: int
+    dex: int
+    luck: int
+    rebirths: int
+    heroclass: str
+    ability: bool
+    pet_crit: int
+
+    @classmethod
+    def from_character(cls, c) -> "Combatant":
+        pet_crit = c.heroclass.get("pet", {}).get("bonuses", {}).get("crit", False)
+        return cls(
+            att=c.total_att,
+            int=c.total_int,
+            cha=c.total_cha,
+            dex=c.dex,
+            luck=c.luck,
+            rebirths=c.rebirths,
+            heroclass=c.heroclass["name"],
+            ability=bool(c.heroclass["ability"]),
+            pet_crit=pet_crit or 0,
+        )
+
+
+class Roll(NamedTuple):
+    """How one fight, magic or talk roll went.
+
+    `fumbled` rolls that were `rescued` by the class ability still add `value`, with
+    `bonus` taken off the roll. `boosted` rolls are crits or class rolls, with `bonus`
+    being the base bonus and `crit_bonus` the crit bonus.
+    """
+
+    roll: int
+    fumbled: bool
+    crit: bool
+    rescued: bool
+    boosted: bool
+    bonus: int
+    crit_bonus: int
+    value: int
+
+
+class Prayer(NamedTuple):
+    """How one prayer went, with what it adds to each action total."""
+
+    roll: int
+    fumbled: bool
+    attack: float
+    talk: float
+    magic: float
+
+
+def _crit_term(kind: str, c: Combatant) -> int:
+    if kind == "fight":
+        return c.att // 20
+    if kind == "talk":
+        return c.int // 50 + c.cha // 20
+    return c.int // 20
+
+
+def _roll_range(crit_mod: int, rebirths: int) -> Tuple[int, int]:
+    max_roll = 100 if rebirths >= 30 else 50 if rebirths >= 15 else 20
+    mod = round(crit_mod / 10) if crit_mod != 0 else 0
+    if rebirths < 15 < mod:
+        mod = 15
+        max_roll = 20
+    elif (mod + 1) > 45:
+        mod = 45
+    return 1 + mod, max_roll
+
+
+class CombatEngine:
+    """Resolves the rolls of a whole party for one action at once.
+
+    The numbers only depend on each participant's :class:`Combatant` and the monster's
+    defence, so the handlers gather those, call the engine and build their reports from
+    the results. Large parties draw every random number they could need in a few
+    vectorized NumPy calls, small parties (or any party without NumPy) go through the
+    same rules one member at a time. Both give the same distribution of results.
+
+    Pass `seed` for reproducible results.
+    """
+
+    def __init__(self, seed: Optional[int] = None, threshold: int = VECTORIZE_THRESHOLD):
+        self.random = random.Random(seed)
+        self.generator = np.random.default_rng(seed) if np is not None else None
+        self.threshold = threshold
+
+    def _vectorize(self, party: Sequence[Combatant]) -> bool:
+        return self.generator is not None and len(party) >= self.threshold
+
+    def rolls(self, kind: str, party: Sequence[Combatant], defence: float) -> List[Roll]:
+        """Resolve a ``fight``, ``magic`` or ``talk`` roll for every member of `party`."""
+        if not party:
+            return []
+        if self._vectorize(party):
+            return self._rolls_array(kind, party, defence)
+        return [self._roll(kind, c, defence) for c in party]
+
+    def prayers(self, party: Sequence[Combatant], fighters: int, talkers: int, casters: int) -> List[Prayer]:
+        """Resolve a prayer for every member of `party`, given how many take each other action."""
+        if not party:
+            return []
+        if self._vectorize(party):
+            return self._prayers_array(party, fighters, talkers, casters)
+        return [self._prayer(c, fighters, talkers, casters) for c in party]
+
+    def _roll(self, kind: str, c: Combatant, defence: float) -> Roll:
+        randint = self.random.randint
+        low, max_roll = _roll_range(max(max(c.dex, c.luck // 2) + _crit_term(kind, c), 0), c.rebirths)
+        roll = max(randint(low, max_roll), 1)
+        if kind != "talk" and c.pet_crit:
+            pet_crit = randint(c.pet_crit, 100)
+            if pet_crit == 100:
+                roll = max_roll
+            elif roll <= 25 and pet_crit >= 95:
+                roll = randint(max_roll - 5, max_roll)
+            elif roll > 25 and pet_crit >= 95:
+                roll = randint(roll, max_roll)
+        roll_perc = roll / max_roll
+        stat = c.att if kind == "fight" else c.int if kind == "magic" else c.cha
+        is_class = c.heroclass == ACTION_CLASSES[kind]
+        rebirths = c.rebirths * (_CLASS_REBIRTHS if is_class else 1)
+        fumbled = roll_perc < 0.10
+        crit = not fumbled and roll_perc > 0.95
+        bonus = crit_bonus = value = 0
+        rescued = boosted = False
+        if fumbled:
+            if is_class and c.ability:
+                rescued = True
+                if kind == "talk":
+                    bonus = randint(5, 15)
+                    value = int((roll - bonus + stat + rebirths) / defence)
+                else:
+                    bonus_roll = randint(5, 15)
+                    bonus_multi = self.random.choice(_RESCUE_MULTIPLIERS)
+                    bonus = max(bonus_roll, int((roll + stat + rebirths) * bonus_multi))
+                    value = int((roll - bonus + stat) / defence)
+        elif crit or is_class:
+            boosted = True
+            bonus = randint(5, 10) + rebirths
+            if crit:
+                crit_bonus = randint(5, 20) + (rebirths * 2)
+            if is_class and c.ability:
+                bonus = (randint(1, 10) + 5) * (rebirths // 2)
+            value = int((roll + bonus + crit_bonus + stat) / defence)
+        elif kind == "fight":
+            value = int((roll + stat) / defence) + rebirths
+        elif kind == "magic":
+            value = int((roll + stat) / defence) + c.rebirths // 5
+        else:
+            value = int((roll + stat + c.rebirths // 5) / defence)
+        return Roll(roll, fumbled, crit, rescued, boosted, bonus, crit_bonus, value)
+
+    def _rolls_array(self, kind: str, party: Sequence[Combatant], defence: float) -> List[Roll]:
+        rng = self.generator
+        size = len(party)
+        stats = np.array([c[:6] for c in party], dtype=np.int64).T
+        att, int_, cha, dex, luck, base_rebirths = stats
+        if kind == "fight":
+            crit_term, stat = att // 20, att
+        elif kind == "magic":
+            crit_term, stat = int_ // 20, int_
+        else:
+            crit_term, stat = int_ // 50 + cha // 20, cha
+        is_class = np.array([c.heroclass == ACTION_CLASSES[kind] for c in party])
+        ability = is_class & np.array([c.ability for c in party])
+
+        crit_mod = np.maximum(np.maximum(dex, luck // 2) + crit_term, 0)
+        max_roll = np.where(base_rebirths >= 30, 100, np.where(base_rebirths >= 15, 50, 20))
+        # numpy and round() both round halves to even.
+        mod = np.round(crit_mod / 10).astype(np.int64)
+        capped = (base_rebirths < 15) & (mod > 15)
+        mod = np.where(capped, 15, np.where(mod + 1 > 45, 45, mod))
+        max_roll = np.where(capped, 20, max_roll)
+        roll = np.maximum(rng.integers(1 + mod, max_roll + 1), 1)
+        if kind != "talk":
+            pet_crit = np.array([c.pet_crit for c in party], dtype=np.int64)
+            has_pet = pet_crit != 0
+            pet_roll = rng.integers(np.where(has_pet, pet_crit, 0), 101)
+            reroll = rng.integers(np.where(roll <= 25, max_roll - 5, roll), max_roll + 1)
+            roll = np.where(has_pet & (pet_roll == 100), max_roll, np.where(has_pet & (pet_roll >= 95), reroll, roll))
+        roll_perc = roll / max_roll
+        rebirths = base_rebirths * np.where(is_class, _CLASS_REBIRTHS, 1)
+
+        fumbled = roll_perc < 0.10
+        crit = ~fumbled & (roll_perc > 0.95)
+        rescued = fumbled & ability
+        boosted = ~fumbled & (crit | is_class)
+
+        if kind == "talk":
+            rescue_bonus = rng.integers(5, 16, size)
+            rescue_value = ((roll - rescue_bonus + stat + rebirths) / defence).astype(np.int64)
+        else:
+            bonus_multi = rng.choice(_RESCUE_MULTIPLIERS, size)
+            rescue_bonus = np.maximum(
+                rng.integers(5, 16, size), ((roll + stat + rebirths) * bonus_multi).astype(np.int64)
+            )
+            rescue_value = ((roll - rescue_bonus + stat) / defence).astype(np.int64)
+        base_bonus = np.where(
+            ability, (rng.integers(1, 11, size) + 5) * (rebirths // 2), rng.integers(5, 11, size) + rebirths
+        )
+        crit_bonus = np.where(crit, rng.integers(5, 21, size) + rebirths * 2, 0)
+        boosted_value = ((roll + base_bonus + crit_bonus + stat) / defence).astype(np.int64)
+        # astype() truncates towards zero, like int().
+        if kind == "fight":
+            plain_value = ((roll + stat) / defence).astype(np.int64) + rebirths
+        elif kind == "magic":
+            plain_value = ((roll + stat) / defence).astype(np.int64) + base_rebirths // 5
+        else:
+            plain_value = ((roll + stat + base_rebirths // 5) / defence).astype(np.int64)
+        bonus = np.where(rescued, rescue_bonus, np.where(boosted, base_bonus, 0))
+        value = np.where(rescued, rescue_value, np.where(boosted, boosted_value, np.where(fumbled, 0, plain_value)))
+        return [
+            Roll(*row)
+            for row in zip(
+                roll.tolist(),
+                fumbled.tolist(),
+                crit.tolist(),
+                rescued.tolist(),
+                boosted.tolist(),
+                bonus.tolist(),
+                crit_bonus.tolist(),
+                value.tolist(),
+            )
+        ]
+
+    def _prayer(self, c: Combatant, fighters: int, talkers: int, casters: int) -> Prayer:
+        if c.heroclass != "Cleric":
+            roll = self.random.randint(1, 10)
+            if not (fighters or talkers or casters):
+                return Prayer(roll, False, 0, 0, 0)
+            if roll != 5:
+                return Prayer(roll, True, 0, 0, 0)
+            buff = c.rebirths // 15
+            return Prayer(
+                roll,
+                False,
+                10 * (fighters + buff) if fighters else 0,
+                10 * (talkers + buff) if talkers else 0,
+                10 * (casters + buff) if casters else 0,
+            )
+        rebirths = c.rebirths * 2
+        low, max_roll = _roll_range(max(max(c.dex, c.luck // 2) + (c.int // 20), 0), c.rebirths)
+        roll = max(self.random.randint(low, max_roll), 1)
+        if roll / max_roll < 0.15:
+            scale = max(rebirths * 0.01, 1.5)
+            # The penalty is taken off each total, and it is negative itself.
+            return Prayer(
+                roll, True, *(-((5 * n) - ((5 * n) * scale)) if n else 0 for n in (fighters, talkers, casters))
+            )
+        mod = roll if c.ability else roll // 3
+        scale = max(rebirths * 0.05, 1.5)
+        return Prayer(
+            roll, False, *(int((mod * n) + ((mod * n) * scale)) if n else 0 for n in (fighters, talkers, casters))
+        )
+
+    def _prayers_array(self, party: Sequence[Combatant], fighters: int, talkers: int, casters: int) -> List[Prayer]:
+        rng = self.generator
+        size = len(party)
+        stats = np.array([c[:6] for c in party], dtype=np.int64).T
+        int_, dex, luck, base_rebirths = stats[1], stats[3], stats[4], stats[5]
+        cleric = np.array([c.heroclass == "Cleric" for c in party])
+        ability = np.array([c.ability for c in party])
+        rebirths = base_rebirths * 2
+
+        crit_mod = np.maximum(np.maximum(dex, luck // 2) + int_ // 20, 0)
+        max_roll = np.where(base_rebirths >= 30, 100, np.where(base_rebirths >= 15, 50, 20))
+        mod = np.round(crit_mod / 10).astype(np.int64)
+        capped = (base_rebirths < 15) & (mod > 15)
+        mod = np.where(capped, 15, np.where(mod + 1 > 45, 45, mod))
+        max_roll = np.where(capped, 20, max_roll)
+        cleric_roll = np.maximum(rng.integers(1 + mod, max_roll + 1), 1)
+        offended = cleric_roll / max_roll < 0.15
+        bless_mod = np.where(ability, cleric_roll, cleric_roll // 3)
+        penalty_scale = np.maximum(rebirths * 0.01, 1.5)
+        bless_scale = np.maximum(rebirths * 0.05, 1.5)
+
+        prayer_roll = rng.integers(1, 11, size)
+        nobody = not (fighters or talkers or casters)
+        answered = prayer_roll == 5
+        buff = base_rebirths // 15
+
+        totals = []
+        for n in (fighters, talkers, casters):
+            if not n:
+                totals.append([0] * size)
+                continue
+            penalty = -((5 * n) - ((5 * n) * penalty_scale))
+            blessing = ((bless_mod * n) + ((bless_mod * n) * bless_scale)).astype(np.int64)
+            prayer = np.where(answered, 10 * (n + buff), 0)
+            # Penalties stay floats, everything else is a whole number.
+            totals.append(
+                [
+                    (p if o else int(b)) if c else int(r)
+                    for (c, o, p, b, r) in zip(
+                        cleric.tolist(), offended.tolist(), penalty.tolist(), blessing.tolist(), prayer.tolist()
+                    )
+                ]
+            )
+        roll = np.where(cleric, cleric_roll, prayer_roll)
+        fumbled = np.where(cleric, offended, ~answered & (not nobody))
+        return [Prayer(*row) for row in zip(roll.tolist(), fumbled.tolist(), *totals)]
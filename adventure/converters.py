@@ -3,12 +3,13 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import functools
 import logging
 import re
 import shlex
 from collections import defaultdict
 from datetime import timedelta
-from typing import Any, Dict, List, Mapping, MutableMapping, Optional, Tuple, Union
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, MutableMapping, Optional, Tuple, Union
 
 from discord.ext.commands.converter import Converter
 from discord.ext.commands.errors import BadArgument
@@ -19,7 +20,8 @@ from redbot.core.utils.chat_formatting import box
 from redbot.core.utils.menus import start_adding_reactions
 from redbot.core.utils.predicates import ReactionPredicate
 
-from .charsheet import Character, Item
+from .backpack_filter import BackpackFilter
+from .charsheet import SET_BONUS_TIERS, Character, Item
 from .constants import ORDER, RARITIES
 
 log = logging.getLogger("red.cogs.adventure")
@@ -40,7 +42,6 @@ REBIRTHSTATMULT = 2
 
 REBIRTH_LVL = 20
 REBIRTH_STEP = 10
-SET_BONUSES = {}
 
 TR_GEAR_SET = {}
 PETS = {}
@@ -145,6 +146,30 @@ class Stats(Converter):
         return result
 
 
+async def choose_item(ctx: commands.Context, c: Character, argument: str, keys: Iterable[str]) -> Item:
+    """Ask the author which of several backpack items matching `argument` they meant."""
+    lookup = [c.backpack[x] for x in c.backpack.rank(keys, argument)]
+    if len(lookup) > 10:
+        raise BadArgument(
+            _("You have too many items matching the name `{}`, please be more specific.").format(argument)
+        )
+    items = ""
+    for (number, item) in enumerate(lookup):
+        items += f"{number}. {str(item)} (owned {item.owned})\n"
+
+    msg = await ctx.send(
+        _("Multiple items share that name, which one would you like?\n{items}").format(items=box(items, lang="css"))
+    )
+    emojis = ReactionPredicate.NUMBER_EMOJIS[: len(lookup)]
+    start_adding_reactions(msg, emojis)
+    pred = ReactionPredicate.with_emojis(emojis, msg, user=ctx.author)
+    try:
+        await ctx.bot.wait_for("reaction_add", check=pred, timeout=30)
+    except asyncio.TimeoutError:
+        raise BadArgument(_("Alright then."))
+    return lookup[pred.result]
+
+
 class ItemsConverter(Converter):
     async def convert(self, ctx, argument) -> Tuple[str, List[Item]]:
         try:
@@ -165,58 +190,26 @@ class ItemsConverter(Converter):
         if argument.lower() == "all":
             rarity = True
 
-        if rarity is None:
-            no_markdown = Item.remove_markdowns(argument)
-            lookup = list(i for x, i in c.backpack.items() if no_markdown.lower() in x.lower())
-            lookup_m = list(i for x, i in c.backpack.items() if argument.lower() == str(i).lower() and str(i))
-            lookup_e = list(i for x, i in c.backpack.items() if argument == str(i))
-            _temp_items = set()
-            for i in lookup:
-                _temp_items.add(str(i))
-            for i in lookup_m:
-                _temp_items.add(str(i))
-            for i in lookup_e:
-                _temp_items.add(str(i))
-        elif rarity is True:
+        if rarity is True:
             lookup = list(i for x, i in c.backpack.items())
             return "all", lookup
-        else:
-            lookup = list(i for x, i in c.backpack.items() if i.rarity == rarity)
+        elif rarity is not None:
+            lookup = [c.backpack[x] for x in c.backpack.select(rarities=(rarity,))]
             if lookup:
                 return "all", lookup
             raise BadArgument(_("You don't own any `{}` items.").format(argument))
 
-        if len(lookup_e) == 1:
-            return "single", [lookup_e[0]]
-        if len(lookup) == 1:
-            return "single", [lookup[0]]
-        elif len(lookup_m) == 1:
-            return "single", [lookup_m[0]]
-        elif len(lookup) == 0 and len(lookup_m) == 0:
+        matches = c.backpack.resolve(argument)
+        if len(matches.exact) == 1:
+            return "single", [c.backpack[matches.exact[0]]]
+        if len(matches.partial) == 1:
+            return "single", [c.backpack[matches.partial[0]]]
+        elif len(matches.folded) == 1:
+            return "single", [c.backpack[matches.folded[0]]]
+        elif len(matches.partial) == 0 and len(matches.folded) == 0:
             raise BadArgument(_("`{}` doesn't seem to match any items you own.").format(argument))
         else:
-            lookup = list(i for x, i in c.backpack.items() if str(i) in _temp_items)
-            if len(lookup) > 10:
-                raise BadArgument(
-                    _("You have too many items matching the name `{}`, please be more specific.").format(argument)
-                )
-            items = ""
-            for (number, item) in enumerate(lookup):
-                items += f"{number}. {str(item)} (owned {item.owned})\n"
-
-            msg = await ctx.send(
-                _("Multiple items share that name, which one would you like?\n{items}").format(
-                    items=box(items, lang="css")
-                )
-            )
-            emojis = ReactionPredicate.NUMBER_EMOJIS[: len(lookup)]
-            start_adding_reactions(msg, emojis)
-            pred = ReactionPredicate.with_emojis(emojis, msg, user=ctx.author)
-            try:
-                await ctx.bot.wait_for("reaction_add", check=pred, timeout=30)
-            except asyncio.TimeoutError:
-                raise BadArgument(_("Alright then."))
-            return "single", [lookup[pred.result]]
+            return "single", [await choose_item(ctx, c, argument, {*matches.exact, *matches.folded, *matches.partial})]
 
 
 class ItemConverter(Converter):
@@ -231,50 +224,17 @@ class ItemConverter(Converter):
         except Exception as exc:
             log.exception("Error with the new character sheet", exc_info=exc)
             raise BadArgument
-        no_markdown = Item.remove_markdowns(argument)
-        lookup = list(i for x, i in c.backpack.items() if no_markdown.lower() in x.lower())
-        lookup_m = list(i for x, i in c.backpack.items() if argument.lower() == str(i).lower() and str(i))
-        lookup_e = list(i for x, i in c.backpack.items() if argument == str(i))
-
-        _temp_items = set()
-        for i in lookup:
-            _temp_items.add(str(i))
-        for i in lookup_m:
-            _temp_items.add(str(i))
-        for i in lookup_e:
-            _temp_items.add(str(i))
-
-        if len(lookup_e) == 1:
-            return lookup_e[0]
-        if len(lookup) == 1:
-            return lookup[0]
-        elif len(lookup_m) == 1:
-            return lookup_m[0]
-        elif len(lookup) == 0 and len(lookup_m) == 0:
+        matches = c.backpack.resolve(argument)
+        if len(matches.exact) == 1:
+            return c.backpack[matches.exact[0]]
+        if len(matches.partial) == 1:
+            return c.backpack[matches.partial[0]]
+        elif len(matches.folded) == 1:
+            return c.backpack[matches.folded[0]]
+        elif len(matches.partial) == 0 and len(matches.folded) == 0:
             raise BadArgument(_("`{}` doesn't seem to match any items you own.").format(argument))
         else:
-            lookup = list(i for x, i in c.backpack.items() if str(i) in _temp_items)
-            if len(lookup) > 10:
-                raise BadArgument(
-                    _("You have too many items matching the name `{}`, please be more specific.").format(argument)
-                )
-            items = ""
-            for (number, item) in enumerate(lookup):
-                items += f"{number}. {str(item)} (owned {item.owned})\n"
-
-            msg = await ctx.send(
-                _("Multiple items share that name, which one would you like?\n{items}").format(
-                    items=box(items, lang="css")
-                )
-            )
-            emojis = ReactionPredicate.NUMBER_EMOJIS[: len(lookup)]
-            start_adding_reactions(msg, emojis)
-            pred = ReactionPredicate.with_emojis(emojis, msg, user=ctx.author)
-            try:
-                await ctx.bot.wait_for("reaction_add", check=pred, timeout=30)
-            except asyncio.TimeoutError:
-                raise BadArgument(_("Alright then."))
-            return lookup[pred.result]
+            return await choose_item(ctx, c, argument, {*matches.exact, *matches.folded, *matches.partial})
 
 
 class EquipableItemConverter(Converter):
@@ -296,64 +256,24 @@ class EquipableItemConverter(Converter):
             item = getattr(c, slots, None)
             if item:
                 equipped_items.add(str(item))
-        no_markdown = Item.remove_markdowns(argument)
-        lookup = list(
-            i for x, i in c.backpack.items() if no_markdown.lower() in x.lower() and str(i) not in equipped_items
-        )
-        lookup_m = list(
-            i for x, i in c.backpack.items() if argument.lower() == str(i).lower() and str(i) not in equipped_items
-        )
-        lookup_e = list(i for x, i in c.backpack.items() if argument == str(i) and str(i) not in equipped_items)
-
-        already_lookup = list(
-            i for x, i in c.backpack.items() if no_markdown.lower() in x.lower() and str(i) in equipped_items
-        )
-        already_lookup_m = list(
-            i for x, i in c.backpack.items() if argument.lower() == str(i).lower() and str(i) in equipped_items
+        matches = c.backpack.resolve(argument)
+        lookup, lookup_m, lookup_e = (
+            [x for x in keys if c.backpack.display_of(x) not in equipped_items]
+            for keys in (matches.partial, matches.folded, matches.exact)
         )
-        already_lookup_e = list(i for x, i in c.backpack.items() if argument == str(i) and str(i) in equipped_items)
-
-        _temp_items = set()
-        for i in lookup:
-            _temp_items.add(str(i))
-        for i in lookup_m:
-            _temp_items.add(str(i))
-        for i in lookup_e:
-            _temp_items.add(str(i))
 
         if len(lookup_e) == 1:
-            return lookup_e[0]
+            return c.backpack[lookup_e[0]]
         if len(lookup) == 1:
-            return lookup[0]
+            return c.backpack[lookup[0]]
         elif len(lookup_m) == 1:
-            return lookup_m[0]
+            return c.backpack[lookup_m[0]]
         elif len(lookup) == 0 and len(lookup_m) == 0:
-            if any(x for x in [already_lookup, already_lookup_m, already_lookup_e]):
+            if matches.partial or matches.folded or matches.exact:
                 raise BadArgument(_("`{}` matches the name of an item already equipped.").format(argument))
             raise BadArgument(_("`{}` doesn't seem to match any items you own.").format(argument))
         else:
-            lookup = list(i for x, i in c.backpack.items() if str(i) in _temp_items)
-            if len(lookup) > 10:
-                raise BadArgument(
-                    _("You have too many items matching the name `{}`, please be more specific.").format(argument)
-                )
-            items = ""
-            for (number, item) in enumerate(lookup):
-                items += f"{number}. {str(item)} (owned {item.owned})\n"
-
-            msg = await ctx.send(
-                _("Multiple items share that name, which one would you like?\n{items}").format(
-                    items=box(items, lang="css")
-                )
-            )
-            emojis = ReactionPredicate.NUMBER_EMOJIS[: len(lookup)]
-            start_adding_reactions(msg, emojis)
-            pred = ReactionPredicate.with_emojis(emojis, msg, user=ctx.author)
-            try:
-                await ctx.bot.wait_for("reaction_add", check=pred, timeout=30)
-            except asyncio.TimeoutError:
-                raise BadArgument(_("Alright then."))
-            return lookup[pred.result]
+            return await choose_item(ctx, c, argument, {*lookup, *lookup_m, *lookup_e})
 
 
 class EquipmentConverter(Converter):
@@ -566,88 +486,98 @@ class NoExitParser(argparse.ArgumentParser):
         raise commands.BadArgument(message=message)
 
 
-class BackpackFilterParser(commands.Converter):
-    async def convert(self, ctx: commands.Context, argument: str) -> Mapping[str, Any]:
-        argument = argument.replace("—", "--")
-        command, *arguments = argument.split(" -- ")
-        if arguments:
-            argument = " -- ".join(arguments)
-        else:
-            command = ""
-        response = {}
-        set_names = set(SET_BONUSES.keys())
-        parser = NoExitParser(description="Backpack Filter Parsing.", add_help=False)
-        parser.add_argument("--str", dest="strength", nargs="+")
-        parser.add_argument("--strength", dest="strength", nargs="+")
+@functools.lru_cache(maxsize=None)
+def _backpack_filter_parser(set_names: FrozenSet[str], with_command: bool) -> NoExitParser:
+    parser = NoExitParser(description="Backpack Filter Parsing.", add_help=False)
+    parser.add_argument("--str", dest="strength", nargs="+")
+    parser.add_argument("--strength", dest="strength", nargs="+")
 
-        parser.add_argument("--intelligence", dest="intelligence", nargs="+")
-        parser.add_argument("--int", dest="intelligence", nargs="+")
+    parser.add_argument("--intelligence", dest="intelligence", nargs="+")
+    parser.add_argument("--int", dest="intelligence", nargs="+")
 
-        parser.add_argument("--cha", dest="charisma", nargs="+")
-        parser.add_argument("--charisma", dest="charisma", nargs="+")
+    parser.add_argument("--cha", dest="charisma", nargs="+")
+    parser.add_argument("--charisma", dest="charisma", nargs="+")
 
-        parser.add_argument("--luc", dest="luck", nargs="+")
-        parser.add_argument("--luck", dest="luck", nargs="+")
+    parser.add_argument("--luc", dest="luck", nargs="+")
+    parser.add_argument("--luck", dest="luck", nargs="+")
 
-        parser.add_argument("--dex", dest="dexterity", nargs="+")
-        parser.add_argument("--dexterity", dest="dexterity", nargs="+")
+    parser.add_argument("--dex", dest="dexterity", nargs="+")
+    parser.add_argument("--dexterity", dest="dexterity", nargs="+")
 
-        parser.add_argument("--lvl", dest="level", nargs="+")
-        parser.add_argument("--level", dest="level", nargs="+")
+    parser.add_argument("--lvl", dest="level", nargs="+")
+    parser.add_argument("--level", dest="level", nargs="+")
 
-        parser.add_argument("--deg", dest="degrade", nargs="+")
-        parser.add_argument("--degrade", dest="degrade", nargs="+")
+    parser.add_argument("--deg", dest="degrade", nargs="+")
+    parser.add_argument("--degrade", dest="degrade", nargs="+")
 
-        parser.add_argument("--slot", nargs="*", dest="slot", default=ORDER, choices=ORDER)
+    parser.add_argument("--slot", nargs="*", dest="slot", default=ORDER, choices=ORDER)
 
-        parser.add_argument("--rarity", nargs="*", dest="rarity", default=RARITIES, choices=RARITIES)
+    parser.add_argument("--rarity", nargs="*", dest="rarity", default=RARITIES, choices=RARITIES)
 
-        parser.add_argument("--set", nargs="*", dest="set", choices=set_names, default=[])
+    parser.add_argument("--set", nargs="*", dest="set", choices=set_names, default=[])
 
-        parser.add_argument("--equip", dest="equippable", action="store_true", default=False)
-        parser.add_argument("--equippable", dest="equippable", action="store_true", default=False)
+    parser.add_argument("--equip", dest="equippable", action="store_true", default=False)
+    parser.add_argument("--equippable", dest="equippable", action="store_true", default=False)
 
-        parser.add_argument("--delta", dest="delta", action="store_true", default=False)
-        parser.add_argument("--diff", dest="delta", action="store_true", default=False)
-        parser.add_argument("--icase", dest="icase", action="store_true", default=False)
-        parser.add_argument("--except", dest="except", action="store_true", default=False)
+    parser.add_argument("--delta", dest="delta", action="store_true", default=False)
+    parser.add_argument("--diff", dest="delta", action="store_true", default=False)
+    parser.add_argument("--icase", dest="icase", action="store_true", default=False)
+    parser.add_argument("--except", dest="except", action="store_true", default=False)
 
-        parser.add_argument("--match", nargs="*", dest="match", default=[])
-        parser.add_argument("--no-match", nargs="*", dest="no_match", default=[])
+    parser.add_argument("--match", nargs="*", dest="match", default=[])
+    parser.add_argument("--no-match", nargs="*", dest="no_match", default=[])
 
-        if not command:
-            parser.add_argument("command", nargs="*")
-        try:
-            arg = shlex.split(argument, posix=True)
-            vals = vars(parser.parse_args(arg))
-        except argparse.ArgumentError as exc:
-            raise ArgParserFailure(exc.argument_name, exc.message)
-        except ValueError:
-            raise BadArgument()
-        response["delta"] = vals["delta"]
-        response["equippable"] = vals["equippable"]
-        response["set"] = vals["set"]
-        if vals["rarity"]:
-            response["rarity"] = vals["rarity"]
-        if vals["slot"]:
-            response["slot"] = vals["slot"]
-        response["icase"] = vals["icase"]
-        response["except"] = vals["except"]
-
-        if vals["match"]:
-            response["match"] = " ".join(vals["match"]).strip()
-
-        if vals["no_match"]:
-            response["no_match"] = " ".join(vals["no_match"]).strip()
-
-        response.update(process_argparse_stat(vals, "strength"))
-        response.update(process_argparse_stat(vals, "intelligence"))
-        response.update(process_argparse_stat(vals, "charisma"))
-        response.update(process_argparse_stat(vals, "luck"))
-        response.update(process_argparse_stat(vals, "dexterity"))
-        response.update(process_argparse_stat(vals, "level"))
-        response.update(process_argparse_stat(vals, "degrade"))
-        return response
+    if with_command:
+        parser.add_argument("command", nargs="*")
+    return parser
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_backpack_filter(argument: str, set_names: FrozenSet[str]) -> BackpackFilter:
+    command, *arguments = argument.split(" -- ")
+    if arguments:
+        argument = " -- ".join(arguments)
+    else:
+        command = ""
+    response = {}
+    parser = _backpack_filter_parser(set_names, not command)
+    try:
+        arg = shlex.split(argument, posix=True)
+        vals = vars(parser.parse_args(arg))
+    except argparse.ArgumentError as exc:
+        raise ArgParserFailure(exc.argument_name, exc.message)
+    except ValueError:
+        raise BadArgument()
+    response["delta"] = vals["delta"]
+    response["equippable"] = vals["equippable"]
+    response["set"] = vals["set"]
+    if vals["rarity"]:
+        response["rarity"] = vals["rarity"]
+    if vals["slot"]:
+        response["slot"] = vals["slot"]
+    response["icase"] = vals["icase"]
+    response["except"] = vals["except"]
+
+    if vals["match"]:
+        response["match"] = " ".join(vals["match"]).strip()
+
+    if vals["no_match"]:
+        response["no_match"] = " ".join(vals["no_match"]).strip()
+
+    response.update(process_argparse_stat(vals, "strength"))
+    response.update(process_argparse_stat(vals, "intelligence"))
+    response.update(process_argparse_stat(vals, "charisma"))
+    response.update(process_argparse_stat(vals, "luck"))
+    response.update(process_argparse_stat(vals, "dexterity"))
+    response.update(process_argparse_stat(vals, "level"))
+    response.update(process_argparse_stat(vals, "degrade"))
+    return BackpackFilter(response)
+
+
+class BackpackFilterParser(commands.Converter):
+    async def convert(self, ctx: commands.Context, argument: str) -> BackpackFilter:
+        argument = argument.replace("—", "--")
+        return _compile_backpack_filter(argument, frozenset(SET_BONUS_TIERS))
 
 
 def process_argparse_stat(data: Mapping, stat: str) -> Mapping:
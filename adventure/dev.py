@@ -15,6 +15,8 @@ from .charsheet import Character
 from .constants import DEV_LIST, ORDER, RARITIES
 from .helpers import escape, is_dev, smart_embed
 from .menus import BaseMenu, SimpleSource
+from .progression import xp_for_level
+from .state import approximate_size
 
 _ = Translator("Adventure", __file__)
 
@@ -93,9 +95,38 @@ class DevCommands(AdventureMixin):
                 return
             for _loop_counter in range(num):
                 await c.add_to_backpack(await self._genitem(ctx, rarity, slot))
-            await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+            await self._character_store.save(ctx, ctx.author, c)
         await ctx.invoke(self._backpack)
 
+    @commands.command()
+    @commands.is_owner()
+    async def devstate(self, ctx: commands.Context):
+        """[Dev] Show how much per-guild and per-user state the cog is holding.
+
+        Sizes are shallow estimates from `sys.getsizeof` and only go two levels deep.
+        """
+        lines = [f"{'Container':<22} {'Entries':>8} {'Expiring':>8} {'Size':>10}"]
+        for stats in self._state.stats():
+            lines.append(
+                f"{stats.name:<22} {humanize_number(stats.entries):>8} "
+                f"{humanize_number(stats.pending):>8} {stats.size / 1024:>7.1f} KiB"
+            )
+        for (name, container) in (("locks", self.locks), ("tasks", self.tasks)):
+            lines.append(
+                f"{name:<22} {humanize_number(len(container)):>8} {'-':>8} {approximate_size(container) / 1024:>7.1f} KiB"
+            )
+        lines.append(f"\n[Timers]: {humanize_number(len(self._timers))}")
+        lines.append(
+            f"[Permission cache]: {humanize_number(self._perm_cache.hits)} hits, "
+            f"{humanize_number(self._perm_cache.misses)} misses"
+        )
+        characters = self._character_store.characters
+        lines.append(
+            f"[Character cache]: {humanize_number(len(characters))}/{humanize_number(characters.maxsize)} sheets, "
+            f"{humanize_number(characters.hits)} hits, {humanize_number(characters.misses)} misses"
+        )
+        await ctx.send(box("\n".join(lines), lang="ini"))
+
     @commands.command()
     @commands.bot_has_permissions(add_reactions=True)
     @commands.is_owner()
@@ -104,8 +135,9 @@ class DevCommands(AdventureMixin):
 
         Note this overrides your current data.
         """
-        user_data = await self.config.user_from_id(user_id).all()
-        await self.config.user(ctx.author).set(user_data)
+        user_data = await self._character_store.get(discord.Object(id=user_id))
+        self._character_store.replace(ctx.author, user_data)
+        await self._character_store.flush(ctx.author)
         await ctx.tick()
 
     @commands.command()
@@ -146,7 +178,8 @@ class DevCommands(AdventureMixin):
                     withdraw = bal
                     await bank.set_balance(target, 0)
                 character_data = await c.rebirth(dev_val=rebirth_level)
-                await self.config.user(target).set(character_data)
+                self._character_store.replace(target, character_data)
+                await self._character_store.flush(target)
                 await ctx.send(
                     content=box(
                         _("{c}, congratulations on your rebirth.\nYou paid {bal}.").format(
@@ -155,7 +188,7 @@ class DevCommands(AdventureMixin):
                         lang="css",
                     )
                 )
-            await self._add_rewards(ctx, target, int((character_level) ** 3.5) + 1, 0, False)
+            await self._add_rewards(ctx, target, xp_for_level(character_level) + 1, 0, False)
         await ctx.tick()
 
     @commands.command()
@@ -177,7 +210,7 @@ class DevCommands(AdventureMixin):
                 c.heroclass["cooldown"] = 0
                 if "catch_cooldown" in c.heroclass:
                     c.heroclass["catch_cooldown"] = 0
-                await self.config.user(target).set(await c.to_json(ctx, self.config))
+                await self._character_store.save(ctx, target, c)
         await ctx.tick()
 
     @commands.command(name="adventurestats")
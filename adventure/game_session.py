@@ -1,16 +1,88 @@
+import asyncio
+import logging
+import sys
 from datetime import datetime
-from typing import List, Mapping, MutableMapping, Set, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Set, Tuple
 
 import discord
+from redbot.core import Config
 from redbot.core.commands import Context
 
+from .character_store import CharacterStore
 from .charsheet import Character
 
+log = logging.getLogger("red.cogs.adventure")
+
 # This is split into its own file for future buttons usage
 # We will have game sessions inherit discord.ui.View and then we can send a message
 # with the buttons required. For now this will sit in its own file.
 
 
+class SessionCharacters:
+    """Character sheets loaded once for an adventure and shared by every result phase.
+
+    Phases ask for a participant's sheet with :meth:`get` and call :meth:`mark_dirty`
+    after mutating it. Nothing is written back to config until :meth:`flush`.
+    """
+
+    def __init__(self, ctx: Context, config: Config, daily_bonus: Mapping[str, float], store: CharacterStore):
+        self.ctx = ctx
+        self.config = config
+        self.store = store
+        self.daily_bonus = daily_bonus
+        self._characters: Dict[int, Character] = {}
+        self._failed: Set[int] = set()
+        self._dirty: Set[int] = set()
+
+    def __contains__(self, user: discord.abc.User) -> bool:
+        return user.id in self._characters
+
+    async def get(self, user: discord.abc.User) -> Optional[Character]:
+        """Return the shared sheet for `user`, loading it from config on first use."""
+        if user.id in self._characters:
+            return self._characters[user.id]
+        if user.id in self._failed:
+            return None
+        try:
+            c = await Character.from_json(self.ctx, self.config, user, self.daily_bonus)
+        except Exception as exc:
+            log.exception("Error with the new character sheet", exc_info=exc)
+            self._failed.add(user.id)
+            return None
+        self._characters[user.id] = c
+        return c
+
+    async def load(self, users: Iterable[discord.abc.User]) -> None:
+        """Load every sheet in `users` that isn't cached yet, several at a time."""
+        missing = {u.id: u for u in users if u.id not in self._characters and u.id not in self._failed}
+        if not missing:
+            return
+        results = await Character.load_many(self.ctx, self.config, list(missing.values()), self.daily_bonus)
+        for (user_id, result) in zip(missing, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, BaseException):
+                log.exception("Error with the new character sheet", exc_info=result)
+                self._failed.add(user_id)
+            else:
+                self._characters[user_id] = result
+
+    def mark_dirty(self, user: discord.abc.User) -> None:
+        if user.id in self._characters:
+            self._dirty.add(user.id)
+
+    async def flush(self, get_lock: Callable[[discord.abc.User], asyncio.Lock]) -> None:
+        """Stage every dirty sheet in the character store once, under the user's lock."""
+        while self._dirty:
+            user_id = self._dirty.pop()
+            c = self._characters[user_id]
+            async with get_lock(c.user):
+                try:
+                    await self.store.save(self.ctx, c.user, c)
+                except Exception as exc:
+                    log.exception("Error saving character sheet for %s", user_id, exc_info=exc)
+
+
 class GameSession:
     """A class to represent and hold current game sessions per server."""
 
@@ -40,6 +112,7 @@ class GameSession:
     no_monster: bool = False
     exposed: bool = False
     finished: bool = False
+    characters: SessionCharacters
 
     def __init__(self, **kwargs):
         self.ctx: Context = kwargs.pop("ctx")
@@ -66,3 +139,91 @@ class GameSession:
         self.start_time = datetime.now()
         self.easy_mode = kwargs.get("easy_mode", False)
         self.no_monster = kwargs.get("no_monster", False)
+        self.characters: SessionCharacters = kwargs.pop("characters")
+
+
+class GameSessions(MutableMapping[int, GameSession]):
+    """The running adventures by guild id, and which of them each user has joined.
+
+    Joining and leaving go through :meth:`join` and :meth:`leave` so the index stays
+    in step with the session lists. Removing a session drops everyone who joined it.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[int, GameSession] = {}
+        # user id -> {guild id: action}
+        self._participants: Dict[int, Dict[int, str]] = {}
+        # guild id -> user ids that joined it
+        self._members: Dict[int, Set[int]] = {}
+
+    def __getitem__(self, guild_id: int) -> GameSession:
+        return self._sessions[guild_id]
+
+    def __setitem__(self, guild_id: int, session: GameSession) -> None:
+        if guild_id in self._sessions:
+            self._drop_members(guild_id)
+        self._sessions[guild_id] = session
+
+    def __delitem__(self, guild_id: int) -> None:
+        del self._sessions[guild_id]
+        self._drop_members(guild_id)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._sessions)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def copy(self) -> Dict[int, GameSession]:
+        return self._sessions.copy()
+
+    def __sizeof__(self) -> int:
+        return (
+            object.__sizeof__(self)
+            + sys.getsizeof(self._sessions)
+            + sys.getsizeof(self._participants)
+            + sum(sys.getsizeof(joined) for joined in self._participants.values())
+            + sys.getsizeof(self._members)
+            + sum(sys.getsizeof(members) for members in self._members.values())
+        )
+
+    def join(self, guild_id: int, user: discord.abc.User, action: str) -> None:
+        """Add `user` to the `action` list of the guild's session."""
+        getattr(self._sessions[guild_id], action).append(user)
+        self._participants.setdefault(user.id, {})[guild_id] = action
+        self._members.setdefault(guild_id, set()).add(user.id)
+
+    def leave(self, guild_id: int, user: discord.abc.User) -> None:
+        """Take `user` out of every action list of the guild's session."""
+        session = self._sessions.get(guild_id)
+        if session is not None:
+            for action in ("fight", "magic", "talk", "pray", "run"):
+                actions = getattr(session, action)
+                while user in actions:
+                    actions.remove(user)
+        self._forget(user.id, guild_id)
+        members = self._members.get(guild_id)
+        if members is not None:
+            members.discard(user.id)
+
+    def joined(self, user_id: int) -> Mapping[int, str]:
+        """The sessions `user_id` has joined, as {guild id: action}."""
+        return self._participants.get(user_id, {})
+
+    def is_playing(self, user_id: int, exclude: Optional[int] = None) -> bool:
+        """Whether `user_id` is in any session, optionally ignoring the guild `exclude`."""
+        joined = self._participants.get(user_id)
+        if not joined:
+            return False
+        return exclude is None or any(guild_id != exclude for guild_id in joined)
+
+    def _forget(self, user_id: int, guild_id: int) -> None:
+        joined = self._participants.get(user_id)
+        if joined is not None:
+            joined.pop(guild_id, None)
+            if not joined:
+                del self._participants[user_id]
+
+    def _drop_members(self, guild_id: int) -> None:
+        for user_id in self._members.pop(guild_id, ()):
+            self._forget(user_id, guild_id)
@@ -44,6 +44,7 @@ class LeaderboardCommands(AdventureMixin):
         `list` of `tuple`
             The sorted leaderboard in the form of :code:`(user_id, raw_account)`
         """
+        await self._character_store.flush_all()
         raw_accounts = await self.config.all_users()
         if guild is not None:
             tmp = raw_accounts.copy()
@@ -117,6 +118,7 @@ class LeaderboardCommands(AdventureMixin):
         """
         if keyword is None:
             keyword = "wins"
+        await self._character_store.flush_all()
         raw_accounts = await self.config.all_users()
         if guild is not None:
             tmp = raw_accounts.copy()
@@ -176,6 +178,7 @@ class LeaderboardCommands(AdventureMixin):
         TypeError
             If the bank is guild-specific and no guild was specified
         """
+        await self._character_store.flush_all()
         raw_accounts = await self.config.all_users()
         if guild is not None:
             tmp = raw_accounts.copy()
@@ -282,6 +285,7 @@ class LeaderboardCommands(AdventureMixin):
         """
         current_week = date.today().isocalendar()[1]
         keyword = "adventures"
+        await self._character_store.flush_all()
         raw_accounts = await self.config.all_users()
         if guild is not None:
             tmp = raw_accounts.copy()
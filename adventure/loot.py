@@ -4,7 +4,6 @@ import logging
 import random
 import time
 
-from beautifultable import ALIGN_LEFT, BeautifulTable
 from redbot.core import commands
 from redbot.core.errors import BalanceTooHigh
 from redbot.core.i18n import Translator
@@ -18,7 +17,8 @@ from .bank import bank
 from .charsheet import Character, Item
 from .constants import ORDER, RARITIES
 from .helpers import _sell, escape, is_dev, smart_embed
-from .menus import BaseMenu, SimpleSource
+from .menus import BaseMenu, TableSource
+from .tables import TablePages
 
 _ = Translator("Adventure", __file__)
 
@@ -106,47 +106,12 @@ class LootCommands(AdventureMixin):
                         # atomically save reduced loot count then lock again when saving inside
                         # open chests
                         c.treasure[redux] -= number
-                        await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                        await self._character_store.save(ctx, ctx.author, c)
                         items = await self._open_chests(ctx, box_type, number, character=c)
                         msg = _("{}, you've opened the following items:\n\n").format(escape(ctx.author.display_name))
-                        msg_len = len(msg)
-                        table = BeautifulTable(default_alignment=ALIGN_LEFT, maxwidth=500)
-                        table.set_style(BeautifulTable.STYLE_RST)
-                        msgs = []
-                        total = len(items.values())
-                        table.columns.header = [
-                            "Name",
-                            "Slot",
-                            "ATT",
-                            "CHA",
-                            "INT",
-                            "DEX",
-                            "LUC",
-                            "LVL",
-                            "QTY",
-                            "DEG",
-                            "SET",
-                        ]
-                        async for index, item in AsyncIter(items.values(), steps=100).enumerate(start=1):
-                            if len(str(table)) > 1500:
-                                table.rows.sort("LVL", reverse=True)
-                                msgs.append(box(msg + str(table) + f"\nPage {len(msgs) + 1}", lang="css"))
-                                table = BeautifulTable(default_alignment=ALIGN_LEFT, maxwidth=500)
-                                table.set_style(BeautifulTable.STYLE_RST)
-                                table.columns.header = [
-                                    "Name",
-                                    "Slot",
-                                    "ATT",
-                                    "CHA",
-                                    "INT",
-                                    "DEX",
-                                    "LUC",
-                                    "LVL",
-                                    "QTY",
-                                    "DEG",
-                                    "SET",
-                                ]
-                            table.rows.append(
+                        rows = []
+                        async for item in AsyncIter(items.values(), steps=100):
+                            rows.append(
                                 (
                                     str(item),
                                     item.slot[0] if len(item.slot) == 1 else "two handed",
@@ -163,18 +128,29 @@ class LootCommands(AdventureMixin):
                                     item.set or "N/A",
                                 )
                             )
-                            if index == total:
-                                table.rows.sort("LVL", reverse=True)
-                                msgs.append(box(msg + str(table) + f"\nPage {len(msgs) + 1}", lang="css"))
+                        headers = [
+                            "Name",
+                            "Slot",
+                            "ATT",
+                            "CHA",
+                            "INT",
+                            "DEX",
+                            "LUC",
+                            "LVL",
+                            "QTY",
+                            "DEG",
+                            "SET",
+                        ]
+                        msgs = TablePages(headers, rows, msg, sort_by="LVL", reverse=True)
                 else:
                     # atomically save reduced loot count then lock again when saving inside
                     # open chests
                     c.treasure[redux] -= 1
-                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, c)
                     await self._open_chest(ctx, ctx.author, box_type, character=c)  # returns item and msg
         if msgs:
             await BaseMenu(
-                source=SimpleSource(msgs),
+                source=TableSource(msgs),
                 delete_message_after=True,
                 clear_reactions_after=True,
                 timeout=60,
@@ -240,7 +216,6 @@ class LootCommands(AdventureMixin):
 
         slot_list = [slot] if slot != "two handed" else ["left", "right"]
         return Item(
-            ctx=ctx,
             name=name,
             slot=slot_list,
             rarity=rarity,
@@ -337,7 +312,7 @@ class LootCommands(AdventureMixin):
                             lang="css",
                         )
                     )
-                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, c)
                 else:
                     await smart_embed(
                         ctx,
@@ -372,7 +347,7 @@ class LootCommands(AdventureMixin):
                             lang="css",
                         )
                     )
-                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, c)
                 else:
                     await smart_embed(
                         ctx,
@@ -406,7 +381,7 @@ class LootCommands(AdventureMixin):
                             lang="css",
                         )
                     )
-                    await self.config.user(ctx.author).set(await c.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, c)
                 else:
                     await smart_embed(
                         ctx,
@@ -439,7 +414,7 @@ class LootCommands(AdventureMixin):
             else:
                 items[item_name] = item
             await character.add_to_backpack(item)
-        await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+        await self._character_store.save(ctx, ctx.author, character)
         return items
 
     async def _open_chest(self, ctx: commands.Context, user, chest_type, character):
@@ -571,7 +546,7 @@ class LootCommands(AdventureMixin):
                     )
                 )
             )
-            await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+            await self._character_store.save(ctx, ctx.author, character)
             return
         await self._clear_react(open_msg)
         if self._treasure_controls[react.emoji] == "sell":
@@ -603,14 +578,15 @@ class LootCommands(AdventureMixin):
             await self._clear_react(open_msg)
             character.last_known_currency = await bank.get_balance(ctx.author)
             character.last_currency_check = time.time()
-            await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+            await self._character_store.save(ctx, ctx.author, character)
+            await self._character_store.flush(ctx.author)
         elif self._treasure_controls[react.emoji] == "equip":
             equiplevel = character.equip_level(item)
             if is_dev(ctx.author):
                 equiplevel = 0
             if not character.can_equip(item):
                 await character.add_to_backpack(item)
-                await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+                await self._character_store.save(ctx, ctx.author, character)
                 return await smart_embed(
                     ctx,
                     f"**{escape(ctx.author.display_name)}**, you need to be level "
@@ -635,7 +611,7 @@ class LootCommands(AdventureMixin):
                 )
             await open_msg.edit(content=equip_msg)
             character = await character.equip_item(item, False, is_dev(ctx.author))
-            await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+            await self._character_store.save(ctx, ctx.author, character)
         else:
             await character.add_to_backpack(item)
             await open_msg.edit(
@@ -649,4 +625,4 @@ class LootCommands(AdventureMixin):
                 )
             )
             await self._clear_react(open_msg)
-            await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+            await self._character_store.save(ctx, ctx.author, character)
@@ -10,6 +10,7 @@ from redbot.core.utils.chat_formatting import escape, humanize_number
 from redbot.vendored.discord.ext import menus
 
 from .bank import bank
+from .tables import TablePages
 
 _ = Translator("Adventure", __file__)
 log = logging.getLogger("red.cogs.adventure.menus")
@@ -308,6 +309,25 @@ class SimpleSource(menus.ListPageSource):
         return page
 
 
+class TableSource(menus.PageSource):
+    """Shows :class:`TablePages`, rendering each page only when the menu turns to it."""
+
+    def __init__(self, pages: TablePages):
+        self.pages = pages
+
+    def is_paginating(self):
+        return True
+
+    def get_max_pages(self):
+        return self.pages.estimated_length()
+
+    async def get_page(self, page_number: int) -> str:
+        return self.pages[page_number]
+
+    async def format_page(self, menu: menus.MenuPages, page: str):
+        return page
+
+
 class EconomySource(menus.ListPageSource):
     def __init__(self, entries: List[Tuple[str, Dict[str, Any]]]):
         super().__init__(entries, per_page=10)
@@ -530,12 +550,20 @@ class BaseMenu(menus.MenuPages, inherit_buttons=False):
             elif page_number >= max_pages:
                 await self.show_page(0)
             elif page_number < 0:
-                await self.show_page(max_pages - 1)
+                await self.show_page(self._page_count() - 1)
             elif max_pages > page_number >= 0:
                 await self.show_page(page_number)
         except IndexError:
-            # An error happened that can be handled, so ignore it.
-            pass
+            # A source that estimates its length knows the real one once it has been asked
+            # for a page past its end, so try again with that.
+            if self._source.get_max_pages() != max_pages:
+                await self.show_checked_page(page_number)
+
+    def _page_count(self) -> int:
+        # Table sources only estimate their length in get_max_pages.
+        if isinstance(self._source, TableSource):
+            return len(self._source.pages)
+        return self._source.get_max_pages()
 
     def reaction_check(self, payload):
         """Just extends the default reaction_check to use owner_ids"""
@@ -591,8 +619,7 @@ class BaseMenu(menus.MenuPages, inherit_buttons=False):
     )
     async def go_to_last_page(self, payload):
         """go to the last page"""
-        # The call here is safe because it's guarded by skip_if
-        await self.show_page(self._source.get_max_pages() - 1)
+        await self.show_checked_page(-1)
 
     @menus.button("\N{CROSS MARK}")
     async def stop_pages(self, payload: discord.RawReactionActionEvent) -> None:
@@ -753,8 +780,7 @@ class ScoreBoardMenu(BaseMenu, inherit_buttons=False):
     )
     async def go_to_last_page(self, payload):
         """go to the last page"""
-        # The call here is safe because it's guarded by skip_if
-        await self.show_page(self._source.get_max_pages() - 1)
+        await self.show_checked_page(-1)
 
 
 class LeaderboardMenu(BaseMenu, inherit_buttons=False):
@@ -851,8 +877,7 @@ class LeaderboardMenu(BaseMenu, inherit_buttons=False):
     )
     async def go_to_last_page(self, payload):
         """go to the last page"""
-        # The call here is safe because it's guarded by skip_if
-        await self.show_page(self._source.get_max_pages() - 1)
+        await self.show_checked_page(-1)
 
 
 class BackpackMenu(BaseMenu, inherit_buttons=False):
@@ -909,12 +934,14 @@ class BackpackMenu(BaseMenu, inherit_buttons=False):
             elif page_number >= max_pages:
                 await self.show_page(0)
             elif page_number < 0:
-                await self.show_page(max_pages - 1)
+                await self.show_page(self._page_count() - 1)
             elif max_pages > page_number >= 0:
                 await self.show_page(page_number)
         except IndexError:
-            # An error happened that can be handled, so ignore it.
-            pass
+            # A source that estimates its length knows the real one once it has been asked
+            # for a page past its end, so try again with that.
+            if self._source.get_max_pages() != max_pages:
+                await self.show_checked_page(page_number)
 
     def reaction_check(self, payload):
         """Just extends the default reaction_check to use owner_ids"""
@@ -970,8 +997,7 @@ class BackpackMenu(BaseMenu, inherit_buttons=False):
     )
     async def go_to_last_page(self, payload):
         """go to the last page"""
-        # The call here is safe because it's guarded by skip_if
-        await self.show_page(self._source.get_max_pages() - 1)
+        await self.show_checked_page(-1)
 
     @menus.button("\N{CROSS MARK}")
     async def stop_pages(self, payload: discord.RawReactionActionEvent) -> None:
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import random
+from bisect import bisect_left, bisect_right
+from types import MappingProxyType
+from typing import Iterator, List, Mapping, Optional, Tuple
+
+# Adventures used to put every ordinary monster in the draw between 1 and 15 times at
+# random, and bosses and minibosses once, then picked one entry.
+MONSTER_COPIES = range(1, 16)
+
+
+def _copies(monsters: int) -> int:
+    """How many entries `monsters` ordinary monsters took up in the old draw, together."""
+    return sum(random.choices(MONSTER_COPIES, k=monsters))
+
+
+class _SortedMonsters:
+    """Monster names sorted by one stat, with the positions of the bosses and of the others.
+
+    The old draw picked a boss with probability bosses / (bosses + copies), where copies
+    is the total of the ordinary monsters' random counts, and otherwise any ordinary
+    monster was as likely as the next. Drawing the total and then a uniform monster of
+    the chosen kind gives exactly the same odds, without building the list.
+    """
+
+    def __init__(self, monsters: List[Tuple[float, str, bool]]):
+        monsters.sort()
+        self.values = [value for (value, name, boss) in monsters]
+        self.names = [name for (value, name, boss) in monsters]
+        self.bosses = [index for (index, (value, name, boss)) in enumerate(monsters) if boss]
+        self.ordinary = [index for (index, (value, name, boss)) in enumerate(monsters) if not boss]
+
+    def choose(self, low: Optional[float], high: float) -> Optional[str]:
+        """Pick a monster whose stat is between `low` and `high`, as the old draw would."""
+        start = 0 if low is None else bisect_left(self.values, low)
+        end = bisect_right(self.values, high)
+        if start >= end:
+            return None
+        (first_boss, last_boss) = (bisect_left(self.bosses, start), bisect_left(self.bosses, end))
+        (first, last) = (bisect_left(self.ordinary, start), bisect_left(self.ordinary, end))
+        bosses = last_boss - first_boss
+        if bosses and (first == last or random.random() * (bosses + _copies(last - first)) < bosses):
+            return self.names[self.bosses[random.randrange(first_boss, last_boss)]]
+        return self.names[self.ordinary[random.randrange(first, last)]]
+
+
+class MonsterIndex:
+    """A theme's monster roster sorted by hp, by diplomacy and by the larger of the two.
+
+    ``get_challenge`` only ever asks for monsters within a range of one of those, so a
+    pick is a few bisections, plus a draw of the ordinary monsters' copies when the range
+    holds bosses too.
+    """
+
+    def __init__(self, monsters: Mapping[str, Mapping]):
+        self.names = list(monsters)
+        by_hp, by_dipl, by_peak = [], [], []
+        for (name, stats) in monsters.items():
+            boss = bool(stats["boss"] or stats["miniboss"])
+            by_hp.append((stats["hp"], name, boss))
+            by_dipl.append((stats["dipl"], name, boss))
+            by_peak.append((max(stats["hp"], stats["dipl"]), name, boss))
+        self.hp = _SortedMonsters(by_hp)
+        self.dipl = _SortedMonsters(by_dipl)
+        self.peak = _SortedMonsters(by_peak)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def choose_any(self) -> str:
+        return random.choice(self.names)
+
+
+class MonsterRoster(Mapping):
+    """A theme's bundled and custom monsters merged into one read-only mapping.
+
+    Rosters are shared by every adventure on the theme, so neither the mapping nor the
+    monsters in it can be changed. Anything that adjusts a monster's stats for one
+    adventure works on a copy.
+    """
+
+    def __init__(self, monsters: Mapping[str, Mapping]):
+        self._monsters = {name: MappingProxyType(dict(stats)) for (name, stats) in monsters.items()}
+        self._index: Optional[MonsterIndex] = None
+
+    def __getitem__(self, name: str) -> Mapping:
+        return self._monsters[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._monsters)
+
+    def __len__(self) -> int:
+        return len(self._monsters)
+
+    @property
+    def index(self) -> MonsterIndex:
+        if self._index is None:
+            self._index = MonsterIndex(self._monsters)
+        return self._index
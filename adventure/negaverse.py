@@ -18,6 +18,7 @@ from .abc import AdventureMixin
 from .bank import bank
 from .charsheet import Character
 from .helpers import escape, is_dev, smart_embed
+from .progression import xp_for_level
 
 _ = Translator("Adventure", __file__)
 
@@ -161,7 +162,7 @@ class Negaverse(AdventureMixin):
             xp_mod = random.randint(1, 10)
             daymult = self._daily_bonus.get(str(datetime.today().isoweekday()), 0)
             xp_won = int((offering / xp_mod))
-            xp_to_max = int((character.maxlevel + 1) ** 3.5)
+            xp_to_max = xp_for_level(character.maxlevel + 1)
             ten_percent = xp_to_max * 0.1
             xp_won = ten_percent if xp_won > ten_percent else xp_won
             xp_won = int(xp_won * (min(max(random.randint(0, character.rebirths), 1), 50) / 100 + 1))
@@ -177,7 +178,8 @@ class Negaverse(AdventureMixin):
                 if items:
                     item_string = "\n".join([f"{v} x{i}" for v, i in items])
                     looted = box(f"{item_string}", lang="css")
-                    await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, character)
+                    await self._character_store.flush(ctx.author)
                 loss_msg = _(
                     ", losing {loss} {currency_name} as **{negachar}** rifled through their belongings."
                 ).format(loss=loss_string, currency_name=currency_name, negachar=negachar)
@@ -212,7 +214,8 @@ class Negaverse(AdventureMixin):
                     if items:
                         item_string = "\n".join([f"{v} {i}" for v, i in items])
                         looted = box(f"{item_string}", lang="css")
-                        await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+                        await self._character_store.save(ctx, ctx.author, character)
+                        await self._character_store.flush(ctx.author)
                 loss_msg = _(
                     ", losing {loss} {currency_name} as **{negachar}** rifled through their belongings."
                 ).format(loss=loss_string, currency_name=currency_name, negachar=negachar)
@@ -308,7 +311,8 @@ class Negaverse(AdventureMixin):
                     if items:
                         item_string = "\n".join([f"{i}  - {v}" for v, i in items])
                         looted = box(f"{item_string}", lang="css")
-                        await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+                        await self._character_store.save(ctx, ctx.author, character)
+                        await self._character_store.flush(ctx.author)
                 loss_msg = _(", losing {loss} {currency_name} as **{negachar}** looted their backpack.").format(
                     loss=loss_string,
                     currency_name=currency_name,
@@ -363,4 +367,4 @@ class Negaverse(AdventureMixin):
                     changed = True
 
                 if changed:
-                    await self.config.user(ctx.author).set(await character.to_json(ctx, self.config))
+                    await self._character_store.save(ctx, ctx.author, character)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from typing import Callable, List
+
+from .constants import REBIRTH_LVL, REBIRTH_STEP
+
+MAX_LEVEL = 10000
+
+
+class _Curve:
+    """A cumulative lookup table, ``curve[n]`` is the sum of ``step(i)`` for ``i`` in ``1..n``.
+
+    The table is filled up to `size` when it is created and grows on demand past that.
+    """
+
+    def __init__(self, step: Callable[[int], float], size: int):
+        self._step = step
+        self._values: List[float] = [0]
+        self._extend(size)
+
+    def _extend(self, index: int) -> None:
+        values = self._values
+        for i in range(len(values), index + 1):
+            values.append(values[-1] + self._step(i))
+
+    def __getitem__(self, index: int) -> float:
+        index = max(index, 0)
+        if index >= len(self._values):
+            self._extend(index)
+        return self._values[index]
+
+
+def _stat_step(rebirth: int) -> int:
+    if rebirth >= 30:
+        return 3
+    elif rebirth >= 20:
+        return 5
+    elif rebirth >= 10:
+        return 1
+    return 2
+
+
+def _level_step(rebirth: int) -> int:
+    if rebirth >= 20:
+        return REBIRTH_STEP
+    elif rebirth > 10:
+        return 10
+    return 5
+
+
+def _skill_point_step(lvl: int) -> float:
+    if lvl >= 300:
+        return 1
+    elif lvl >= 200:
+        return 5
+    elif lvl >= 100:
+        return 1
+    return 0.5
+
+
+_STAT_POINTS = _Curve(_stat_step, 1000)
+_LEVELS = _Curve(_level_step, 1000)
+_SKILL_POINTS = _Curve(_skill_point_step, MAX_LEVEL)
+_XP = [int(lvl**3.5) for lvl in range(MAX_LEVEL + 2)]
+
+
+def extra_stat_points(rebirths: int) -> int:
+    """Stat points added to every stat for `rebirths` rebirths."""
+    return int(rebirths // 10 * 5 + _STAT_POINTS[rebirths])
+
+
+def max_level(rebirths: int) -> int:
+    """The highest level a character with `rebirths` rebirths can reach."""
+    rebirths = max(rebirths, 0)
+    if rebirths == 0:
+        return 5
+    return min(REBIRTH_LVL + _LEVELS[rebirths], MAX_LEVEL)
+
+
+def skill_points(lvl: int, rebirths: int) -> int:
+    """Total skill points earned by reaching `lvl` with `rebirths` rebirths."""
+    return int(rebirths * 10 + _SKILL_POINTS[lvl])
+
+
+def xp_for_level(lvl: int) -> int:
+    """Experience needed to reach `lvl`."""
+    if 0 <= lvl < len(_XP):
+        return _XP[lvl]
+    return int(lvl**3.5)
+
+
+def level_for_xp(exp: int) -> int:
+    """The level `exp` experience is worth, before the max level cap."""
+    return int(max(exp, 0) ** (1 / 3.5))
@@ -137,4 +137,5 @@ class RebirthCommands(AdventureMixin):
                     ),
                     embed=None,
                 )
-                await self.config.user(ctx.author).set(await c.rebirth())
+                self._character_store.replace(ctx.author, await c.rebirth())
+                await self._character_store.flush(ctx.author)
@@ -0,0 +1,745 @@
+# -*- coding: utf-8 -*-
+"""Run adventures without Discord, for balance changes and performance regressions.
+
+::
+
+    python -m adventure.simulator --adventures 2000 --members 40 --party 6 --seed 1
+
+Everything from ``[p]adventure`` onwards is the cog's own code: the command callback,
+``_simple``, ``get_challenge``, ``_dynamic_monster_stats``, ``_result`` and its handlers,
+``_reward`` and ``_add_rewards``. Only the Discord side is replaced. Config and the
+separate economy bank live in memory, members and messages are plain objects, and
+instead of waiting for reactions ``_choice`` seats a party picked by the simulator.
+
+The ``random`` module and the combat engine are seeded, and daily bonuses are off, so
+the same arguments give the same game results. The JSON report holds the outcomes,
+the chests handed out and what they rolled, the XP and credits paid out, and how long
+each phase took.
+"""
+import argparse
+import asyncio
+import contextlib
+import copy
+import json
+import logging
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from redbot.core import commands
+from redbot.core.utils.predicates import ReactionPredicate
+
+from . import adventure as adventure_module
+from .adventure import _SCHEMA_VERSION, Adventure
+from .bank import bank
+from .charsheet import Character
+from .combat import ACTION_CLASSES, CombatEngine
+from .constants import ORDER
+from .defaults import default_global, default_guild, default_user
+from .progression import max_level, skill_points, xp_for_level
+
+log = logging.getLogger("red.cogs.adventure")
+
+_MISSING = object()
+CHEST_TYPES = ("normal", "rare", "epic", "legendary", "ascended", "set")
+HERO_CLASSES = ("Hero", "Berserker", "Wizard", "Bard", "Cleric", "Ranger", "Psychic", "Tinkerer")
+REBIRTH_SPREAD = (0, 0, 1, 2, 5, 10, 15, 20, 30, 40)
+# Phases timed on every call, nested phases are included in their callers.
+TIMED_PHASES = (
+    "_simple",
+    "update_monster_roster",
+    "get_challenge",
+    "_dynamic_monster_stats",
+    "_result",
+    "handle_basilisk",
+    "handle_pray",
+    "handle_talk",
+    "handle_fight",
+    "_reward",
+    "_add_rewards",
+    "_roll_chest",
+)
+
+
+def _copy(value: Any) -> Any:
+    """A deep copy of JSON-like data, which has no cycles or shared parts to keep track of."""
+    if isinstance(value, dict):
+        return {key: _copy(item) for (key, item) in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def _merge(defaults: Mapping, stored: Mapping) -> dict:
+    merged = dict.fromkeys(defaults)
+    for (key, value) in stored.items():
+        default = defaults.get(key)
+        if isinstance(value, dict) and isinstance(default, dict):
+            merged[key] = _merge(default, value)
+        else:
+            merged[key] = _copy(value)
+    for (key, value) in defaults.items():
+        if key not in stored:
+            merged[key] = _copy(value)
+    return merged
+
+
+class _ValueAccess:
+    """What calling a value returns: awaitable, or an async context manager that saves on exit."""
+
+    def __init__(self, value: "MemoryValue", default: Any):
+        self.value = value
+        self.default = default
+        self.raw = None
+
+    def __await__(self):
+        return self.value.get(self.default).__await__()
+
+    async def __aenter__(self):
+        self.raw = await self.value.get(self.default)
+        return self.raw
+
+    async def __aexit__(self, *exc_info):
+        await self.value.set(self.raw)
+
+
+class MemoryValue:
+    def __init__(self, config: "MemoryConfig", path: Tuple[str, ...], default: Any):
+        self.config = config
+        self.path = path
+        self.default = default
+
+    def __call__(self, default: Any = _MISSING) -> _ValueAccess:
+        return _ValueAccess(self, default)
+
+    async def get(self, default: Any = _MISSING) -> Any:
+        stored = self.config._lookup(self.path)
+        if stored is _MISSING:
+            return _copy(self.default if default is _MISSING else default)
+        return _copy(stored)
+
+    async def set(self, value: Any) -> None:
+        self.config._store(self.path, value)
+
+    async def clear(self) -> None:
+        self.config._delete(self.path)
+
+
+class MemoryGroup(MemoryValue):
+    def __getattr__(self, name: str) -> MemoryValue:
+        if name.startswith("__") or name not in self.default:
+            raise AttributeError(f"'{name}' is not a registered value or group.")
+        default = self.default[name]
+        cls = MemoryGroup if isinstance(default, dict) else MemoryValue
+        return cls(self.config, self.path + (name,), default)
+
+    async def get(self, default: Any = _MISSING) -> dict:
+        stored = self.config._lookup(self.path)
+        return _merge(self.default, stored if isinstance(stored, dict) else {})
+
+    def all(self) -> _ValueAccess:
+        return _ValueAccess(self, _MISSING)
+
+    async def get_raw(self, *keys: str, default: Any = _MISSING) -> Any:
+        path = tuple(map(str, keys))
+        if default is _MISSING:
+            default = self.default
+            for key in path:
+                if not isinstance(default, dict) or key not in default:
+                    default = _MISSING
+                    break
+                default = default[key]
+        stored = self.config._lookup(self.path + path)
+        if stored is _MISSING:
+            if default is _MISSING:
+                raise KeyError(path)
+            return _copy(default)
+        if isinstance(default, dict) and isinstance(stored, dict):
+            return _merge(default, stored)
+        return _copy(stored)
+
+    async def set_raw(self, *keys: str, value: Any) -> None:
+        self.config._store(self.path + tuple(map(str, keys)), value)
+
+    async def clear_raw(self, *keys: str) -> None:
+        self.config._delete(self.path + tuple(map(str, keys)))
+
+
+class MemoryConfig:
+    """The parts of :class:`redbot.core.Config` the cog uses, kept in a dict.
+
+    Values are stored as their JSON round trip, the way a config driver would store them,
+    and reads hand out copies.
+    """
+
+    GLOBAL = "GLOBAL"
+    GUILD = "GUILD"
+    MEMBER = "MEMBER"
+    USER = "USER"
+
+    def __init__(self):
+        self._defaults: Dict[str, dict] = {self.GLOBAL: {}, self.GUILD: {}, self.MEMBER: {}, self.USER: {}}
+        self._data: dict = {}
+
+    def _lookup(self, path: Tuple[str, ...]) -> Any:
+        node = self._data
+        for key in path:
+            if not isinstance(node, dict) or key not in node:
+                return _MISSING
+            node = node[key]
+        return node
+
+    def _store(self, path: Tuple[str, ...], value: Any) -> None:
+        node = self._data
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = json.loads(json.dumps(value))
+
+    def _delete(self, path: Tuple[str, ...]) -> None:
+        node = self._lookup(path[:-1])
+        if isinstance(node, dict):
+            node.pop(path[-1], None)
+
+    def register_global(self, **defaults) -> None:
+        self._defaults[self.GLOBAL].update(copy.deepcopy(defaults))
+
+    def register_guild(self, **defaults) -> None:
+        self._defaults[self.GUILD].update(copy.deepcopy(defaults))
+
+    def register_member(self, **defaults) -> None:
+        self._defaults[self.MEMBER].update(copy.deepcopy(defaults))
+
+    def register_user(self, **defaults) -> None:
+        self._defaults[self.USER].update(copy.deepcopy(defaults))
+
+    def __getattr__(self, name: str) -> MemoryValue:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(MemoryGroup(self, (self.GLOBAL,), self._defaults[self.GLOBAL]), name)
+
+    async def all(self) -> dict:
+        return await MemoryGroup(self, (self.GLOBAL,), self._defaults[self.GLOBAL]).all()
+
+    def _get_base_group(self, category: str, *primary_keys: str) -> MemoryGroup:
+        return MemoryGroup(self, (category, *map(str, primary_keys)), self._defaults[category])
+
+    def guild_from_id(self, guild_id: int) -> MemoryGroup:
+        return MemoryGroup(self, (self.GUILD, str(guild_id)), self._defaults[self.GUILD])
+
+    def guild(self, guild) -> MemoryGroup:
+        return self.guild_from_id(guild.id)
+
+    def member(self, member) -> MemoryGroup:
+        return MemoryGroup(self, (self.MEMBER, str(member.guild.id), str(member.id)), self._defaults[self.MEMBER])
+
+    def user_from_id(self, user_id: int) -> MemoryGroup:
+        return MemoryGroup(self, (self.USER, str(user_id)), self._defaults[self.USER])
+
+    def user(self, user) -> MemoryGroup:
+        return self.user_from_id(user.id)
+
+    async def all_users(self) -> Dict[int, dict]:
+        users = self._data.get(self.USER, {})
+        return {int(user_id): _merge(self._defaults[self.USER], data) for (user_id, data) in users.items()}
+
+    async def clear_all_users(self) -> None:
+        self._data.pop(self.USER, None)
+
+
+class SimulatedPermissions:
+    send_messages = True
+    add_reactions = True
+    read_message_history = True
+    manage_messages = False
+    embed_links = False
+
+
+class SimulatedMessage:
+    def __init__(self, message_id: int, channel: "SimulatedChannel", author: Any, content: Optional[str] = None):
+        self.id = message_id
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.jump_url = f"https://discord.com/channels/{self.guild.id}/{channel.id}/{message_id}"
+        self._state = SimpleNamespace(self_id=channel.guild.me.id)
+
+    async def delete(self, *args, **kwargs) -> None:
+        pass
+
+    async def edit(self, *args, **kwargs) -> None:
+        pass
+
+    async def add_reaction(self, *args, **kwargs) -> None:
+        pass
+
+    async def remove_reaction(self, *args, **kwargs) -> None:
+        pass
+
+    async def clear_reactions(self) -> None:
+        pass
+
+
+class SimulatedMember:
+    bot = False
+
+    def __init__(self, member_id: int, guild: "SimulatedGuild"):
+        self.id = member_id
+        self.guild = guild
+        self.name = self.display_name = f"Hero {member_id}"
+        self.mention = f"<@{member_id}>"
+
+    def __hash__(self) -> int:
+        return self.id
+
+    def __eq__(self, other) -> bool:
+        return getattr(other, "id", None) == self.id
+
+
+class SimulatedGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.name = f"Guild {guild_id}"
+        self.members: Dict[int, SimulatedMember] = {}
+        self.me = SimulatedMember(1, self)
+
+    def get_member(self, member_id: int) -> Optional[SimulatedMember]:
+        return self.members.get(member_id)
+
+
+class SimulatedChannel:
+    def __init__(self, channel_id: int, guild: SimulatedGuild, bot: "SimulatedBot"):
+        self.id = channel_id
+        self.guild = guild
+        self.bot = bot
+        self.sent = 0
+
+    def permissions_for(self, member) -> SimulatedPermissions:
+        return SimulatedPermissions()
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> SimulatedMessage:
+        self.sent += 1
+        return self.bot.new_message(self, self.guild.me, content)
+
+
+class SimulatedContext:
+    prefix = clean_prefix = "[p]"
+    command = None
+
+    def __init__(self, bot: "SimulatedBot", author: SimulatedMember, channel: SimulatedChannel):
+        self.bot = bot
+        self.cog = bot.cog
+        self.author = author
+        self.guild = author.guild
+        self.channel = channel
+        self.me = self.guild.me
+        self.message = bot.new_message(channel, author)
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> SimulatedMessage:
+        message = await self.channel.send(content, **kwargs)
+        self.bot.last_prompt = (message, self.author)
+        return message
+
+    def typing(self) -> contextlib.nullcontext:
+        return contextlib.nullcontext()
+
+    async def embed_requested(self) -> bool:
+        return False
+
+    async def embed_colour(self):
+        return None
+
+    async def tick(self) -> None:
+        pass
+
+
+class SimulatedBot:
+    """Just enough of Red for the cog to start and play.
+
+    Whoever a message was last sent to answers yes to it straight away, and nobody ever
+    touches a menu, so confirmations go through and menus close as soon as they open.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.cog: Optional[Adventure] = None
+        self.guilds: Dict[int, SimulatedGuild] = {}
+        self.user: Optional[SimulatedMember] = None
+        self.last_prompt: Optional[Tuple[SimulatedMessage, SimulatedMember]] = None
+        self._message_ids = 1000
+
+    def new_message(self, channel: SimulatedChannel, author: Any, content: Optional[str] = None) -> SimulatedMessage:
+        self._message_ids += 1
+        return SimulatedMessage(self._message_ids, channel, author, content)
+
+    def get_cog(self, name: str) -> Optional[Adventure]:
+        return self.cog if name == "Adventure" else None
+
+    def get_guild(self, guild_id: int) -> Optional[SimulatedGuild]:
+        return self.guilds.get(guild_id)
+
+    def dispatch(self, event: str, *args, **kwargs) -> None:
+        pass
+
+    def is_closed(self) -> bool:
+        return False
+
+    async def wait_until_red_ready(self) -> None:
+        pass
+
+    async def is_owner(self, user) -> bool:
+        return False
+
+    async def wait_for(self, event: str, *, check=None, timeout: Optional[float] = None):
+        if event == "reaction_add" and self.last_prompt is not None:
+            (message, user) = self.last_prompt
+            reaction = SimpleNamespace(message=message, emoji=ReactionPredicate.YES_OR_NO_EMOJIS[0])
+            if check is None or check(reaction, user):
+                return reaction, user
+        raise asyncio.TimeoutError()
+
+
+class SimulatedAdventure(Adventure, name="Adventure"):
+    """The cog with the reaction phase replaced by seating a party chosen up front."""
+
+    def __init__(self, bot: SimulatedBot, config: MemoryConfig):
+        super().__init__(bot, config=config)
+        self.party: Dict[SimulatedMember, str] = {}
+        self.ability_chance = 0.0
+        self.ability_rng = random.Random()
+
+    async def _choice(self, ctx: commands.Context, adventure_msg):
+        session = self._sessions[ctx.guild.id]
+        message = await ctx.send(adventure_msg)
+        session.message_id = message.id
+        session.message = message
+        for (member, action) in self.party.items():
+            self._sessions.join(ctx.guild.id, member, action)
+            c = await session.characters.get(member)
+            if c is not None and c.heroclass["name"] != "Ranger" and self.ability_rng.random() < self.ability_chance:
+                c.heroclass["ability"] = True
+        return await self._result(ctx, message)
+
+
+class _ErrorCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.count += 1
+
+
+class Sandbox:
+    """A headless cog in one simulated guild, with the bank and config in memory.
+
+    Use it as an async context manager, the bank module is pointed at the sandbox for as
+    long as it is open and put back when it closes.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.bot: Optional[SimulatedBot] = None
+        self.cog: Optional[SimulatedAdventure] = None
+        self.config = MemoryConfig()
+        self.guild = SimulatedGuild(1)
+        self.channel: Optional[SimulatedChannel] = None
+        self.errors = _ErrorCounter()
+        self._old_bank = None
+
+    async def __aenter__(self) -> "Sandbox":
+        random.seed(self.seed)
+        log.addHandler(self.errors)
+        self.bot = SimulatedBot(asyncio.get_running_loop())
+        self.bot.guilds[self.guild.id] = self.guild
+        self.bot.user = self.guild.me
+        self.channel = SimulatedChannel(2, self.guild, self.bot)
+        self._old_bank = (bank._config, bank._bot)
+        bank._config = MemoryConfig()
+        bank._config.register_user(**bank._DEFAULT_MEMBER)
+        config = self.config
+        config.register_global(**default_global)
+        config.register_guild(**default_guild)
+        await config.schema_version.set(_SCHEMA_VERSION)
+        await config.separate_economy.set(True)
+        await config.guild(self.guild).cooldown_timer_manual.set(0)
+        self.cog = self.bot.cog = SimulatedAdventure(self.bot, config)
+        try:
+            await asyncio.wait_for(self.cog._ready_event.wait(), timeout=30)
+        except BaseException:
+            await self.__aexit__(*sys.exc_info())
+            raise
+        self.cog._daily_bonus = {}
+        self.cog._combat = CombatEngine(self.seed)
+        self.cog.ability_rng = random.Random(self.seed)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.cog.cog_unload()
+        bank._config, bank._bot = self._old_bank
+        adventure_module._config = None
+        log.removeHandler(self.errors)
+
+    def add_members(self, count: int) -> List[SimulatedMember]:
+        first = 100 + len(self.guild.members)
+        members = [SimulatedMember(member_id, self.guild) for member_id in range(first, first + count)]
+        self.guild.members.update((member.id, member) for member in members)
+        return members
+
+    def context(self, member: SimulatedMember) -> SimulatedContext:
+        return SimulatedContext(self.bot, member, self.channel)
+
+    async def create_hero(
+        self,
+        member: SimulatedMember,
+        *,
+        rebirths: Optional[int] = None,
+        lvl: Optional[int] = None,
+        heroclass: Optional[str] = None,
+        backpack: int = 0,
+    ) -> dict:
+        """Give `member` a random sheet, fully equipped and with `backpack` unique items carried."""
+        rng = self.rng
+        cog = self.cog
+        ctx = self.context(member)
+        rebirths = rng.choice(REBIRTH_SPREAD) if rebirths is None else rebirths
+        lvl = rng.randint(1, max_level(rebirths)) if lvl is None else lvl
+        points = skill_points(lvl, rebirths)
+        att = rng.randint(0, points)
+        cha = rng.randint(0, points - att)
+        hero = {"name": heroclass or rng.choice(HERO_CLASSES), "ability": False, "desc": "", "cooldown": 0}
+        if hero["name"] == "Ranger":
+            hero["pet"] = rng.choice(list(cog.PETS.values())) if rng.random() < 0.5 else {}
+        rarity = "normal" if rebirths < 2 else "rare" if rebirths < 10 else "epic" if rebirths < 30 else "legendary"
+        items = {"backpack": {}}
+        for slot in ORDER:
+            if slot != "two handed":
+                items[slot] = (await cog._genitem(ctx, rarity, slot)).to_json()
+        carried = {}
+        for _loop_counter in range(backpack * 3):
+            if len(carried) >= backpack:
+                break
+            item = await cog._genitem(ctx, rng.choice(CHEST_TYPES))
+            item.owned = rng.randint(1, 3)
+            carried.update(item.to_json())
+        sheet = copy.deepcopy(default_user)
+        sheet.update(
+            exp=xp_for_level(lvl),
+            lvl=lvl,
+            rebirths=rebirths,
+            skill={"pool": 0, "att": att, "cha": cha, "int": points - att - cha},
+            heroclass=hero,
+            items=items,
+            backpack=carried,
+        )
+        await self.config.user(member).set(sheet)
+        await bank.set_balance(member, 10_000 + 1_000 * rebirths)
+        return sheet
+
+
+class Simulation:
+    """A guild of generated heroes playing `adventures` adventures in a row.
+
+    Heroes keep their sheets between adventures, so XP, credits and chests pile up the
+    way they would on a live bot.
+    """
+
+    def __init__(
+        self,
+        *,
+        adventures: int = 1000,
+        members: int = 20,
+        party: int = 5,
+        seed: int = 0,
+        ability_chance: float = 0.3,
+        run_chance: float = 0.02,
+        open_chests: bool = True,
+    ):
+        self.adventures = adventures
+        self.members = members
+        self.party_size = max(1, min(party, members))
+        self.seed = seed
+        self.ability_chance = ability_chance
+        self.run_chance = run_chance
+        self.open_chests = open_chests
+        self.rng = random.Random(seed)
+        self.timings: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        self.outcomes: Counter = Counter()
+        self.paid = {"xp": 0, "credits": 0}
+        self.classes: Dict[int, str] = {}
+
+    def _time(self, cog: Adventure, name: str) -> None:
+        func = getattr(cog, name)
+        timing = self.timings[name]
+
+        if asyncio.iscoroutinefunction(func):
+
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    timing[0] += 1
+                    timing[1] += time.perf_counter() - start
+
+        else:
+
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    timing[0] += 1
+                    timing[1] += time.perf_counter() - start
+
+        setattr(cog, name, timed)
+
+    def _watch(self, cog: Adventure) -> None:
+        for name in TIMED_PHASES:
+            self._time(cog, name)
+        add_rewards = cog._add_rewards
+
+        async def paid(ctx, user, exp, cp, special, characters=None):
+            self.paid["xp"] += exp
+            self.paid["credits"] += cp
+            return await add_rewards(ctx, user, exp, cp, special, characters=characters)
+
+        cog._add_rewards = paid
+        add_result = cog._adv_results.add_result
+
+        def result(ctx, main_action, amount, num_ppl, success):
+            self.outcomes["won" if success else "lost"] += 1
+            return add_result(ctx, main_action, amount, num_ppl, success)
+
+        cog._adv_results.add_result = result
+
+    def _pick_party(self, members: List[SimulatedMember]) -> Dict[SimulatedMember, str]:
+        party = {}
+        for member in self.rng.sample(members, self.party_size):
+            preferred = {heroclass: action for (action, heroclass) in ACTION_CLASSES.items()}
+            preferred["Cleric"] = "pray"
+            action = preferred.get(self.classes[member.id])
+            if self.rng.random() < self.run_chance:
+                action = "run"
+            elif action is None or self.rng.random() < 0.3:
+                action = self.rng.choice(("fight", "magic", "talk", "pray"))
+            party[member] = action
+        return party
+
+    async def _summary(self, cog: Adventure, ctx: SimulatedContext, members: List[SimulatedMember], start) -> dict:
+        chests: Counter = Counter()
+        rarities: Counter = Counter()
+        levels, balances, ready = [], [], 0
+        for member in members:
+            c = await Character.from_json(ctx, cog.config, member, cog._daily_bonus)
+            levels.append(c.lvl)
+            balances.append(c.bal)
+            ready += c.lvl >= c.maxlevel
+            for (chest_type, before, after) in zip(CHEST_TYPES, start[member.id]["treasure"], c.treasure):
+                chests[chest_type] += after - before
+                if self.open_chests:
+                    for _loop_counter in range(max(after - before, 0)):
+                        rarities[(await cog._roll_chest(chest_type, c)).rarity] += 1
+        before_levels = [start[m.id]["lvl"] for m in members]
+        before_balances = [start[m.id]["bal"] for m in members]
+        return {
+            "chests": dict(chests),
+            "chest_items": dict(rarities),
+            "level": {"start_mean": _mean(before_levels), "end_mean": _mean(levels), "can_rebirth": ready},
+            "balance": {"start_mean": _mean(before_balances), "end_mean": _mean(balances)},
+        }
+
+    async def run(self) -> dict:
+        async with Sandbox(self.seed) as sandbox:
+            cog = sandbox.cog
+            sandbox.rng = self.rng
+            cog.ability_chance = self.ability_chance
+            self._watch(cog)
+
+            members = sandbox.add_members(self.members)
+            setup_ctx = sandbox.context(members[0])
+            for member in members:
+                sheet = await sandbox.create_hero(member)
+                self.classes[member.id] = sheet["heroclass"]["name"]
+            start = {}
+            for member in members:
+                c = await Character.from_json(setup_ctx, sandbox.config, member, cog._daily_bonus)
+                start[member.id] = {"lvl": c.lvl, "bal": c.bal, "treasure": list(c.treasure)}
+
+            started = time.perf_counter()
+            for _loop_counter in range(self.adventures):
+                cog.party = party = self._pick_party(members)
+                ctx = sandbox.context(next(iter(party)))
+                begin = time.perf_counter()
+                await Adventure._adventure.callback(cog, ctx)
+                self.timings["adventure"][0] += 1
+                self.timings["adventure"][1] += time.perf_counter() - begin
+            elapsed = time.perf_counter() - started
+            summary = await self._summary(cog, setup_ctx, members, start)
+
+        played = self.outcomes["won"] + self.outcomes["lost"]
+        self.outcomes["abandoned"] = self.adventures - played
+        return {
+            "seed": self.seed,
+            "adventures": self.adventures,
+            "members": self.members,
+            "party": self.party_size,
+            "outcomes": {
+                **self.outcomes,
+                "win_rate": round(self.outcomes["won"] / played, 4) if played else 0.0,
+                "errors": sandbox.errors.count,
+            },
+            **summary,
+            "paid": {
+                "xp": self.paid["xp"],
+                "credits": self.paid["credits"],
+                "xp_per_adventure": round(self.paid["xp"] / max(self.adventures, 1), 2),
+                "credits_per_adventure": round(self.paid["credits"] / max(self.adventures, 1), 2),
+            },
+            "adventures_per_second": round(self.adventures / elapsed, 1) if elapsed else 0.0,
+            "timings": {
+                name: {"calls": calls, "total_ms": round(total * 1000, 3), "mean_ms": round(total * 1000 / calls, 4)}
+                for (name, (calls, total)) in self.timings.items()
+                if calls
+            },
+        }
+
+
+def _mean(values: List[float]) -> float:
+    return round(sum(values) / len(values), 2) if values else 0.0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m adventure.simulator", description=__doc__.splitlines()[0])
+    parser.add_argument("--adventures", type=int, default=1000, help="adventures to play")
+    parser.add_argument("--members", type=int, default=20, help="heroes in the guild")
+    parser.add_argument("--party", type=int, default=5, help="heroes joining each adventure")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ability-chance", type=float, default=0.3, help="chance a hero has their ability active")
+    parser.add_argument("--run-chance", type=float, default=0.02, help="chance a hero runs away")
+    parser.add_argument("--no-chests", action="store_true", help="don't roll the chests that were handed out")
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    args = parser.parse_args(argv)
+    simulation = Simulation(
+        adventures=args.adventures,
+        members=args.members,
+        party=args.party,
+        seed=args.seed,
+        ability_chance=args.ability_chance,
+        run_chance=args.run_chance,
+        open_chests=not args.no_chests,
+    )
+    report = json.dumps(asyncio.run(simulation.run()), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
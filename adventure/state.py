@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import heapq
+import logging
+import sys
+import time
+from typing import Dict, Hashable, Iterator, List, Mapping, MutableMapping, NamedTuple, Optional, Tuple
+
+from .timers import TimerHeap
+
+log = logging.getLogger("red.cogs.adventure")
+
+_SWEEP_KEY = ("state",)
+
+
+class ContainerStats(NamedTuple):
+    name: str
+    entries: int
+    pending: int
+    size: int
+
+
+def approximate_size(obj, depth: int = 2) -> int:
+    """`sys.getsizeof` of `obj` plus that of its keys, values and items, `depth` levels down.
+
+    The cog's own containers count the dicts behind them in their ``__sizeof__``.
+    """
+    size = sys.getsizeof(obj)
+    if depth <= 0:
+        return size
+    if isinstance(obj, Mapping):
+        for (key, value) in obj.items():
+            size += sys.getsizeof(key) + approximate_size(value, depth - 1)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += approximate_size(item, depth - 1)
+    return size
+
+
+class StateManager:
+    """Expiry times for the per-guild and per-user state the cog keeps between events.
+
+    Containers are registered by name. Every entry given an expiry goes into one min-heap,
+    and a single sweep, scheduled on the cog's :class:`TimerHeap` for the earliest expiry,
+    removes whatever is due. Setting an entry again pushes its expiry back.
+    """
+
+    def __init__(self, timers: TimerHeap):
+        self._timers = timers
+        self._containers: Dict[str, MutableMapping] = {}
+        self._expiry: Dict[Tuple[str, Hashable], float] = {}
+        # (when, seq, name, key), entries whose time no longer matches _expiry are skipped.
+        self._heap: List[Tuple[float, int, str, Hashable]] = []
+        self._seq = 0
+        self._next_sweep: Optional[float] = None
+
+    def register(self, name: str, container: MutableMapping) -> None:
+        self._containers[name] = container
+
+    def expire(self, name: str, key: Hashable, ttl: float) -> None:
+        """Remove `key` from the container `name` once `ttl` seconds have passed."""
+        when = time.time() + ttl
+        self._expiry[(name, key)] = when
+        self._seq += 1
+        heapq.heappush(self._heap, (when, self._seq, name, key))
+        if len(self._heap) > 2 * len(self._expiry) + 64:
+            self._compact()
+        if self._next_sweep is None or when < self._next_sweep:
+            self._next_sweep = when
+            self._timers.schedule(_SWEEP_KEY, when, self._sweep)
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """Remove every entry that is due, returns how many were still present."""
+        now = time.time() if now is None else now
+        evicted = 0
+        while self._heap and self._heap[0][0] <= now:
+            (when, seq, name, key) = heapq.heappop(self._heap)
+            if self._expiry.get((name, key)) != when:
+                continue
+            del self._expiry[(name, key)]
+            if self._containers[name].pop(key, None) is not None:
+                evicted += 1
+        return evicted
+
+    def stats(self) -> List[ContainerStats]:
+        pending: Dict[str, int] = {}
+        for (name, key) in self._expiry:
+            pending[name] = pending.get(name, 0) + 1
+        return [
+            ContainerStats(name, len(container), pending.get(name, 0), approximate_size(container))
+            for (name, container) in self._containers.items()
+        ]
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def _compact(self) -> None:
+        self._heap = [entry for entry in self._heap if self._expiry.get((entry[2], entry[3])) == entry[0]]
+        heapq.heapify(self._heap)
+
+    async def _sweep(self) -> None:
+        self._next_sweep = None
+        evicted = self.evict()
+        if evicted:
+            log.debug("Evicted %s expired adventure state entries.", evicted)
+        if self._heap:
+            self._next_sweep = self._heap[0][0]
+            self._timers.schedule(_SWEEP_KEY, self._next_sweep, self._sweep)
+
+
+class ExpiringDict(MutableMapping):
+    """A dict whose entries are removed `ttl` seconds after they were last set."""
+
+    def __init__(self, manager: StateManager, name: str, ttl: float):
+        self._data: dict = {}
+        self._manager = manager
+        self._name = name
+        self.ttl = ttl
+        manager.register(name, self)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key) -> None:
+        del self._data[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"<ExpiringDict {self._name} entries={len(self._data)} ttl={self.ttl}>"
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sys.getsizeof(self._data)
+
+    def set(self, key, value, ttl: Optional[float] = None) -> None:
+        self._data[key] = value
+        self._manager.expire(self._name, key, self.ttl if ttl is None else ttl)
+
+    def copy(self) -> dict:
+        return self._data.copy()
+
+
+class PermissionCache(ExpiringDict):
+    """Whitelist and blacklist results by (guild id, user id), kept for `ttl` seconds."""
+
+    def __init__(self, manager: StateManager, name: str, ttl: float):
+        super().__init__(manager, name, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: Tuple[Optional[int], int]) -> Optional[bool]:
+        allowed = self._data.get(key)
+        if allowed is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return allowed
+
+    def invalidate_guild(self, guild_id: int) -> None:
+        for key in [key for key in self._data if key[0] == guild_id]:
+            del self._data[key]
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+import math
+from collections import OrderedDict
+from typing import Any, Iterable, Iterator, List, MutableMapping, Optional, Sequence, Tuple
+
+from beautifultable import ALIGN_LEFT, BeautifulTable
+from redbot.core.utils.chat_formatting import box
+
+try:
+    from wcwidth import wcwidth
+except ImportError:
+    wcwidth = len
+
+# A page is closed once its table renders longer than this.
+PAGE_LIMIT = 1500
+MAX_WIDTH = 500
+# Rendered pages kept by TablePages.
+PAGE_CACHE_SIZE = 4
+
+
+def _cell(value: Any) -> str:
+    """Format `value` the way BeautifulTable does with its default settings.
+
+    Numeric strings are shown as numbers, so ``"+5"`` becomes ``5``, and floats are
+    rounded to three places.
+    """
+    if value is None:
+        return ""
+    if not isinstance(value, (int, float)):
+        try:
+            value = int(str(value))
+        except ValueError:
+            try:
+                value = float(str(value))
+            except ValueError:
+                pass
+    if isinstance(value, float):
+        value = round(value, 3)
+    try:
+        value = format(value, "-")
+    except (ValueError, TypeError):
+        pass
+    return str(value)
+
+
+def _text_width(text: str) -> Optional[int]:
+    """The terminal width of `text`, or None if only BeautifulTable knows how to lay it out."""
+    if text.isascii() and text.isprintable():
+        return len(text)
+    if "\n" in text or "\x1b" in text:
+        return None
+    width = 0
+    for char in text:
+        char_width = wcwidth(char)
+        if char_width < 0:
+            return None
+        width += char_width
+    return width
+
+
+class RSTTable:
+    """A left aligned table rendered exactly like an RST styled ``BeautifulTable``.
+
+    Column widths are kept up to date as rows are added, so the length of the rendered
+    table is known without rendering it. Tables wider than `maxwidth`, or with cells
+    holding newlines, escape codes or control characters, are handed to BeautifulTable
+    so that its wrapping rules still apply.
+    """
+
+    def __init__(self, headers: Sequence[str], maxwidth: int = MAX_WIDTH):
+        self.headers = list(headers)
+        self.maxwidth = maxwidth
+        self.rows: List[Sequence[Any]] = []
+        self._cells: List[List[Tuple[str, int]]] = []
+        self._header = [(text, _text_width(text) or 0) for text in map(_cell, self.headers)]
+        self._widths = [width for (text, width) in self._header]
+        self._simple = all(_text_width(text) is not None for (text, width) in self._header)
+        # Wide characters take more columns than they count towards the length of the string.
+        self._wide = sum(width - len(text) for (text, width) in self._header)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def append(self, row: Sequence[Any]) -> None:
+        cells = []
+        widths = self._widths
+        for (index, value) in enumerate(row):
+            text = _cell(value)
+            width = _text_width(text)
+            if width is None:
+                self._simple = False
+                width = 0
+            elif width > widths[index]:
+                widths[index] = width
+            self._wide += width - len(text)
+            cells.append((text, width))
+        self.rows.append(row)
+        self._cells.append(cells)
+
+    def sort(self, column: str, reverse: bool = False) -> None:
+        """Stable sort on the raw values of `column`, like ``BeautifulTable.rows.sort``."""
+        index = self.headers.index(column)
+        order = sorted(range(len(self.rows)), key=lambda i: self.rows[i][index], reverse=reverse)
+        self.rows = [self.rows[i] for i in order]
+        self._cells = [self._cells[i] for i in order]
+
+    @property
+    def width(self) -> int:
+        # Every cell is padded by a space on both sides and cells are split by a space.
+        return sum(self._widths) + 3 * len(self._widths) - 1
+
+    def _fits(self) -> bool:
+        return self._simple and self.width <= self.maxwidth
+
+    def rendered_length(self) -> int:
+        """``len(str(self))``, without building the string when possible."""
+        if not self.rows:
+            return 0
+        if not self._fits():
+            return len(str(self.to_beautifultable()))
+        lines = len(self.rows) + 4
+        return lines * self.width + lines - 1 - self._wide
+
+    def _line(self, cells: List[Tuple[str, int]]) -> str:
+        return " ".join(
+            f" {text}{' ' * (column_width - width + 1)}" for ((text, width), column_width) in zip(cells, self._widths)
+        )
+
+    def __str__(self) -> str:
+        if not self.rows:
+            return ""
+        if not self._fits():
+            return str(self.to_beautifultable())
+        border = " ".join("=" * (width + 2) for width in self._widths)
+        return "\n".join([border, self._line(self._header), border, *map(self._line, self._cells), border])
+
+    def to_beautifultable(self) -> BeautifulTable:
+        table = BeautifulTable(default_alignment=ALIGN_LEFT, maxwidth=self.maxwidth)
+        table.set_style(BeautifulTable.STYLE_RST)
+        table.columns.header = self.headers
+        for row in self.rows:
+            table.rows.append(row)
+        return table
+
+
+def paginate(
+    headers: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    title: str = "",
+    *,
+    sort_by: Optional[str] = None,
+    reverse: bool = False,
+    limit: int = PAGE_LIMIT,
+    maxwidth: int = MAX_WIDTH,
+) -> Iterator[str]:
+    """Yield `rows` as ``css`` code block pages of an RST table headed by `title`.
+
+    A page is closed before a row is added once its table renders longer than `limit`,
+    and each page may be sorted on one column before it is sent.
+    """
+    table = RSTTable(headers, maxwidth)
+    page = 0
+    for row in rows:
+        if table.rendered_length() > limit:
+            page += 1
+            yield _render_page(table, title, page, sort_by, reverse)
+            table = RSTTable(headers, maxwidth)
+        table.append(row)
+    if table:
+        yield _render_page(table, title, page + 1, sort_by, reverse)
+
+
+def _render_page(table: RSTTable, title: str, page: int, sort_by: Optional[str], reverse: bool) -> str:
+    if sort_by is not None:
+        table.sort(sort_by, reverse=reverse)
+    return box(title + str(table) + f"\nPage {page}", lang="css")
+
+
+class TablePages:
+    """The pages :func:`paginate` would yield for `rows`, rendered only when asked for.
+
+    Finding where a page ends only needs the column widths, so pages are split as far as
+    the requested one without building any strings. A few recently rendered pages are
+    kept, and until every page has been split the page count is an estimate from the
+    number of rows left.
+    """
+
+    def __init__(
+        self,
+        headers: Sequence[str],
+        rows: Sequence[Sequence[Any]],
+        title: str = "",
+        *,
+        sort_by: Optional[str] = None,
+        reverse: bool = False,
+        limit: int = PAGE_LIMIT,
+        maxwidth: int = MAX_WIDTH,
+        cache_size: int = PAGE_CACHE_SIZE,
+    ):
+        self.headers = list(headers)
+        self.rows = rows
+        self.title = title
+        self.sort_by = sort_by
+        self.reverse = reverse
+        self.limit = limit
+        self.maxwidth = maxwidth
+        self.cache_size = cache_size
+        # The first row of every page found so far.
+        self._starts: List[int] = [0]
+        self._complete = not rows
+        self._cache: MutableMapping[int, str] = OrderedDict()
+
+    def __bool__(self) -> bool:
+        return bool(self.rows)
+
+    def __len__(self) -> int:
+        """The exact number of pages, which means splitting every one of them."""
+        if not self.rows:
+            return 0
+        self._split_until(len(self.rows))
+        return len(self._starts)
+
+    def __iter__(self) -> Iterator[str]:
+        page = 0
+        while True:
+            try:
+                yield self[page]
+            except IndexError:
+                return
+            page += 1
+
+    @property
+    def complete(self) -> bool:
+        """Whether every page has been split, making :meth:`estimated_length` exact."""
+        return self._complete
+
+    def _split_until(self, page: int) -> None:
+        rows = self.rows
+        while not self._complete and len(self._starts) <= page + 1:
+            table = RSTTable(self.headers, self.maxwidth)
+            index = self._starts[-1]
+            while index < len(rows) and table.rendered_length() <= self.limit:
+                table.append(rows[index])
+                index += 1
+            if index < len(rows):
+                self._starts.append(index)
+            else:
+                self._complete = True
+
+    def estimated_length(self) -> int:
+        if not self.rows:
+            return 0
+        self._split_until(0)
+        if self._complete:
+            return len(self._starts)
+        split = len(self._starts) - 1
+        remaining = len(self.rows) - self._starts[-1]
+        return split + max(1, math.ceil(remaining * split / self._starts[-1]))
+
+    def __getitem__(self, page: int) -> str:
+        if page < 0:
+            raise IndexError(page)
+        if (text := self._cache.get(page)) is not None:
+            self._cache.move_to_end(page)
+            return text
+        self._split_until(page)
+        if page >= len(self._starts) or not self.rows:
+            raise IndexError(page)
+        end = self._starts[page + 1] if page + 1 < len(self._starts) else len(self.rows)
+        table = RSTTable(self.headers, self.maxwidth)
+        for row in self.rows[self._starts[page] : end]:
+            table.append(row)
+        text = _render_page(table, self.title, page + 1, self.sort_by, self.reverse)
+        self._cache[page] = text
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return text
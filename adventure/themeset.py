@@ -62,6 +62,7 @@ class ThemesetCommands(AdventureMixin):
             if monster in config_data[theme]["monsters"]:
                 updated = True
             config_data[theme]["monsters"][monster] = theme_data
+        self._invalidate_monster_rosters()
         image = theme_data.pop("image", None)
         text = _(
             "Monster: `{monster}` has been {status} the `{theme}` theme\n"
@@ -111,6 +112,7 @@ class ThemesetCommands(AdventureMixin):
             if pet in config_data[theme]["pet"]:
                 updated = True
             config_data[theme]["pet"][pet] = pet_data
+        self._character_store.characters.clear()
 
         pet_bonuses = pet_data.pop("bonuses", {})
         text = _(
@@ -156,6 +158,7 @@ class ThemesetCommands(AdventureMixin):
                 text = _("Monster: `{monster}` does not exist in `{theme}` theme").format(monster=monster, theme=theme)
                 await smart_embed(ctx, text)
                 return
+        self._invalidate_monster_rosters()
 
         text = _("Monster: `{monster}` has been deleted from the `{theme}` theme").format(monster=monster, theme=theme)
         await smart_embed(ctx, text)
@@ -176,6 +179,7 @@ class ThemesetCommands(AdventureMixin):
                 config_data[theme]["pet"] = {}
             if pet in config_data[theme]["pet"]:
                 del config_data[theme]["pet"][pet]
+                self._character_store.characters.clear()
             else:
                 text = _("Pet: `{pet}` does not exist in `{theme}` theme").format(pet=pet, theme=theme)
                 await smart_embed(ctx, text)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import contextlib
+import heapq
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+log = logging.getLogger("red.cogs.adventure")
+
+
+class _Deadline:
+    __slots__ = ("when", "seq", "future", "callback")
+
+    def __init__(self, when: float, seq: int, future: asyncio.Future, callback: Optional[Callable[[], Awaitable]]):
+        self.when = when
+        self.seq = seq
+        self.future = future
+        self.callback = callback
+
+
+class TimerHeap:
+    """Every countdown the cog is running, in one heap served by one task.
+
+    Deadlines are wall clock epochs, the same ones shown to players, and each is known
+    by a key such as ``("adventure", guild_id)``. The task sleeps until the earliest
+    deadline and only wakes early when an earlier one is added. A due deadline resolves
+    its future and starts its callback, if it has one. Cancelling the future drops the
+    deadline.
+    """
+
+    def __init__(self):
+        self._deadlines: Dict[Hashable, _Deadline] = {}
+        # (when, seq, key), entries whose seq no longer matches the key's deadline are skipped.
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._seq = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def schedule(
+        self, key: Hashable, when: float, callback: Optional[Callable[[], Awaitable]] = None
+    ) -> asyncio.Future:
+        """Set the deadline for `key` to the epoch `when`, replacing any deadline it had.
+
+        Returns a future that resolves when the deadline passes.
+        """
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        self.cancel(key)
+        self._seq += 1
+        future = loop.create_future()
+        self._deadlines[key] = deadline = _Deadline(when, self._seq, future, callback)
+        future.add_done_callback(lambda f: self._forget(key, deadline))
+        if not self._heap or when < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (when, self._seq, key))
+        return future
+
+    def remaining(self, key: Hashable) -> Optional[float]:
+        """Seconds until `key` is due, or None if it has no deadline."""
+        deadline = self._deadlines.get(key)
+        if deadline is None or deadline.future.done():
+            return None
+        return deadline.when - time.time()
+
+    def cancel(self, key: Hashable) -> None:
+        deadline = self._deadlines.pop(key, None)
+        if deadline is not None:
+            deadline.future.cancel()
+
+    def _forget(self, key: Hashable, deadline: _Deadline) -> None:
+        if self._deadlines.get(key) is deadline:
+            del self._deadlines[key]
+
+    def _fire(self, deadline: _Deadline) -> None:
+        if not deadline.future.done():
+            deadline.future.set_result(None)
+        if deadline.callback is not None:
+            asyncio.get_running_loop().create_task(self._callback(deadline.callback))
+
+    @staticmethod
+    async def _callback(callback: Callable[[], Awaitable]) -> None:
+        try:
+            await callback()
+        except Exception as exc:
+            log.exception("Error in a countdown callback", exc_info=exc)
+
+    async def _run(self) -> None:
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                (when, seq, key) = heapq.heappop(self._heap)
+                deadline = self._deadlines.get(key)
+                if deadline is not None and deadline.seq == seq:
+                    del self._deadlines[key]
+                    self._fire(deadline)
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - now if self._heap else None
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+
+    def close(self) -> None:
+        """Stop the task and cancel every deadline."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for key in list(self._deadlines):
+            self.cancel(key)
+        self._heap.clear()